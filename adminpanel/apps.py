@@ -5,3 +5,5 @@ class AdminpanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adminpanel'
 
+    def ready(self):
+        import adminpanel.signals  # registers search-index sync handlers
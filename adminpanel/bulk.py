@@ -0,0 +1,123 @@
+# adminpanel/bulk.py
+"""
+executemany() writes for large batches of rows.
+
+bulk_create() and bulk_update() compile every value through the expression API, and
+bulk_update() builds a CASE per row and field; for large batches that work costs more
+than the database does. These helpers prepare one parameterised statement and hand the
+driver a list of tuples instead.
+
+Values are prepared per field type (datetimes/dates through connection.ops, anything
+else non-trivial through the field), so instances and tuples must hold values of the
+field's Python type. No signals are sent and no pks are set on inserted instances:
+callers maintain derived tables themselves.
+"""
+from django.db import connections, models, router
+from django.utils import timezone
+
+# fields whose Python values the drivers accept as-is
+_PLAIN = (
+    models.AutoField, models.BigAutoField, models.BigIntegerField, models.BooleanField,
+    models.CharField, models.FloatField, models.ForeignKey, models.IntegerField, models.TextField,
+)
+
+
+def _preparer(field, connection):
+    if isinstance(field, models.DateTimeField):
+        return connection.ops.adapt_datetimefield_value
+    if isinstance(field, models.DateField):
+        return connection.ops.adapt_datefield_value
+    if isinstance(field, _PLAIN):
+        return None
+    return lambda value: field.get_db_prep_save(value, connection)
+
+
+def _rows(rows, fields, connection):
+    """Driver parameters for value tuples in `fields` order."""
+    preparers = [
+        # batches repeat timestamps (one "now" per batch): prepare each distinct one once
+        (i, prepare, {} if isinstance(field, models.DateField) else None)
+        for i, field in enumerate(fields) if (prepare := _preparer(field, connection))
+    ]
+    if not preparers:
+        return [tuple(row) for row in rows]
+    prepared = []
+    for row in rows:
+        row = list(row)
+        for i, prepare, seen in preparers:
+            value = row[i]
+            if value is None:
+                continue
+            if seen is None:
+                row[i] = prepare(value)
+            else:
+                if value not in seen:
+                    seen[value] = prepare(value)
+                row[i] = seen[value]
+        prepared.append(row)
+    return prepared
+
+
+def _values(objs, fields):
+    attnames = [field.attname for field in fields]
+    auto = {i for i, field in enumerate(fields) if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)}
+    now = timezone.now()
+    for obj in objs:
+        row = [getattr(obj, attname) for attname in attnames]
+        for i in auto:
+            if row[i] is None:
+                row[i] = now
+        yield row
+
+
+def _connection(model, using):
+    return connections[using or router.db_for_write(model)]
+
+
+def insert_rows(model, fields, rows, using=None):
+    """INSERT value tuples, in `fields` order, into a model's table."""
+    if not rows:
+        return
+    opts = model._meta
+    fields = [opts.get_field(name) for name in fields]
+    connection = _connection(model, using)
+    quote = connection.ops.quote_name
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        quote(opts.db_table), ", ".join(quote(f.column) for f in fields), ", ".join(["%s"] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, _rows(rows, fields, connection))
+
+
+def insert(objs, fields=None, using=None):
+    """
+    INSERT unsaved instances of one model. `fields` defaults to every concrete field but
+    an auto pk; unset auto_now / auto_now_add fields get the current time.
+    """
+    if not objs:
+        return
+    model = type(objs[0])
+    if fields is None:
+        fields = [f.name for f in model._meta.concrete_fields if not (f.primary_key and isinstance(f, models.AutoField))]
+    concrete = [model._meta.get_field(name) for name in fields]
+    insert_rows(model, fields, list(_values(objs, concrete)), using)
+
+
+def update_rows(model, fields, rows, increment=(), using=None):
+    """
+    UPDATE by pk: each row is (*values for `fields`, pk). Fields also named in `increment`
+    are added to instead of set, so concurrent increments of a row do not lose updates.
+    """
+    if not rows:
+        return
+    opts = model._meta
+    concrete = [opts.get_field(name) for name in fields] + [opts.pk]
+    connection = _connection(model, using)
+    quote = connection.ops.quote_name
+    assignments = [
+        f"{quote(f.column)} = {quote(f.column)} + %s" if name in increment else f"{quote(f.column)} = %s"
+        for name, f in zip(fields, concrete)
+    ]
+    sql = "UPDATE %s SET %s WHERE %s = %%s" % (quote(opts.db_table), ", ".join(assignments), quote(opts.pk.column))
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, _rows(rows, concrete, connection))
@@ -0,0 +1,189 @@
+# adminpanel/cache.py
+"""
+Versioned read-through cache for admin analytics and reference data.
+
+Entries are keyed by the current version of every namespace they depend on
+("grievances", "categories", "users", "sla"). The signal handlers in signals.py bump a
+namespace on post_save/post_delete, which orphans every dependent key at once (old
+entries simply expire). Code that writes with queryset.update()/bulk_create() must
+call bump() itself.
+
+Writers bump with bump_on_commit(): a version bumped before the transaction commits lets
+a concurrent reader recompute from the old rows and cache them under the new key for a
+whole TTL. Until it commits, the writing transaction's own reads of a namespace it has
+written skip the cache (it must see its writes; nobody else may cache them).
+
+Settings:
+  ADMINPANEL_CACHE_ENABLED  (default True)   turn the layer off entirely
+  ADMINPANEL_CACHE_ALIAS    (default "default") which CACHES entry to use; locmem is
+                            per-process, so multi-process deployments should point this
+                            at a shared backend (Redis/Memcached) for invalidation to
+                            reach every worker
+  ADMINPANEL_CACHE_TTL      (default 300)     seconds
+
+Concurrent misses for one key are coalesced: threads in a process wait on a local lock,
+processes on a short cache.add() lock, and one computation fills the entry for all.
+Hit/miss counters live in the cache too (see stats()).
+"""
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+NAMESPACES = ("grievances", "categories", "users", "sla")
+PREFIX = "adminpanel:cache"
+LOCK_TIMEOUT = 30  # seconds a computing process may hold the cross-process lock
+LOCK_POLL = 0.05
+
+_local_locks = weakref.WeakValueDictionary()
+_local_locks_guard = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, "ADMINPANEL_CACHE_ENABLED", True)
+
+
+def backend():
+    return caches[getattr(settings, "ADMINPANEL_CACHE_ALIAS", "default")]
+
+
+def default_ttl():
+    return getattr(settings, "ADMINPANEL_CACHE_TTL", 300)
+
+
+def _version_key(namespace):
+    return f"{PREFIX}:v:{namespace}"
+
+
+def versions(namespaces):
+    """Current version of each namespace (missing versions start at 1)."""
+    keys = {ns: _version_key(ns) for ns in namespaces}
+    found = backend().get_many(keys.values())
+    return {ns: found.get(key, 1) for ns, key in keys.items()}
+
+
+def bump(*namespaces):
+    """Invalidate everything cached under the given namespaces."""
+    cache = backend()
+    for ns in namespaces:
+        key = _version_key(ns)
+        # seed at 1 if absent so incr() has something to increment (incr is atomic
+        # on shared backends; add() avoids clobbering a concurrent bump)
+        cache.add(key, 1, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+
+
+class _Bump:
+    """An on_commit() bump; Django drops it if its transaction (or savepoint) rolls back."""
+
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+
+    def __call__(self):
+        bump(*self.namespaces)
+
+
+def _pending(connection):
+    """Namespaces the connection's open transaction has written but not bumped yet."""
+    if not connection.in_atomic_block:
+        return set()
+    return {ns for _, func, *_ in connection.run_on_commit if isinstance(func, _Bump) for ns in func.namespaces}
+
+
+def bump_on_commit(*namespaces, using=None):
+    """bump() once the current transaction commits (right away outside one)."""
+    connection = transaction.get_connection(using)
+    # one pending bump per namespace: a later write in the transaction commits (or rolls back) with it
+    namespaces = tuple(ns for ns in namespaces if ns not in _pending(connection))
+    if namespaces:
+        transaction.on_commit(_Bump(namespaces), using=using)
+
+
+def _count(kind, name):
+    cache = backend()
+    key = f"{PREFIX}:stats:{kind}:{name}"
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def stats(names):
+    """{name: {"hits": n, "misses": n}} for the given entry names."""
+    cache = backend()
+    keys = {f"{PREFIX}:stats:{kind}:{name}": (name, kind) for name in names for kind in ("hits", "misses")}
+    found = cache.get_many(keys)
+    out = {name: {"hits": 0, "misses": 0} for name in names}
+    for key, (name, kind) in keys.items():
+        out[name][kind] = found.get(key, 0)
+    return out
+
+
+def entry_key(name, depends_on, *parts):
+    """Full cache key for an entry: its name, the versions it depends on, and any params."""
+    current = versions(depends_on)
+    version_tag = ".".join(f"{ns}{current[ns]}" for ns in depends_on)
+    suffix = ":".join(str(p) for p in parts)
+    return f"{PREFIX}:{name}:{version_tag}:{suffix}"
+
+
+def _local_lock(key):
+    with _local_locks_guard:
+        lock = _local_locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _local_locks[key] = lock
+        return lock
+
+
+def get_or_compute(name, depends_on, compute, *parts, ttl=None):
+    """
+    Return the cached value for (name, parts) under the current namespace versions,
+    computing it once on a miss. With the layer disabled, or inside a transaction with a
+    pending bump of a namespace it depends on, just calls compute().
+    """
+    if not enabled() or _pending(transaction.get_connection()) & set(depends_on):
+        return compute()
+    cache = backend()
+    key = entry_key(name, depends_on, *parts)
+    ttl = default_ttl() if ttl is None else ttl
+
+    hit = cache.get(key)
+    if hit is not None:
+        _count("hits", name)
+        return hit[0]
+
+    lock = _local_lock(key)  # held in a local so the weak entry lives while we wait
+    with lock:
+        hit = cache.get(key)
+        if hit is not None:  # another thread filled it while we waited
+            _count("hits", name)
+            return hit[0]
+
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            # another process is computing: wait for its result rather than recompute
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL)
+                hit = cache.get(key)
+                if hit is not None:
+                    _count("hits", name)
+                    return hit[0]
+                if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                    break  # the other process gave up; compute it ourselves
+
+        _count("misses", name)
+        try:
+            value = compute()
+            cache.set(key, (value,), ttl)  # wrapped so None is cacheable
+        finally:
+            cache.delete(lock_key)
+        return value
@@ -0,0 +1,179 @@
+# adminpanel/changes.py
+"""
+Change feed for incremental sync (GET /api/changes/?since=<cursor>).
+
+Every grievance write appends a GrievanceChange row (upsert or delete), in the writer's
+transaction when there is one: post_save / post_delete do it per row (signals.py), and
+the writers that bypass signals (import, bulk retriage, SLA deadline refresh, rollup
+backfill, SET_NULL on a deleted category/department/user) call record() /
+record_queryset() themselves.
+The row's auto-increment id is the sequence and the cursor is the last id a client has
+seen, so a sync reads only what changed since then.
+
+Ids are handed out when a row is inserted, not when its transaction commits, so a
+reader can see id n+1 before id n is committed. read() therefore stops before any gap
+in the sequence whose following entry is younger than ADMINPANEL_CHANGES_SETTLE_SECONDS;
+an older gap is taken to be a rolled-back write and skipped. Transactions that write
+grievances must commit within that window for the feed to be in commit order.
+
+A long-poll waits on a condition that record() notifies once the writer's transaction
+commits (so it never wakes before the new rows are visible); writers in other processes
+are picked up by re-reading every POLL_INTERVAL.
+
+A batch carries each grievance's current row (as in the NDJSON export) once, at the
+position of its latest entry; deletes carry only the id. Entries older than
+ADMINPANEL_CHANGES_RETENTION_DAYS are removed by `prune_changes`; a cursor from before
+the oldest entry left raises CursorExpired (the client resyncs from a full export).
+"""
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from adminpanel import bulk, exports
+from adminpanel.models import Grievance, GrievanceChange
+
+UPSERT = GrievanceChange.OP_UPSERT
+DELETE = GrievanceChange.OP_DELETE
+MAX_LIMIT = 1000
+POLL_INTERVAL = 0.5  # longest wait between reads while long-polling
+CHUNK = 5000
+
+_committed = threading.Condition()
+_generation = 0  # commits that recorded entries, in this process
+
+
+class CursorExpired(ValueError):
+    """Raised when the entries after a cursor have been pruned."""
+
+
+def batch_size():
+    return max(1, min(int(getattr(settings, "ADMINPANEL_CHANGES_BATCH_SIZE", 500)), MAX_LIMIT))
+
+
+def max_wait():
+    return max(0, int(getattr(settings, "ADMINPANEL_CHANGES_MAX_WAIT", 30)))
+
+
+def settle_seconds():
+    return max(0, int(getattr(settings, "ADMINPANEL_CHANGES_SETTLE_SECONDS", 30)))
+
+
+def _notify():
+    global _generation
+    with _committed:
+        _generation += 1
+        _committed.notify_all()
+
+
+def record(ids, op=UPSERT):
+    """Append one entry per grievance id (in the caller's transaction); long-polls wake on commit."""
+    now = timezone.now()
+    bulk.insert_rows(GrievanceChange, ("grievance_id", "op", "created_at"), [(pk, op, now) for pk in ids])
+    transaction.on_commit(_notify)
+
+
+def record_queryset(qs, op=UPSERT):
+    """record() for the grievances a queryset matches, read in pk chunks; returns the count."""
+    ids = qs.order_by("pk").values_list("pk", flat=True)
+    last_pk = 0
+    recorded = 0
+    while True:
+        chunk = list(ids.filter(pk__gt=last_pk)[:CHUNK])
+        if not chunk:
+            return recorded
+        record(chunk, op)
+        recorded += len(chunk)
+        last_pk = chunk[-1]
+
+
+def head():
+    """The newest sequence number (0 for an empty log): a cursor that skips the history."""
+    return GrievanceChange.objects.aggregate(last=Max("id"))["last"] or 0
+
+
+def _settled(rows, since, now):
+    """The leading rows that no still-open transaction can precede."""
+    horizon = now - datetime.timedelta(seconds=settle_seconds())
+    expected = since + 1
+    for i, (seq, _, _, created_at) in enumerate(rows):
+        if seq != expected and created_at > horizon:
+            return rows[:i]
+        expected = seq + 1
+    return rows
+
+
+def _entries(rows):
+    """One entry per grievance (its latest), in sequence order, upserts with the current row."""
+    latest = {}
+    for seq, grievance_id, op, created_at in rows:
+        latest[grievance_id] = (seq, op, created_at)
+    upserts = [pk for pk, (_, op, _) in latest.items() if op == UPSERT]
+    current = {
+        row[0]: exports._ndjson_object(row)
+        for row in Grievance.objects.filter(pk__in=upserts).order_by().values_list(*exports.NDJSON_FIELDS)
+    }
+    entries = []
+    for grievance_id, (seq, op, created_at) in sorted(latest.items(), key=lambda item: item[1][0]):
+        if op == UPSERT and grievance_id not in current:
+            continue  # deleted since: its delete entry follows
+        entry = {"seq": seq, "op": op, "id": grievance_id, "changed_at": created_at.isoformat()}
+        if op == UPSERT:
+            entry["grievance"] = current[grievance_id]
+        entries.append(entry)
+    return entries
+
+
+def read(since, limit=None):
+    """
+    Up to `limit` entries after the cursor `since`. Returns {"changes", "next", "has_more"};
+    "next" is the cursor to send back (unchanged when there was nothing to read).
+    """
+    limit = max(1, min(limit or batch_size(), MAX_LIMIT))
+    rows = list(
+        GrievanceChange.objects.filter(id__gt=since).order_by("id")
+        .values_list("id", "grievance_id", "op", "created_at")[:limit + 1]
+    )
+    if since and rows and rows[0][0] != since + 1:
+        oldest = GrievanceChange.objects.aggregate(first=Min("id"))["first"]
+        if since + 1 < oldest:
+            raise CursorExpired("Changes after this cursor have been pruned; resync from a full export.")
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    settled = _settled(rows, since, timezone.now())
+    if len(settled) < len(rows):
+        rows, has_more = settled, True
+    return {
+        "changes": _entries(rows),
+        "next": str(rows[-1][0] if rows else since),
+        "has_more": has_more,
+    }
+
+
+def poll(since, limit=None, wait=0):
+    """
+    read(), waiting up to `wait` seconds while nothing is ready: it re-reads when a commit
+    in this process records entries, and at least every POLL_INTERVAL.
+    """
+    deadline = time.monotonic() + min(wait, max_wait())
+    while True:
+        with _committed:
+            seen = _generation  # taken before reading, so a commit during read() is not missed
+        result = read(since, limit)
+        remaining = deadline - time.monotonic()
+        if result["changes"] or result["next"] != str(since) or remaining <= 0:
+            return result
+        with _committed:
+            _committed.wait_for(lambda: _generation != seen, timeout=min(POLL_INTERVAL, remaining))
+
+
+def prune(days=None):
+    """Delete entries older than `days` (default ADMINPANEL_CHANGES_RETENTION_DAYS), always keeping the newest."""
+    days = days if days is not None else int(getattr(settings, "ADMINPANEL_CHANGES_RETENTION_DAYS", 30))
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = GrievanceChange.objects.filter(created_at__lt=cutoff, id__lt=head()).delete()
+    return deleted
@@ -0,0 +1,376 @@
+# adminpanel/columnar.py
+"""
+Columnar snapshot of grievance facts for ad-hoc analytics (officer x category x month,
+rating vs. resolution time, ...) without full-table ORM scans.
+
+`export_analytics_snapshot` writes one .npy file per column into a versioned
+directory under ADMINPANEL_SNAPSHOT_DIR and then points CURRENT at it (readers never
+see a half-written snapshot). Columns, one row per grievance in id order:
+
+    id          int64    grievance id (sorted: positions are found with searchsorted)
+    status      int8     index into STATUSES
+    category    int32    category id, 0 = none (same for department / officer)
+    department  int32
+    officer     int32
+    created     int64    epoch seconds
+    resolved    int64    epoch seconds, -1 = not resolved
+    due         int64    epoch seconds, -1 = no deadline
+    resolution  float64  resolved - created in seconds, NaN = not resolved
+    assignment  float64  seconds to first assignment (lifecycle), NaN = never assigned
+    reassigned  int16    reassignments (lifecycle)
+    rating      int8     feedback rating 1-5, 0 = none
+
+Refreshes are incremental: rows past the id watermark are appended, rows updated (or
+given feedback) since the previous refresh are patched in place, and rows deleted since
+are dropped when the id count says some are gone. --full rewrites everything.
+
+Queries load the columns memory-mapped and group with np.unique(return_inverse) +
+bincount; percentiles sort once by (group, value) and interpolate per group, so no
+Python loop runs per row. Date buckets are UTC.
+
+Settings:
+  ADMINPANEL_SNAPSHOT_DIR  (default BASE_DIR / "var" / "analytics_snapshot")
+"""
+import datetime
+import json
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+
+from adminpanel.models import Category, Department, Grievance
+
+try:
+    import numpy as np
+except ImportError:  # optional: the snapshot API answers 503 without it
+    np = None
+
+STATUSES = [status for status, _ in Grievance.STATUS_CHOICES]
+COLUMNS = {
+    "id": "int64", "status": "int8", "category": "int32", "department": "int32", "officer": "int32",
+    "created": "int64", "resolved": "int64", "due": "int64",
+    "resolution": "float64", "assignment": "float64", "reassigned": "int16", "rating": "int8",
+}
+ROW_FIELDS = (
+    "id", "status", "category_id", "department_id", "assigned_officer_id", "created_at", "resolved_at",
+    "due_at", "lifecycle__first_assigned_at", "lifecycle__reassignments", "feedback__rating",
+)
+DIMENSIONS = ("status", "category", "department", "officer", "rating", "day", "week", "month", "year")
+# metric name -> (column, divisor): values are reported in days / hours / stars
+METRICS = {
+    "resolution_days": ("resolution", 86400.0),
+    "assignment_hours": ("assignment", 3600.0),
+    "reassignments": ("reassigned", 1.0),
+    "rating": ("rating", 1.0),
+}
+AGGREGATES = ("count", "sum", "mean", "min", "max", "p50", "p90", "p95", "p99")
+CHUNK = 20000
+CURRENT = "CURRENT"
+# updates committed while a refresh reads may carry an earlier updated_at
+REFRESH_OVERLAP = datetime.timedelta(seconds=60)
+
+
+class SnapshotUnavailable(Exception):
+    """No snapshot has been exported yet, or NumPy is not installed."""
+
+
+def snapshot_dir():
+    return Path(getattr(settings, "ADMINPANEL_SNAPSHOT_DIR", settings.BASE_DIR / "var" / "analytics_snapshot"))
+
+
+def _require_numpy():
+    if np is None:
+        raise SnapshotUnavailable("NumPy is required for the analytics snapshot.")
+
+
+def _epoch(value, missing=-1):
+    return int(value.timestamp()) if value else missing
+
+
+def _rows_to_columns(rows):
+    """Column arrays for a list of ROW_FIELDS tuples."""
+    status_code = {status: code for code, status in enumerate(STATUSES)}
+    n = len(rows)
+    out = {name: np.empty(n, dtype=dtype) for name, dtype in COLUMNS.items()}
+    for i, (pk, status, category_id, department_id, officer_id, created_at, resolved_at, due_at,
+            first_assigned_at, reassignments, rating) in enumerate(rows):
+        out["id"][i] = pk
+        out["status"][i] = status_code.get(status, -1)
+        out["category"][i] = category_id or 0
+        out["department"][i] = department_id or 0
+        out["officer"][i] = officer_id or 0
+        out["created"][i] = _epoch(created_at)
+        resolved = _epoch(resolved_at) if status == Grievance.STATUS_RESOLVED else -1
+        out["resolved"][i] = resolved
+        out["due"][i] = _epoch(due_at)
+        out["resolution"][i] = max(0, resolved - out["created"][i]) if resolved >= 0 else np.nan
+        out["assignment"][i] = max(0.0, (first_assigned_at - created_at).total_seconds()) if first_assigned_at else np.nan
+        out["reassigned"][i] = reassignments or 0
+        out["rating"][i] = rating or 0
+    return out
+
+
+def _fetch(qs, chunk):
+    """Stream ROW_FIELDS for a grievance queryset in id order (keyset batches) into column arrays."""
+    qs = qs.order_by("id").values_list(*ROW_FIELDS)
+    parts, last_id = [], 0
+    while True:
+        batch = list(qs.filter(id__gt=last_id)[:chunk])
+        if not batch:
+            break
+        parts.append(_rows_to_columns(batch))
+        last_id = batch[-1][0]
+    if not parts:
+        return _rows_to_columns([])
+    return {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+
+
+def read_meta(base=None):
+    """The current snapshot's meta.json (plus its directory as "path"), or None."""
+    base = base or snapshot_dir()
+    try:
+        version = (base / CURRENT).read_text().strip()
+        meta = json.loads((base / version / "meta.json").read_text())
+    except (OSError, ValueError):
+        return None
+    meta["path"] = str(base / version)
+    return meta
+
+
+def _write(base, columns, meta):
+    """Write a new version directory, switch CURRENT to it and remove older versions."""
+    version = f"v{timezone.now().strftime('%Y%m%d%H%M%S%f')}"
+    target = base / version
+    target.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(target / f"{name}.npy", np.ascontiguousarray(values, dtype=COLUMNS[name]))
+    meta = {**meta, "version": version, "rows": int(len(columns["id"]))}
+    (target / "meta.json").write_text(json.dumps(meta, indent=2))
+    pointer = base / f"{CURRENT}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, base / CURRENT)
+    for old in base.iterdir():
+        if old.is_dir() and old.name.startswith("v") and old.name != version:
+            shutil.rmtree(old, ignore_errors=True)
+    return meta
+
+
+def export(full=False, chunk=CHUNK, base=None):
+    """
+    Create or refresh the snapshot. Returns a summary dict: appended / patched / dropped
+    row counts, total rows and the new watermark.
+    """
+    _require_numpy()
+    base = base or snapshot_dir()
+    base.mkdir(parents=True, exist_ok=True)
+    started = timezone.now()
+    meta = None if full else read_meta(base)
+
+    if meta is None:
+        columns = _fetch(Grievance.objects.all(), chunk)
+        stats = {"full": True, "appended": int(len(columns["id"])), "patched": 0, "dropped": 0}
+    else:
+        watermark = meta["watermark"]
+        since = datetime.datetime.fromisoformat(meta["refreshed_at"]) - REFRESH_OVERLAP
+        old = load(base)
+        columns = {name: np.array(old[name]) for name in COLUMNS}  # writable copies of the mmaps
+        del old
+
+        # rows deleted since the last refresh: only paid for when the count shows some
+        dropped = 0
+        if Grievance.objects.filter(id__lte=watermark).count() != len(columns["id"]):
+            live = np.fromiter(
+                Grievance.objects.filter(id__lte=watermark).order_by("id").values_list("id", flat=True).iterator(chunk_size=chunk),
+                dtype=np.int64,
+            )
+            keep = np.isin(columns["id"], live, assume_unique=True)
+            dropped = int((~keep).sum())
+            columns = {name: values[keep] for name, values in columns.items()}
+
+        # rows changed (or rated) since the last refresh: patched at their sorted positions
+        changed = Grievance.objects.filter(id__lte=watermark).filter(
+            Q(updated_at__gte=since) | Q(feedback__submitted_at__gte=since)
+        )
+        patch = _fetch(changed, chunk)
+        ids = columns["id"]
+        pos = np.searchsorted(ids, patch["id"])
+        found = pos < len(ids)
+        found[found] = ids[pos[found]] == patch["id"][found]
+        for name in COLUMNS:
+            columns[name][pos[found]] = patch[name][found]
+
+        appended = _fetch(Grievance.objects.filter(id__gt=watermark), chunk)
+        columns = {name: np.concatenate([columns[name], appended[name]]) for name in COLUMNS}
+        stats = {"full": False, "appended": int(len(appended["id"])), "patched": int(found.sum()), "dropped": dropped}
+
+    watermark = int(columns["id"][-1]) if len(columns["id"]) else (meta or {}).get("watermark", 0)
+    written = _write(base, columns, {"watermark": watermark, "refreshed_at": started.isoformat(), "statuses": STATUSES})
+    return {**stats, "rows": written["rows"], "watermark": watermark, "version": written["version"]}
+
+
+def load(base=None):
+    """{column: read-only memory-mapped array} plus "meta" for the current snapshot."""
+    _require_numpy()
+    meta = read_meta(base)
+    if meta is None:
+        raise SnapshotUnavailable("No analytics snapshot yet: run export_analytics_snapshot.")
+    path = Path(meta["path"])
+    data = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+    data["meta"] = meta
+    return data
+
+
+def _bucket(created, dimension):
+    """Date bucket codes (datetime64) for epoch seconds."""
+    days = created.astype("datetime64[s]").astype("datetime64[D]")
+    if dimension == "day":
+        return days
+    if dimension == "week":
+        # weeks start on Monday; 1970-01-01 was a Thursday
+        return ((days.astype(np.int64) + 3) // 7 * 7 - 3).astype("datetime64[D]")
+    return days.astype("datetime64[M]" if dimension == "month" else "datetime64[Y]")
+
+
+def _dimension(data, dimension, mask):
+    if dimension in ("day", "week", "month", "year"):
+        return _bucket(data["created"][mask], dimension)
+    return np.asarray(data[dimension][mask])
+
+
+def _group_percentiles(inverse, values, groups, fractions):
+    """
+    Per-group linear-interpolation percentiles (numpy 'linear' / percentile_cont) over
+    non-NaN values: one lexsort by (group, value), then index arithmetic per fraction.
+    """
+    valid = ~np.isnan(values)
+    g, v = inverse[valid], values[valid]
+    order = np.lexsort((v, g))
+    v = v[order]
+    counts = np.bincount(g, minlength=groups)
+    starts = np.cumsum(counts) - counts
+    out = {}
+    for name, fraction in fractions.items():
+        pos = starts + (np.maximum(counts, 1) - 1) * fraction
+        lo, hi = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+        if len(v):
+            lo, hi = np.minimum(lo, len(v) - 1), np.minimum(hi, len(v) - 1)
+            result = v[lo] + (v[hi] - v[lo]) * (pos - lo)
+        else:
+            result = np.zeros(groups)
+        out[name] = np.where(counts > 0, result, np.nan)
+    return out
+
+
+def _labels(dimension, values):
+    """JSON labels for one dimension's group values (ids resolved to names)."""
+    if dimension == "status":
+        return [STATUSES[v] if 0 <= v < len(STATUSES) else None for v in values.tolist()]
+    if dimension in ("category", "department"):
+        model = Category if dimension == "category" else Department
+        names = dict(model.objects.filter(pk__in=[v for v in values.tolist() if v]).values_list("pk", "name"))
+        return [{"id": v, "name": names.get(v)} if v else None for v in values.tolist()]
+    if dimension == "officer":
+        names = dict(get_user_model().objects.filter(pk__in=[v for v in values.tolist() if v]).values_list("pk", "username"))
+        return [{"id": v, "username": names.get(v)} if v else None for v in values.tolist()]
+    if dimension == "rating":
+        return [v or None for v in values.tolist()]
+    return [str(v) for v in values]
+
+
+def query(dimensions=(), metric=None, aggregates=("count",), filters=None, limit=None, base=None):
+    """
+    Group the snapshot by `dimensions` and aggregate `metric` (a METRICS key; None counts
+    rows only). `filters`: optional status (name), category / department / officer ids
+    and created_from / created_to dates (inclusive, UTC). Groups come back largest first.
+    """
+    data = load(base)
+    filters = filters or {}
+    n = len(data["id"])
+    mask = np.ones(n, dtype=bool)
+    if filters.get("status") is not None:
+        mask &= data["status"] == STATUSES.index(filters["status"])
+    for name in ("category", "department", "officer"):
+        if filters.get(name) is not None:
+            mask &= data[name] == filters[name]
+    if filters.get("created_from"):
+        start = datetime.datetime.combine(filters["created_from"], datetime.time(), datetime.timezone.utc)
+        mask &= data["created"] >= int(start.timestamp())
+    if filters.get("created_to"):
+        end = datetime.datetime.combine(filters["created_to"] + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc)
+        mask &= data["created"] < int(end.timestamp())
+
+    rows_n = int(mask.sum())
+    if dimensions:
+        keys = [_dimension(data, dimension, mask) for dimension in dimensions]
+        # one integer code per dimension, then one combined group id
+        codes, uniques = [], []
+        for key in keys:
+            unique, inverse = np.unique(key, return_inverse=True)
+            uniques.append(unique)
+            codes.append(inverse.reshape(-1))
+        if rows_n:
+            combined = np.ravel_multi_index(codes, [len(u) for u in uniques])
+            group_ids, inverse = np.unique(combined, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            positions = np.unravel_index(group_ids, [len(u) for u in uniques])
+        else:
+            group_ids, inverse, positions = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), [np.empty(0, dtype=np.int64)] * len(keys)
+    else:
+        group_ids, inverse, positions = np.zeros(1 if rows_n else 0, dtype=np.int64), np.zeros(rows_n, dtype=np.int64), []
+    groups = len(group_ids)
+
+    result = {"rows": np.bincount(inverse, minlength=groups)}
+    if metric is not None:
+        column, divisor = METRICS[metric]
+        values = np.asarray(data[column][mask], dtype=np.float64)
+        if column == "rating":
+            values[values == 0] = np.nan
+        values = values / divisor
+        valid = ~np.isnan(values)
+        counts = np.bincount(inverse[valid], minlength=groups)
+        sums = np.bincount(inverse[valid], weights=values[valid], minlength=groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats = {"count": counts, "sum": sums, "mean": np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)}
+        if "min" in aggregates or "max" in aggregates:
+            low, high = np.full(groups, np.inf), np.full(groups, -np.inf)
+            np.minimum.at(low, inverse[valid], values[valid])
+            np.maximum.at(high, inverse[valid], values[valid])
+            stats["min"] = np.where(counts > 0, low, np.nan)
+            stats["max"] = np.where(counts > 0, high, np.nan)
+        fractions = {name: int(name[1:]) / 100.0 for name in aggregates if name.startswith("p")}
+        if fractions:
+            stats.update(_group_percentiles(inverse, values, groups, fractions))
+        for name in aggregates:
+            result[name] = stats[name]
+
+    order = np.argsort(-result["rows"], kind="stable")
+    if limit:
+        order = order[:limit]
+    labels = [
+        _labels(dimension, uniques[i][positions[i][order]])
+        for i, dimension in enumerate(dimensions)
+    ] if dimensions else []
+
+    out = []
+    for j, g in enumerate(order.tolist()):
+        row = {dimension: labels[i][j] for i, dimension in enumerate(dimensions)}
+        row["rows"] = int(result["rows"][g])
+        for name in aggregates if metric is not None else ():
+            value = float(result[name][g])
+            row[name] = int(value) if name == "count" else (None if np.isnan(value) else round(value, 4))
+        out.append(row)
+
+    meta = data["meta"]
+    return {
+        "dimensions": list(dimensions),
+        "metric": metric,
+        "aggregates": list(aggregates) if metric is not None else [],
+        "matched": rows_n,
+        "groups": groups,
+        "results": out,
+        "snapshot": {"version": meta["version"], "refreshed_at": meta["refreshed_at"], "rows": meta["rows"], "watermark": meta["watermark"]},
+    }
@@ -0,0 +1,94 @@
+# adminpanel/conditional.py
+"""
+ETag / Last-Modified validators for the grievance read APIs.
+
+Validators are cheap aggregates, not hashes of the response body:
+  - detail: the grievance's updated_at plus a version of its remarks and feedback
+  - list:   max(updated_at) under an indexed filter, the list's own (cached) count, and
+            the cache versions of the names the rows show (see grievance_list_validators)
+
+They are computed inside the view (after authentication and filter validation), and
+a matching If-None-Match / If-Modified-Since short-circuits to 304 before rows are
+fetched or serialized.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from adminpanel import cache as admin_cache, rollups
+from adminpanel.models import Grievance
+
+
+def make_etag(*parts):
+    """Weak ETag from the given parts (the body may differ byte-wise, e.g. key order)."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return 'W/"%s"' % hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _latest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def grievance_detail_validators(grievance, request):
+    """(etag, last_modified) for one grievance as served by the detail API."""
+    remarks = grievance.remarks.order_by().aggregate(n=Count("id"), last_id=Max("id"), last_at=Max("created_at"))
+    # feedback is edited in place, so its content is part of the version
+    # (loaders.get_grievance() select_related()s it, so this costs no query)
+    fb = getattr(grievance, "feedback", None)
+    feedback = (fb.pk, fb.rating, fb.comments, fb.submitted_at) if fb else None
+    etag = make_etag(
+        "grievance", grievance.pk, grievance.updated_at.isoformat() if grievance.updated_at else None,
+        remarks["n"], remarks["last_id"], feedback, request.GET.urlencode(),
+    )
+    last_modified = _latest(grievance.updated_at, remarks["last_at"], feedback[3] if feedback else None)
+    return etag, last_modified
+
+
+def grievance_list_validators(request, spec, *extra, count=None):
+    """
+    (etag, last_modified) for a filtered grievance list, plus the paging/field params.
+
+    Rows show category/department names and usernames, so the "categories" and "users"
+    cache versions are always part of it. An indexed (cheap) spec adds the newest
+    updated_at under it: a create or edit moves it. `count` is the list's own
+    count_grievances() result (offset mode), which a delete changes; without it, or for
+    a spec that would need a scan (search, category name), the "grievances" version
+    stands in, so no aggregate runs over the filtered rows at all.
+    """
+    last = None
+    if spec.is_cheap:
+        last = spec.apply(Grievance.objects.order_by(), rank=False).aggregate(last=Max("updated_at"))["last"]
+    namespaces = ("categories", "users") if spec.is_cheap and count is not None else ("grievances", "categories", "users")
+    versions = admin_cache.versions(namespaces)
+    etag = make_etag("grievances", spec.signature, count, last.isoformat() if last else None,
+                     *(versions[ns] for ns in namespaces), request.GET.urlencode(), *extra)
+    return etag, last
+
+
+def rollup_validators(request, spec, *extra):
+    """(etag, last_modified) for a summary served from GrievanceDailyStats."""
+    rows, last = rollups.rollup_watermark(spec)
+    etag = make_etag("rollup", spec.signature, rows, last.isoformat() if last else None, request.GET.urlencode(), *extra)
+    return etag, last
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response when the client's validators still match, else None."""
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Attach validators to a 200 response. no-cache makes browsers revalidate every time
+    instead of serving a stale admin list from their own cache.
+    """
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    response["Cache-Control"] = "private, no-cache"
+    return response
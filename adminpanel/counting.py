@@ -0,0 +1,94 @@
+# adminpanel/counting.py
+import json
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Min
+from django.utils import timezone
+
+from adminpanel import cache as admin_cache
+
+logger = logging.getLogger(__name__)
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _planner_estimate(qs):
+    """Row estimate from the PostgreSQL planner; None on other backends or on failure."""
+    if connection.vendor != "postgresql":
+        return None
+    try:
+        sql, sql_params = qs.order_by().values("pk").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, sql_params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as exc:
+        logger.warning("count planner estimate failed: %s", exc)
+        return None
+
+
+def _extrapolated_estimate(qs, sample_size):
+    """
+    Portable estimate: find how far back in time the newest `sample_size` matches reach,
+    and scale by the full time span of the table (assumes roughly uniform arrival).
+    Both lookups walk the created_at index and stop early.
+    """
+    nth = qs.order_by("-created_at").values_list("created_at", flat=True)[sample_size - 1: sample_size]
+    nth = list(nth)
+    oldest = qs.model.objects.aggregate(oldest=Min("created_at"))["oldest"]
+    if not nth or oldest is None:
+        return None
+    now = timezone.now()
+    sampled_span = (now - nth[0]).total_seconds()
+    full_span = (now - oldest).total_seconds()
+    if sampled_span <= 0:
+        return None
+    return max(sample_size, int(sample_size * (full_span / sampled_span)))
+
+
+def count_grievances(qs, spec):
+    """
+    Count strategy for the grievance list.
+
+    - Cheap (indexed) filters get an exact COUNT(*).
+    - Expensive filters run a bounded COUNT capped at ADMINPANEL_COUNT_ESTIMATE_THRESHOLD;
+      above the cap we return an estimate (planner stats on PostgreSQL, time-span
+      extrapolation elsewhere).
+    - Results are cached per filter spec signature for ADMINPANEL_COUNT_CACHE_TTL seconds
+      in the versioned cache, so a grievance (or category/user) write invalidates them.
+
+    `qs` must be `spec` applied to the grievance table (see filters.GrievanceFilterSpec).
+
+    Returns (count, is_estimate).
+    """
+    ttl = _setting("ADMINPANEL_COUNT_CACHE_TTL", 30)
+    threshold = _setting("ADMINPANEL_COUNT_ESTIMATE_THRESHOLD", 10000)
+
+    def compute():
+        return _count(qs, spec, threshold)
+
+    if not ttl:
+        return compute()
+    # filters match on category and user names as well as grievance columns
+    return admin_cache.get_or_compute(
+        "grievance_count", ("grievances", "categories", "users"), compute, spec.signature, ttl=ttl,
+    )
+
+
+def _count(qs, spec, threshold):
+    qs = qs.order_by().values("pk")  # drops select_related joins and rank annotations from COUNT
+    if spec.is_cheap or not threshold:
+        return qs.count(), False
+    bounded = qs[: threshold + 1].count()
+    if bounded <= threshold:
+        return bounded, False
+    approx = _planner_estimate(qs)
+    if approx is None:
+        approx = _extrapolated_estimate(qs, threshold)
+    # the bounded count already proved there are more rows than the threshold
+    return (max(approx, threshold + 1), True) if approx is not None else (qs.count(), False)
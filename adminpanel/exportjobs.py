@@ -0,0 +1,321 @@
+# adminpanel/exportjobs.py
+"""
+Background grievance exports (ExportJob) and their resumable downloads.
+
+POST /api/exports/ stores a queued job with the list filter params. A worker claims it,
+streams exports.csv_chunks() / ndjson_chunks() into <name>.part under
+ADMINPANEL_EXPORT_DIR, records progress on the row as chunks are written and renames the
+file when it is complete. Workers:
+
+  - "thread" (default): a daemon thread in the web process, started once the enqueuing
+    transaction commits; it drains the queue and exits
+  - `run_export_worker`: a separate polling process (set ADMINPANEL_EXPORT_WORKER =
+    "command" so web processes never run exports themselves)
+
+A claim is a conditional UPDATE (queued -> running), so any number of workers can poll.
+A running job whose heartbeat (updated_at) is older than STALE_AFTER is requeued, and
+one that is cancelled stops at its next progress update.
+
+Downloads honour Range / If-Range (single byte ranges), so an interrupted download
+resumes where it stopped. Finished files expire ADMINPANEL_EXPORT_TTL_HOURS after they
+are written: `expire_exports` (run it on a schedule; the worker also runs it between
+jobs) deletes them.
+
+Settings:
+  ADMINPANEL_EXPORT_DIR        (default BASE_DIR / "var" / "exports")
+  ADMINPANEL_EXPORT_WORKER     "thread" (default) or "command"
+  ADMINPANEL_EXPORT_TTL_HOURS  (default 24)
+"""
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import serializers as drf_serializers
+
+from adminpanel import exports
+from adminpanel.filters import GrievanceFilterSpec
+from adminpanel.models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"csv": "csv", "ndjson": "ndjson"}
+CONTENT_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson; charset=utf-8"}
+STALE_AFTER = datetime.timedelta(minutes=10)
+PROGRESS_INTERVAL = 1.0  # seconds between progress writes
+READ_BLOCK = 64 * 1024
+OPEN_STATUSES = (ExportJob.STATUS_QUEUED, ExportJob.STATUS_RUNNING)
+
+_range = re.compile(r"^bytes=(\d*)-(\d*)$")
+_thread = None
+_thread_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    """The job was cancelled (or reclaimed) while it was being written."""
+
+
+def export_dir():
+    return Path(getattr(settings, "ADMINPANEL_EXPORT_DIR", settings.BASE_DIR / "var" / "exports"))
+
+
+def worker_mode():
+    return getattr(settings, "ADMINPANEL_EXPORT_WORKER", "thread")
+
+
+def ttl():
+    return datetime.timedelta(hours=getattr(settings, "ADMINPANEL_EXPORT_TTL_HOURS", 24))
+
+
+def file_path(job):
+    return export_dir() / job.file_name
+
+
+def download_name(job):
+    return f"grievances_export_{job.pk}.{EXTENSIONS[job.format]}"
+
+
+# -----------------------
+# Queue
+# -----------------------
+def enqueue(user, params, fmt="csv", include=()):
+    """Store a queued job; the thread worker (if enabled) starts after the transaction commits."""
+    job = ExportJob.objects.create(
+        created_by=user if user and user.is_authenticated else None,
+        format=fmt, params=params, include=list(include),
+    )
+    if worker_mode() == "thread":
+        transaction.on_commit(start_thread)
+    return job
+
+
+def requeue_stale(now=None):
+    """Jobs left running by a worker that died go back to the queue; returns how many."""
+    now = now or timezone.now()
+    return ExportJob.objects.filter(status=ExportJob.STATUS_RUNNING, updated_at__lt=now - STALE_AFTER).update(
+        status=ExportJob.STATUS_QUEUED, rows_written=0, bytes_written=0, updated_at=now,
+    )
+
+
+def claim_next():
+    """Claim the oldest queued job (conditional UPDATE, safe across workers), or None."""
+    requeue_stale()
+    queued = ExportJob.objects.filter(status=ExportJob.STATUS_QUEUED).order_by("created_at", "id")
+    for pk in queued.values_list("pk", flat=True)[:20]:
+        now = timezone.now()
+        if ExportJob.objects.filter(pk=pk, status=ExportJob.STATUS_QUEUED).update(
+            status=ExportJob.STATUS_RUNNING, started_at=now, updated_at=now, error="",
+        ):
+            return ExportJob.objects.get(pk=pk)
+    return None
+
+
+def cancel(job):
+    """Stop a queued/running job, or delete a finished one and its file."""
+    if job.status in OPEN_STATUSES:
+        ExportJob.objects.filter(pk=job.pk, status__in=OPEN_STATUSES).update(
+            status=ExportJob.STATUS_CANCELLED, finished_at=timezone.now(),
+        )
+        return
+    if job.file_name:
+        file_path(job).unlink(missing_ok=True)
+    job.delete()
+
+
+# -----------------------
+# Worker
+# -----------------------
+def _claimed(job):
+    """The job's row while this claim still owns it (not cancelled, not requeued and reclaimed)."""
+    return ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_RUNNING, started_at=job.started_at)
+
+
+def _progress_writer(job, state):
+    """progress(rows) callback: a throttled heartbeat that also notices cancellation."""
+    def progress(rows):
+        state["rows"] = rows
+        now = time.monotonic()
+        if now - state["reported"] < PROGRESS_INTERVAL:
+            return
+        state["reported"] = now
+        moved = _claimed(job).update(
+            rows_written=rows, bytes_written=state["bytes"], updated_at=timezone.now(),
+        )
+        if not moved:
+            raise Cancelled()
+    return progress
+
+
+def run(job):
+    """Write a claimed job's file; the row ends done, failed or cancelled."""
+    directory = export_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = download_name(job)
+    part = directory / f"{name}.{int(job.started_at.timestamp() * 1e6)}.part"
+    state = {"rows": 0, "bytes": 0, "reported": 0.0}
+    try:
+        spec = GrievanceFilterSpec.from_params(job.params)
+        qs = spec.queryset(rank=False)
+        _claimed(job).update(total_rows=qs.count(), updated_at=timezone.now())
+        progress = _progress_writer(job, state)
+        if job.format == "ndjson":
+            chunks = exports.ndjson_chunks(qs, job.include, progress=progress)
+        else:
+            chunks = exports.csv_chunks(qs, progress=progress)
+        with open(part, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                state["bytes"] += len(chunk)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(part, directory / name)
+        now = timezone.now()
+        done = _claimed(job).update(
+            status=ExportJob.STATUS_DONE, file_name=name, rows_written=state["rows"], bytes_written=state["bytes"],
+            finished_at=now, expires_at=now + ttl(), updated_at=now,
+        )
+        if not done:  # cancelled after the last progress update
+            (directory / name).unlink(missing_ok=True)
+    except Cancelled:
+        part.unlink(missing_ok=True)
+    except Exception as exc:
+        part.unlink(missing_ok=True)
+        if isinstance(exc, drf_serializers.ValidationError):
+            message = str(exc.detail)
+        else:
+            logger.exception("Export job %s failed", job.pk)
+            message = f"{type(exc).__name__}: {exc}"
+        _claimed(job).update(
+            status=ExportJob.STATUS_FAILED, error=message, finished_at=timezone.now(),
+        )
+
+
+def drain():
+    """Run queued jobs until none are left; returns how many ran."""
+    ran = 0
+    while True:
+        job = claim_next()
+        if job is None:
+            return ran
+        run(job)
+        ran += 1
+
+
+def _thread_main():
+    global _thread
+    try:
+        while True:
+            drain()
+            expire()
+            with _thread_lock:
+                # checked again under the lock: a job enqueued meanwhile would otherwise wait
+                if not ExportJob.objects.filter(status=ExportJob.STATUS_QUEUED).exists():
+                    _thread = None
+                    return
+    except Exception:
+        logger.exception("Export worker thread stopped")
+        with _thread_lock:
+            _thread = None
+    finally:
+        connection.close()
+
+
+def start_thread():
+    """Start the in-process worker unless one is already draining the queue."""
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            close_old_connections()
+            _thread = threading.Thread(target=_thread_main, name="adminpanel-export-worker", daemon=True)
+            _thread.start()
+
+
+def expire(now=None):
+    """Delete files of finished jobs past expires_at and mark them expired; returns how many."""
+    now = now or timezone.now()
+    expired = 0
+    for job in ExportJob.objects.filter(status=ExportJob.STATUS_DONE, expires_at__lte=now):
+        if job.file_name:
+            file_path(job).unlink(missing_ok=True)
+        expired += ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_DONE).update(
+            status=ExportJob.STATUS_EXPIRED, file_name="",
+        )
+    return expired
+
+
+# -----------------------
+# Download
+# -----------------------
+def byte_range(header, size):
+    """
+    (start, end) inclusive for a single-range Range header; None to serve the whole
+    file (no header, or one we do not handle); ValueError when it is unsatisfiable.
+    """
+    match = _range.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            block = fh.read(min(READ_BLOCK, length))
+            if not block:
+                return
+            length -= len(block)
+            yield block
+
+
+def download_response(request, job):
+    """The job's file as a 200, or a 206 / 416 for a Range request (If-Range aware)."""
+    path = file_path(job)
+    size = path.stat().st_size
+    # strong validator: the file never changes once written
+    etag = f'"export-{job.pk}-{size}-{int(job.finished_at.timestamp())}"'
+    last_modified = http_date(job.finished_at.timestamp())
+
+    header = request.META.get("HTTP_RANGE")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if header and if_range and if_range not in (etag, last_modified):
+        header = None  # the client's partial copy is of another file: send it all
+    try:
+        span = byte_range(header, size)
+    except ValueError:
+        resp = HttpResponse(status=416)
+        resp["Content-Range"] = f"bytes */{size}"
+        return resp
+
+    start, end = span if span else (0, size - 1)
+    length = max(0, end - start + 1)
+    body = [] if request.method == "HEAD" else _read(path, start, length)
+    resp = StreamingHttpResponse(body, status=206 if span else 200, content_type=CONTENT_TYPES[job.format])
+    if span:
+        resp["Content-Range"] = f"bytes {start}-{end}/{size}"
+    resp["Content-Length"] = str(length)
+    resp["Accept-Ranges"] = "bytes"
+    resp["ETag"] = etag
+    resp["Last-Modified"] = last_modified
+    resp["Content-Disposition"] = f'attachment; filename="{download_name(job)}"'
+    return resp
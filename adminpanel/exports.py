@@ -0,0 +1,233 @@
+# adminpanel/exports.py
+"""
+Streaming grievance exports (CSV and NDJSON).
+
+Rows are read as tuples with values_list() (the joined names come from the same query)
+in server-side chunks, written a batch at a time into a text buffer and emitted as
+~64 KB chunks instead of one tiny chunk per row. gzip_stream() compresses that stream
+on the fly for clients that send Accept-Encoding: gzip.
+
+NDJSON writes one JSON object per grievance per line. Remarks, feedback and department
+details are optional; each one is fetched with a single IN query per chunk of grievances,
+so memory stays bounded by the chunk size, not by the size of the export.
+"""
+import csv
+import io
+import json
+import re
+
+from django.utils.text import compress_sequence
+from rest_framework.renderers import BaseRenderer
+
+from adminpanel.models import Department, Feedback, GrievanceRemark
+
+CSV_HEADER = (
+    "id", "tracking_id", "title", "description", "status", "category", "department",
+    "user_id", "username", "assigned_officer_id", "assigned_officer_username",
+    "created_at", "updated_at",
+)
+# values_list() fields, in CSV_HEADER order
+CSV_FIELDS = (
+    "id", "tracking_id", "title", "description", "status", "category__name", "department__name",
+    "user_id", "user__username", "assigned_officer_id", "assigned_officer__username",
+    "created_at", "updated_at",
+)
+CREATED_AT, UPDATED_AT = CSV_FIELDS.index("created_at"), CSV_FIELDS.index("updated_at")
+FETCH_CHUNK = 5000  # rows per database round trip
+WRITE_BATCH = 500  # rows per csv.writerows() call
+FLUSH_BYTES = 64 * 1024  # emitted chunk size
+
+_accepts_gzip = re.compile(r"(?:^|,)\s*gzip\s*(?:;\s*q\s*=\s*(?P<q>[0-9.]+))?\s*(?:,|$)", re.IGNORECASE)
+
+
+def accepts_gzip(request):
+    """True when Accept-Encoding lists gzip with a non-zero q value."""
+    match = _accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if not match:
+        return False
+    try:
+        return float(match.group("q") or 1) > 0
+    except ValueError:
+        return False
+
+
+def _csv_row(row):
+    row = list(row)
+    for i in (CREATED_AT, UPDATED_AT):
+        row[i] = row[i].isoformat() if row[i] else ""
+    return row
+
+
+def csv_chunks(qs, fetch_chunk=FETCH_CHUNK, write_batch=WRITE_BATCH, flush_bytes=FLUSH_BYTES, progress=None):
+    """
+    UTF-8 CSV (header first) for a grievance queryset, as chunks of about flush_bytes.
+    `progress(rows)` is called with the rows emitted so far before each chunk is yielded.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    batch = []
+    rows = 0
+    for row in qs.values_list(*CSV_FIELDS).iterator(chunk_size=fetch_chunk):
+        batch.append(_csv_row(row))
+        if len(batch) >= write_batch:
+            writer.writerows(batch)
+            rows += len(batch)
+            batch.clear()
+            if buffer.tell() >= flush_bytes:
+                if progress:
+                    progress(rows)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    writer.writerows(batch)
+    rows += len(batch)
+    if progress:
+        progress(rows)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_stream(chunks):
+    """gzip-compress a byte-chunk stream as it is produced (a single gzip member)."""
+    return compress_sequence(chunks)
+
+
+# NDJSON: base fields per grievance, then optional nested data
+NDJSON_FIELDS = (
+    "id", "tracking_id", "title", "description", "status",
+    "category_id", "category__name", "department_id", "department__name",
+    "user_id", "user__username", "assigned_officer_id", "assigned_officer__username",
+    "created_at", "updated_at", "resolved_at", "due_at",
+)
+NDJSON_INCLUDES = ("remarks", "feedback", "department")
+NDJSON_CHUNK = 1000  # grievances per batch of nested IN queries
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _ref(pk, label, key="name"):
+    return {"id": pk, key: label} if pk else None
+
+
+def _ndjson_object(row):
+    (pk, tracking_id, title, description, status, category_id, category_name, department_id, department_name,
+     user_id, username, officer_id, officer_username, created_at, updated_at, resolved_at, due_at) = row
+    return {
+        "id": pk, "tracking_id": tracking_id, "title": title, "description": description, "status": status,
+        "category": _ref(category_id, category_name),
+        "department": _ref(department_id, department_name),
+        "user": _ref(user_id, username, "username"),
+        "assigned_officer": _ref(officer_id, officer_username, "username"),
+        "created_at": _iso(created_at), "updated_at": _iso(updated_at),
+        "resolved_at": _iso(resolved_at), "due_at": _iso(due_at),
+    }
+
+
+def _remarks_for(ids):
+    remarks = {}
+    rows = (
+        GrievanceRemark.objects.filter(grievance_id__in=ids).order_by("grievance_id", "created_at", "id")
+        .values_list("grievance_id", "id", "officer_id", "officer__username", "remark", "created_at")
+    )
+    for grievance_id, pk, officer_id, officer_username, remark, created_at in rows:
+        remarks.setdefault(grievance_id, []).append({
+            "id": pk, "officer": _ref(officer_id, officer_username, "username"),
+            "remark": remark, "created_at": _iso(created_at),
+        })
+    return remarks
+
+
+def _feedback_for(ids):
+    rows = Feedback.objects.filter(grievance_id__in=ids).values_list("grievance_id", "rating", "comments", "submitted_at")
+    return {
+        grievance_id: {"rating": rating, "comments": comments, "submitted_at": _iso(submitted_at)}
+        for grievance_id, rating, comments, submitted_at in rows
+    }
+
+
+def _attach(batch, include, departments):
+    """Add the requested nested data to a batch of NDJSON objects (one IN query per kind)."""
+    ids = [obj["id"] for obj in batch]
+    if "remarks" in include:
+        remarks = _remarks_for(ids)
+        for obj in batch:
+            obj["remarks"] = remarks.get(obj["id"], [])
+    if "feedback" in include:
+        feedback = _feedback_for(ids)
+        for obj in batch:
+            obj["feedback"] = feedback.get(obj["id"])
+    if "department" in include:
+        # departments are a small table: each one is read once per export
+        missing = {obj["department"]["id"] for obj in batch if obj["department"]} - departments.keys()
+        if missing:
+            for pk, name, code, description in Department.objects.filter(pk__in=missing).values_list("pk", "name", "code", "description"):
+                departments[pk] = {"id": pk, "name": name, "code": code, "description": description}
+        for obj in batch:
+            if obj["department"]:
+                obj["department"] = departments.get(obj["department"]["id"], obj["department"])
+
+
+def ndjson_chunks(qs, include=(), fetch_chunk=NDJSON_CHUNK, flush_bytes=FLUSH_BYTES, progress=None):
+    """
+    UTF-8 NDJSON (one grievance object per line) for a queryset, as chunks of about
+    flush_bytes. `progress` as for csv_chunks().
+    """
+    buffer = io.StringIO()
+    departments = {}
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    rows = 0
+
+    def write(batch):
+        _attach(batch, include, departments)
+        for obj in batch:
+            buffer.write(encode(obj))
+            buffer.write("\n")
+        return len(batch)
+
+    batch = []
+    for row in qs.values_list(*NDJSON_FIELDS).iterator(chunk_size=fetch_chunk):
+        batch.append(_ndjson_object(row))
+        if len(batch) >= fetch_chunk:
+            rows += write(batch)
+            batch = []
+            if buffer.tell() >= flush_bytes:
+                if progress:
+                    progress(rows)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    if batch:
+        rows += write(batch)
+    if progress:
+        progress(rows)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    Lets ?format=csv|ndjson|jsonl (and the matching Accept types) pick the export format.
+    The export itself is a StreamingHttpResponse; only error responses go through render().
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode("utf-8")
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(_ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class JSONLinesRenderer(_ExportRenderer):
+    media_type = "application/jsonl"
+    format = "jsonl"
@@ -1,64 +1,192 @@
 # adminpanel/filters.py
 
+import datetime
+import hashlib
+import json
+
 import django_filters
-from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
 from adminpanel.models import Grievance
+from adminpanel.search import search_grievances
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class GrievanceFilter(django_filters.FilterSet):
-    status = django_filters.CharFilter(field_name="status", lookup_expr="iexact")
-    category = django_filters.CharFilter(method="filter_category")
-    assigned_officer = django_filters.NumberFilter(field_name="assigned_officer__id")
-    user = django_filters.NumberFilter(field_name="user__id")
-    date_from = django_filters.DateFilter(field_name="created_at", lookup_expr="gte")
-    date_to = django_filters.DateFilter(field_name="created_at", lookup_expr="lte")
-    search = django_filters.CharFilter(method="filter_search")
+def day_start(value):
+    """Aware datetime for 00:00 of `value` (a date) in the current timezone."""
+    return timezone.make_aware(datetime.datetime.combine(value, datetime.time.min))
 
-    class Meta:
-        model = Grievance
-        fields = ["status", "category", "assigned_officer", "user"]
 
-    def filter_category(self, queryset, name, value):
+def created_between(queryset, date_from=None, date_to=None):
+    """
+    Inclusive calendar-day filter on created_at written as a half-open datetime range
+    (created_at >= from 00:00, created_at < day after `to` 00:00), so the created_at
+    indexes stay usable. created_at__date would wrap the column in a function.
+    """
+    if date_from:
+        queryset = queryset.filter(created_at__gte=day_start(date_from))
+    if date_to:
+        queryset = queryset.filter(created_at__lt=day_start(date_to + datetime.timedelta(days=1)))
+    return queryset
+
+
+# Query params that narrow a grievance read. Paging/format params are not part of the spec.
+FILTER_PARAMS = ("status", "category", "department", "assigned_officer", "user", "search", "date_from", "date_to")
+# accepted spellings of assigned_officer, checked in order
+ASSIGNED_ALIASES = ("assigned_officer", "assigned_to", "assigned")
+
+
+class GrievanceFilterSpec:
+    """
+    Canonical, validated form of the grievance filter params.
+
+    Every grievance read endpoint (list, counts, export, analytics) builds one of these
+    with from_params() and applies it with apply(), so they filter identically and
+    equivalent requests share the same signature (cache key): case, whitespace and the
+    assigned_to/assigned aliases collapse together.
+    """
+
+    def __init__(self, status=None, category_id=None, category_name=None, department=None,
+                 assigned_officer=None, user=None, search=None, date_from=None, date_to=None):
+        self.status = status
+        self.category_id = category_id
+        self.category_name = category_name
+        self.department = department
+        self.assigned_officer = assigned_officer
+        self.user = user
+        self.search = search
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @classmethod
+    def from_params(cls, params):
         """
-        Filter by category ID or name.
-        Handles:
-            - numeric ID
-            - partial name match
-            - ignores empty values
+        Normalize request params (QueryDict or dict). Blank values are ignored.
+        Raises rest_framework ValidationError with per-field messages for bad values.
         """
-        if not value:
-            return queryset
+        def get(*names):
+            for name in names:
+                value = str(params.get(name) or "").strip()
+                if value:
+                    return value
+            return ""
+
+        errors = {}
+        spec = cls()
+
+        status = get("status").lower()
+        if status:
+            if status not in dict(Grievance.STATUS_CHOICES):
+                errors["status"] = "Unknown status."
+            spec.status = status
+
+        category = get("category")
+        if category.isdigit():
+            spec.category_id = int(category)
+        elif category:
+            spec.category_name = category.lower()
 
-        value = value.strip()
+        for field, names in (("department", ("department",)), ("assigned_officer", ASSIGNED_ALIASES), ("user", ("user",))):
+            value = get(*names)
+            if value:
+                if value.isdigit():
+                    setattr(spec, field, int(value))
+                else:
+                    errors[field] = "Must be an integer id."
 
-        if value.isdigit():
-            return queryset.filter(
-                Q(category__id=int(value)) |
-                Q(category__name__icontains=value)
-            )
+        search = " ".join(get("search").split()).lower()
+        spec.search = search or None
 
-        return queryset.filter(category__name__icontains=value)
+        for field in ("date_from", "date_to"):
+            value = get(field)
+            if value:
+                try:
+                    parsed = parse_date(value)
+                except ValueError:
+                    parsed = None
+                if parsed is None:
+                    errors[field] = "Use YYYY-MM-DD."
+                setattr(spec, field, parsed)
 
-    def filter_search(self, queryset, name, value):
+        if errors:
+            raise serializers.ValidationError(errors)
+        return spec
+
+    def as_dict(self):
+        """JSON-friendly canonical form; only active filters are present."""
+        out = {}
+        for key in ("status", "category_id", "category_name", "department", "assigned_officer", "user", "search"):
+            value = getattr(self, key)
+            if value is not None:
+                out[key] = value
+        for key in ("date_from", "date_to"):
+            value = getattr(self, key)
+            if value is not None:
+                out[key] = value.isoformat()
+        return out
+
+    @property
+    def signature(self):
+        """Stable hash of the canonical filters, for cache keys."""
+        raw = json.dumps(self.as_dict(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @property
+    def is_cheap(self):
         """
-        Search across title, description, and user info.
-        Handles:
-            - partial text
-            - ignores empty values
+        True when every active filter maps to an indexed equality/range predicate.
+        Free-text search and category-name matching need scans, so they are not cheap.
         """
-        if not value:
-            return queryset
-
-        value = value.strip()
-
-        return queryset.filter(
-            Q(title__icontains=value) |
-            Q(description__icontains=value) |
-            Q(user__username__icontains=value) |
-            Q(user__first_name__icontains=value) |
-            Q(user__last_name__icontains=value) |
-            Q(tracking_id__icontains=value)
-        )
+        return self.search is None and self.category_name is None
+
+    def apply(self, queryset, rank=True):
+        """
+        Filter a Grievance queryset. Equality filters come first so they use the
+        (column, created_at) indexes; with rank=True a search re-orders by relevance.
+        """
+        if self.status:
+            queryset = queryset.filter(status=self.status)
+        if self.category_id is not None:
+            queryset = queryset.filter(category_id=self.category_id)
+        if self.category_name:
+            queryset = queryset.filter(category__name__icontains=self.category_name)
+        if self.department is not None:
+            queryset = queryset.filter(department_id=self.department)
+        if self.assigned_officer is not None:
+            queryset = queryset.filter(assigned_officer_id=self.assigned_officer)
+        if self.user is not None:
+            queryset = queryset.filter(user_id=self.user)
+        queryset = created_between(queryset, self.date_from, self.date_to)
+        if self.search:
+            queryset = search_grievances(queryset, self.search, rank=rank)
+        return queryset
+
+    def queryset(self, rank=True):
+        """Filtered Grievance queryset, newest first unless ranked by search."""
+        return self.apply(Grievance.objects.order_by("-created_at"), rank=rank)
+
+
+class GrievanceFilter(django_filters.FilterSet):
+    """
+    django-filter front end for the same spec, for DRF views that use DjangoFilterBackend.
+    The declared filters only document/validate the params; filtering is delegated to
+    GrievanceFilterSpec so results match the hand-written endpoints.
+    """
+    status = django_filters.CharFilter()
+    category = django_filters.CharFilter()
+    department = django_filters.NumberFilter()
+    assigned_officer = django_filters.NumberFilter()
+    user = django_filters.NumberFilter()
+    date_from = django_filters.DateFilter()
+    date_to = django_filters.DateFilter()
+    search = django_filters.CharFilter()
+
+    class Meta:
+        model = Grievance
+        fields = ["status", "category", "department", "assigned_officer", "user"]
+
+    def filter_queryset(self, queryset):
+        return GrievanceFilterSpec.from_params(self.data).apply(queryset)
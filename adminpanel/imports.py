@@ -0,0 +1,365 @@
+# adminpanel/imports.py
+"""
+Bulk grievance import from CSV or NDJSON (the export formats are accepted as-is).
+
+Rows are processed in batches:
+
+  1. each row is validated on its own (required text, status, dates) and its category,
+     department, user and officer references are collected: an id, or a name
+  2. every reference in the batch is resolved with one query per kind (names are
+     case-insensitive; usernames exact); unknown departments can be created
+  3. the batch's tracking IDs are reserved from the sequence in one step, committed
+     before the batch (adminpanel.tracking), and its valid rows are inserted with one
+     executemany() (adminpanel.bulk)
+  4. the derived tables are moved once per batch: rollups / workload record_changes(),
+     lifecycle rows, the search and typeahead indexes and the change feed, then the
+     cache is bumped
+
+Invalid rows are skipped and reported with their row number and per-field errors; a
+batch's valid rows are committed together. Columns: title, description (required),
+status, category, department, user, assigned_officer, created_at, resolved_at; the
+export's id/tracking_id/updated_at/due_at columns are ignored.
+"""
+import csv
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from adminpanel import bulk, cache, changes, lifecycle, rollups, sla, suggest, tracking, workload
+from adminpanel.models import Category, ChangeLog, Department, Grievance
+from adminpanel.search import get_search_backend
+
+FORMATS = ("csv", "ndjson")
+BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_ACTION = "grievances_imported"
+STATUSES = {status for status, _ in Grievance.STATUS_CHOICES}
+# accepted column names per field, first non-empty wins (covers the CSV/NDJSON export)
+FIELD_ALIASES = {
+    "title": ("title",),
+    "description": ("description",),
+    "status": ("status",),
+    "category": ("category", "category_id", "category_name"),
+    "department": ("department", "department_id", "department_name"),
+    "user": ("user", "user_id", "username"),
+    "assigned_officer": ("assigned_officer", "assigned_officer_id", "assigned_officer_username", "officer"),
+    "created_at": ("created_at",),
+    "resolved_at": ("resolved_at",),
+}
+REFERENCES = ("category", "department", "user", "assigned_officer")
+TITLE_MAX = Grievance._meta.get_field("title").max_length
+INSERT_FIELDS = (
+    "tracking_id", "title", "description", "status", "category", "department", "user", "assigned_officer",
+    "created_at", "updated_at", "resolved_at", "due_at",
+)
+INSERT_COLUMNS = [Grievance._meta.get_field(name).attname for name in INSERT_FIELDS]
+
+
+def read_csv(stream):
+    """(row number, dict) per CSV record of a text stream with a header line."""
+    for number, row in enumerate(csv.DictReader(stream), start=1):
+        yield number, row
+
+
+def read_ndjson(stream):
+    """(line number, dict) per non-blank NDJSON line; unparsable lines yield a str error."""
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, f"Invalid JSON: {exc}"
+            continue
+        yield number, row if isinstance(row, dict) else "Each line must be a JSON object."
+
+
+def read_rows(stream, fmt):
+    return read_ndjson(stream) if fmt == "ndjson" else read_csv(stream)
+
+
+def _pick(row, field):
+    for name in FIELD_ALIASES[field]:
+        value = row.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, "", {}):
+            return value
+    return None
+
+
+def _reference(value, name_key="name"):
+    """('id', pk) or ('name', text) for an id, a name or an exported {"id": .., "name": ..} object."""
+    if isinstance(value, dict):
+        value = value.get("id") or value.get(name_key)
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return "id", int(value)
+    return "name", str(value).strip()
+
+
+def _datetime(value):
+    """Aware datetime from ISO text (a bare date is local midnight); ValueError if unparsable."""
+    if not isinstance(value, str):
+        raise ValueError
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError
+        parsed = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _clean(row):
+    """(values, errors) for one raw row; references stay unresolved."""
+    if isinstance(row, str):
+        return None, {"row": row}
+    values, errors = {}, {}
+
+    for field in ("title", "description"):
+        value = _pick(row, field)
+        if value is None:
+            errors[field] = "This field is required."
+        else:
+            values[field] = str(value)
+    if "title" in values and len(values["title"]) > TITLE_MAX:
+        errors["title"] = f"At most {TITLE_MAX} characters."
+
+    status = str(_pick(row, "status") or Grievance.STATUS_NEW).lower()
+    if status not in STATUSES:
+        errors["status"] = "Unknown status."
+    values["status"] = status
+
+    for field in ("created_at", "resolved_at"):
+        value = _pick(row, field)
+        values[field] = None
+        if value is not None:
+            try:
+                values[field] = _datetime(value)
+            except (TypeError, ValueError):
+                errors[field] = "Must be an ISO 8601 date or datetime."
+
+    for field in REFERENCES:
+        name_key = "username" if field in ("user", "assigned_officer") else "name"
+        values[field] = _reference(_pick(row, field), name_key)
+    return values, errors
+
+
+class _Resolver:
+    """Resolves one batch's references with a query per kind."""
+
+    def __init__(self, cleaned, create_missing):
+        self.create_missing = create_missing
+        wanted = {field: {"id": set(), "name": set()} for field in REFERENCES}
+        for values in cleaned:
+            for field in REFERENCES:
+                ref = values[field]
+                if ref:
+                    kind, key = ref
+                    wanted[field][kind].add(key if kind == "id" else key.lower() if field in ("category", "department") else key)
+        self.departments = self._departments(wanted["department"])
+        self.categories = self._categories(wanted["category"])
+        self.users = self._users(wanted["user"]["id"] | wanted["assigned_officer"]["id"],
+                                 wanted["user"]["name"] | wanted["assigned_officer"]["name"])
+
+    def _departments(self, wanted):
+        by_id = set(Department.objects.filter(pk__in=wanted["id"]).values_list("pk", flat=True))
+        by_name = dict(
+            Department.objects.annotate(key=Lower("name")).filter(key__in=wanted["name"]).values_list("key", "pk")
+        )
+        if self.create_missing:
+            # same naming as normalize_department() in the views
+            for key in wanted["name"] - by_name.keys():
+                name = key.title()
+                department, _ = Department.objects.get_or_create(name=name, defaults={"code": name.lower().replace(" ", "_")})
+                by_name[key] = department.pk
+        return {"id": by_id, "name": by_name}
+
+    def _categories(self, wanted):
+        by_id = dict(Category.objects.filter(pk__in=wanted["id"]).values_list("pk", "department_id"))
+        by_name = {}
+        rows = Category.objects.annotate(key=Lower("name")).filter(key__in=wanted["name"]).values_list("key", "pk", "department_id")
+        for key, pk, department_id in rows:
+            by_name.setdefault(key, []).append((pk, department_id))
+        return {"id": by_id, "name": by_name}
+
+    def _users(self, ids, usernames):
+        User = get_user_model()
+        users = {"id": set(), "name": {}, "officers": set()}
+        fields = ("pk", "username", "role", "is_staff", "is_superuser")
+        for pk, username, role, is_staff, is_superuser in User.objects.filter(
+            Q(pk__in=ids) | Q(username__in=usernames)
+        ).values_list(*fields):
+            if pk in ids:
+                users["id"].add(pk)
+            if username in usernames:
+                users["name"][username] = pk
+            # same rule as the assign endpoint and bulk retriage
+            if role == "officer" or is_staff or is_superuser:
+                users["officers"].add(pk)
+        return users
+
+    def _user(self, ref):
+        kind, key = ref
+        if kind == "id":
+            return key if key in self.users["id"] else None
+        return self.users["name"].get(key)
+
+    def resolve(self, values, errors):
+        """Set category_id / department_id / user_id / assigned_officer_id on a row's values."""
+        department_id = None
+        ref = values.pop("department")
+        if ref:
+            kind, key = ref
+            department_id = (key if key in self.departments["id"] else None) if kind == "id" else self.departments["name"].get(key.lower())
+            if department_id is None:
+                errors["department"] = f"Unknown department '{key}'."
+
+        category_id = None
+        ref = values.pop("category")
+        if ref:
+            kind, key = ref
+            if kind == "id":
+                if key in self.categories["id"]:
+                    category_id = key
+                    department_id = department_id or self.categories["id"][key]
+                else:
+                    errors["category"] = f"Unknown category '{key}'."
+            else:
+                matches = self.categories["name"].get(key.lower(), [])
+                if department_id is not None:
+                    matches = [m for m in matches if m[1] == department_id]
+                if len(matches) == 1:
+                    category_id = matches[0][0]
+                    department_id = department_id or matches[0][1]
+                elif matches:
+                    errors["category"] = f"Category '{key}' exists in several departments; give the department."
+                else:
+                    errors["category"] = f"Unknown category '{key}'."
+
+        values["category_id"], values["department_id"] = category_id, department_id
+        for field in ("user", "assigned_officer"):
+            ref = values.pop(field)
+            values[f"{field}_id"] = None
+            if ref:
+                values[f"{field}_id"] = self._user(ref)
+                if values[f"{field}_id"] is None:
+                    errors[field] = f"Unknown user '{ref[1]}'."
+                elif field == "assigned_officer" and values[f"{field}_id"] not in self.users["officers"]:
+                    errors[field] = f"User '{ref[1]}' is not an officer."
+
+
+class _Row(dict):
+    """A built grievance's column values; attribute access lets it stand in for an instance."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _build(values, now, sla_days):
+    created_at = values["created_at"] or now
+    resolved_at = None
+    if values["status"] == Grievance.STATUS_RESOLVED:
+        resolved_at = values["resolved_at"] or now
+    pair = (values["category_id"], values["department_id"])
+    if pair not in sla_days:
+        sla_days[pair] = sla.days_for(*pair)
+    return _Row(
+        title=values["title"], description=values["description"], status=values["status"],
+        category_id=values["category_id"], department_id=values["department_id"],
+        user_id=values["user_id"], assigned_officer_id=values["assigned_officer_id"],
+        created_at=created_at, updated_at=now, resolved_at=resolved_at,
+        due_at=created_at + datetime.timedelta(days=sla_days[pair]) if sla_days[pair] else None,
+    )
+
+
+def _insert(rows, year, first):
+    """Insert a batch of built rows, numbered from a reservation, and move the derived tables once."""
+    for n, row in enumerate(rows):
+        row["tracking_id"] = tracking.format_id(year, first + n)
+    # executemany keeps the imported created_at (bulk_create would apply auto_now_add)
+    bulk.insert_rows(Grievance, INSERT_FIELDS, [[row[name] for name in INSERT_COLUMNS] for row in rows])
+    pks = dict(
+        Grievance.objects.filter(tracking_id__in=[row["tracking_id"] for row in rows]).values_list("tracking_id", "pk")
+    )
+    for row in rows:
+        row["pk"] = pks[row["tracking_id"]]
+
+    # what the per-row signals would have done, once for the batch (rows carry the snapshot keys)
+    starts = [lifecycle.start(row) for row in rows]
+    for row, start in zip(rows, starts):
+        row["resolution_seconds"] = start.resolution_seconds  # the rollup sums the lifecycle's value
+    rollups.record_changes([(None, row) for row in rows])
+    workload.record_changes([(None, row) for row in rows])
+    bulk.insert(starts)
+    get_search_backend().index([row["pk"] for row in rows])
+    suggest.index_titles([(row["pk"], row["title"]) for row in rows], new=True)
+    changes.record([row["pk"] for row in rows])
+
+
+def import_rows(rows, batch_size=BATCH_SIZE, create_missing=False, dry_run=False, user=None):
+    """
+    Import (row number, raw row) pairs. Returns {"rows", "created", "failed", "errors",
+    "dry_run"}; errors lists up to MAX_REPORTED_ERRORS {"row": n, "errors": {...}}.
+    """
+    result = {"rows": 0, "created": 0, "failed": 0, "errors": [], "dry_run": dry_run}
+
+    def flush(batch):
+        cleaned = []
+        for number, raw in batch:
+            values, errors = _clean(raw)
+            if values is None:
+                report(number, errors)
+                continue
+            cleaned.append((number, values, errors))
+        resolver = _Resolver([values for _, values, _ in cleaned], create_missing and not dry_run)
+        now = timezone.now()
+        sla_days = {}
+        valid = []
+        for number, values, errors in cleaned:
+            resolver.resolve(values, errors)
+            if errors:
+                report(number, errors)
+            else:
+                valid.append(_build(values, now, sla_days))
+        if valid and not dry_run:
+            # committed before the batch's transaction, which then never holds the counter lock
+            year, first = tracking.reserve_outside(len(valid))
+            with transaction.atomic():
+                _insert(valid, year, first)
+        result["created"] += len(valid)
+
+    def report(number, errors):
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"row": number, "errors": errors})
+
+    batch = []
+    for number, raw in rows:
+        result["rows"] += 1
+        batch.append((number, raw))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    result["errors"].sort(key=lambda error: error["row"])
+    if result["created"] and not dry_run:
+        ChangeLog.objects.create(user=user, action=IMPORT_ACTION, after=str(result["created"]))
+        cache.bump_on_commit("grievances")
+    return result
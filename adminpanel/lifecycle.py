@@ -0,0 +1,285 @@
+# adminpanel/lifecycle.py
+"""
+Per-grievance lifecycle projection (GrievanceLifecycle) folded from ChangeLog.
+
+The change log stays the record of transitions; this module keeps one row per grievance
+so analytics read columns instead of replaying logs:
+
+  - status_changed closes the stint in the previous status (seconds_<status>), opens one
+    in the new status, and sets or clears resolved_at / resolution_seconds
+  - assigned_officer / assigned_officer_changed set first_assigned_at and count
+    reassignments (one officer replaced by another)
+
+Rows start when a grievance is created and each new ChangeLog row is applied in its
+post_save (see signals.py). A row remembers the id of the last entry it applied, so
+`rebuild_lifecycle` can stream the whole log in id order without double counting; it
+stores how far it got (LifecycleBackfill) with each batch and resumes from there. Code that bulk-creates transition entries (the bulk retriage endpoint) passes
+them to record_many(); other bulk-created rows (e.g. sla_breached) carry no lifecycle
+information. Every change to resolution_seconds is passed on to the analytics rollup
+(rollups.record_resolutions()), which sums it per key.
+"""
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from adminpanel import rollups
+from adminpanel.models import ChangeLog, Grievance, GrievanceLifecycle, LifecycleBackfill
+from adminpanel.workload import ASSIGN_ACTIONS
+
+STATUS_ACTION = "status_changed"
+ACTIONS = (STATUS_ACTION,) + ASSIGN_ACTIONS
+SECONDS_FIELDS = {status: f"seconds_{status}" for status, _ in Grievance.STATUS_CHOICES}
+# every column apply() may change (for bulk_update)
+UPDATE_FIELDS = [
+    "current_status", "status_since", *SECONDS_FIELDS.values(), "status_changes",
+    "first_assigned_at", "reassignments", "resolved_at", "resolution_seconds", "last_log_id",
+]
+CHUNK = 5000
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+def _seconds(delta):
+    return max(0, int(round(delta.total_seconds())))
+
+
+def _officer(value):
+    """Officer id from a log's before/after text ("None" when there was no officer)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def start(grievance):
+    """
+    A new grievance's row (anything with pk/created_at/status/assigned_officer_id/resolved_at):
+    its status since creation, assigned at creation if it has an officer.
+    """
+    created_at = grievance.created_at
+    row = GrievanceLifecycle(
+        grievance_id=grievance.pk, created_at=created_at,
+        current_status=grievance.status, status_since=created_at,
+        first_assigned_at=created_at if grievance.assigned_officer_id else None,
+    )
+    if grievance.status == Grievance.STATUS_RESOLVED and grievance.resolved_at:
+        row.resolved_at = grievance.resolved_at
+        row.resolution_seconds = _seconds(grievance.resolved_at - created_at)
+    return row
+
+
+def apply(row, log):
+    """
+    Fold one ChangeLog entry (anything with id/action/before/after/timestamp) into a row.
+    Returns False when the entry was already applied or says nothing about the lifecycle.
+    """
+    if log.id <= row.last_log_id:
+        return False
+    if log.action == STATUS_ACTION:
+        # a backfilled row learns its starting status from the first transition
+        previous = row.current_status or log.before
+        field = SECONDS_FIELDS.get(previous)
+        if field:
+            setattr(row, field, getattr(row, field) + _seconds(log.timestamp - row.status_since))
+        row.current_status = log.after or ""
+        row.status_since = log.timestamp
+        row.status_changes += 1
+        if log.after == Grievance.STATUS_RESOLVED:
+            row.resolved_at = log.timestamp
+            row.resolution_seconds = _seconds(log.timestamp - row.created_at)
+        else:
+            row.resolved_at = row.resolution_seconds = None
+    elif log.action in ASSIGN_ACTIONS:
+        before, after = _officer(log.before), _officer(log.after)
+        if after is None or after == before:
+            return False
+        if row.first_assigned_at is None:
+            # an officer in place before the first logged assignment came with the grievance
+            row.first_assigned_at = row.created_at if before is not None else log.timestamp
+        if before is not None:
+            row.reassignments += 1
+    else:
+        return False
+    row.last_log_id = log.id
+    return True
+
+
+def record(log):
+    """Apply a newly written ChangeLog row to its grievance's lifecycle."""
+    if log.grievance_id is None or log.action not in ACTIONS:
+        return
+    with transaction.atomic():
+        row = GrievanceLifecycle.objects.select_for_update().filter(pk=log.grievance_id).first()
+        before = row.resolution_seconds if row is not None else None
+        if row is None:
+            # grievance from before the projection existed: start it from the state this entry leaves
+            row = start(log.grievance)
+            if log.action == STATUS_ACTION:
+                row.current_status = log.before or ""
+                row.resolved_at = row.resolution_seconds = None
+            else:
+                row.first_assigned_at = None
+            row.save(force_insert=True)
+        if apply(row, log):
+            row.save(update_fields=UPDATE_FIELDS + ["updated_at"])
+        rollups.record_resolutions([(row.pk, before, row.resolution_seconds)])
+
+
+def record_many(logs):
+    """
+    record() for bulk-created ChangeLog rows (ids set): one locked read of their
+    grievances' rows and one bulk_update, applied in log id order.
+    """
+    logs = sorted((log for log in logs if log.grievance_id is not None and log.action in ACTIONS), key=lambda log: log.id)
+    if not logs:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        rows = GrievanceLifecycle.objects.select_for_update().in_bulk({log.grievance_id for log in logs})
+        before = {pk: row.resolution_seconds for pk, row in rows.items()}
+        changed = {}
+        for log in logs:
+            row = rows.get(log.grievance_id)
+            if row is None:
+                record(log)  # no row yet: record() starts one
+            elif apply(row, log):
+                row.updated_at = now
+                changed[row.pk] = row
+        GrievanceLifecycle.objects.bulk_update(changed.values(), UPDATE_FIELDS + ["updated_at"], batch_size=1000)
+        rollups.record_resolutions([(pk, before[pk], row.resolution_seconds) for pk, row in changed.items()])
+
+
+def _create_missing(chunk):
+    """Empty rows (status learnt from the log, see _finish) for grievances without one."""
+    created = 0
+    last_pk = 0
+    missing = Grievance.objects.filter(lifecycle__isnull=True).order_by("pk").values_list("pk", "created_at")
+    while True:
+        batch = list(missing.filter(pk__gt=last_pk)[:chunk])
+        if not batch:
+            return created
+        GrievanceLifecycle.objects.bulk_create(
+            [GrievanceLifecycle(grievance_id=pk, created_at=created_at, status_since=created_at) for pk, created_at in batch],
+            batch_size=1000, ignore_conflicts=True,
+        )
+        created += len(batch)
+        last_pk = batch[-1][0]
+
+
+def backfill_cursor():
+    """The id of the last ChangeLog entry the backfill has replayed (0 before the first run)."""
+    return LifecycleBackfill.objects.values_list("last_log_id", flat=True).first() or 0
+
+
+def _save_cursor(log_id):
+    if not LifecycleBackfill.objects.update(last_log_id=log_id, updated_at=timezone.now()):
+        LifecycleBackfill.objects.create(last_log_id=log_id)
+
+
+def _replay(chunk, cursor):
+    """Stream ChangeLog in id order after `cursor`, saving the cursor per batch; returns entries applied."""
+    logs = (
+        ChangeLog.objects.filter(grievance__isnull=False, action__in=ACTIONS).order_by("id")
+        .values_list("id", "grievance_id", "action", "before", "after", "timestamp", named=True)
+    )
+    applied = 0
+    while True:
+        batch = list(logs.filter(id__gt=cursor)[:chunk])
+        if not batch:
+            return applied
+        with transaction.atomic():
+            rows = GrievanceLifecycle.objects.in_bulk({log.grievance_id for log in batch})
+            before = {pk: row.resolution_seconds for pk, row in rows.items()}
+            changed = {}
+            for log in batch:
+                row = rows.get(log.grievance_id)
+                if row is not None and apply(row, log):
+                    changed[row.pk] = row
+                    applied += 1
+            GrievanceLifecycle.objects.bulk_update(changed.values(), UPDATE_FIELDS, batch_size=1000)
+            rollups.record_resolutions([(pk, before[pk], row.resolution_seconds) for pk, row in changed.items()])
+            cursor = batch[-1].id
+            _save_cursor(cursor)
+
+
+def _finish():
+    """Fill in what the log never mentioned, from the grievance row itself."""
+    grievance = Grievance.objects.filter(pk=OuterRef("pk"))
+    # never changed status: it is still in the status it was created with
+    GrievanceLifecycle.objects.filter(current_status="").update(current_status=Subquery(grievance.values("status")[:1]))
+    # has an officer but no logged assignment: assigned at creation
+    GrievanceLifecycle.objects.filter(
+        first_assigned_at__isnull=True, grievance__assigned_officer__isnull=False,
+    ).update(first_assigned_at=F("created_at"))
+    # resolved without a logged transition (e.g. created resolved)
+    unlogged = GrievanceLifecycle.objects.filter(
+        resolved_at__isnull=True, current_status=Grievance.STATUS_RESOLVED,
+    ).values_list("pk", "created_at", "grievance__resolved_at")
+    rows = [
+        GrievanceLifecycle(grievance_id=pk, resolved_at=resolved_at, resolution_seconds=_seconds(resolved_at - created_at))
+        for pk, created_at, resolved_at in unlogged if resolved_at
+    ]
+    GrievanceLifecycle.objects.bulk_update(rows, ["resolved_at", "resolution_seconds"], batch_size=1000)
+    rollups.record_resolutions([(row.grievance_id, None, row.resolution_seconds) for row in rows])
+
+
+def rebuild(reset=False, chunk=CHUNK):
+    """
+    Backfill: rows for grievances without one, then the ChangeLog entries after the saved
+    cursor in id order. reset=True starts over from an empty table. Returns (rows created,
+    entries applied).
+    """
+    if reset:
+        GrievanceLifecycle.objects.all().delete()
+        rollups.reset_resolutions()
+    created = _create_missing(chunk)
+    # new rows' history may lie before the cursor: replay it all (applied entries are skipped)
+    applied = _replay(chunk, 0 if reset or created else backfill_cursor())
+    _finish()
+    return created, applied
+
+
+def _days(seconds):
+    return None if seconds is None else round(seconds / SECONDS_PER_DAY, 2)
+
+
+def summary(spec):
+    """
+    Lifecycle averages for the grievances under a filter spec, read from the projection:
+    time to first assignment, reassignment rates, days spent per status (over grievances
+    that completed a stint in it) and resolution time.
+    """
+    rows = GrievanceLifecycle.objects.order_by()
+    if spec.as_dict():
+        rows = rows.filter(grievance__in=spec.apply(Grievance.objects.order_by(), rank=False).values("pk"))
+
+    to_assignment = ExpressionWrapper(F("first_assigned_at") - F("created_at"), output_field=DurationField())
+    aggregates = {
+        "n": Count("pk"),
+        "assigned": Count("pk", filter=Q(first_assigned_at__isnull=False)),
+        "to_assignment": Avg(to_assignment),
+        "reassigned": Count("pk", filter=Q(reassignments__gt=0)),
+        "reassignments": Avg("reassignments"),
+        "resolved": Count("pk", filter=Q(resolution_seconds__isnull=False)),
+        "resolution": Avg("resolution_seconds"),
+    }
+    for status, field in SECONDS_FIELDS.items():
+        aggregates[f"{status}_seconds"] = Sum(field)
+        aggregates[f"{status}_n"] = Count("pk", filter=Q(**{f"{field}__gt": 0}))
+    agg = rows.aggregate(**aggregates)
+
+    n = agg["n"]
+    to_assignment = agg["to_assignment"]
+    return {
+        "grievances": n,
+        "assigned": agg["assigned"],
+        "avg_hours_to_first_assignment": round(to_assignment.total_seconds() / SECONDS_PER_HOUR, 2) if to_assignment is not None else None,
+        "reassigned_share": round(agg["reassigned"] / n, 4) if n else None,
+        "avg_reassignments": round(agg["reassignments"], 2) if agg["reassignments"] is not None else None,
+        "avg_days_in_status": {
+            status: _days(agg[f"{status}_seconds"] / agg[f"{status}_n"]) if agg[f"{status}_n"] else None
+            for status in SECONDS_FIELDS
+        },
+        "resolved": agg["resolved"],
+        "avg_resolution_days": _days(agg["resolution"]),
+    }
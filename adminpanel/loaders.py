@@ -0,0 +1,72 @@
+# adminpanel/loaders.py
+"""
+Query loaders for grievance detail responses.
+
+GrievanceDetailSerializer walks user, category -> department, department,
+assigned_officer, feedback and every remark's officer. Loading through here fetches all
+of that in a fixed number of queries regardless of thread length:
+
+  1. the grievance with its to-one relations and feedback (select_related)
+  2. one page of remarks with their officers (select_related, sliced)
+
+Long threads are capped: a detail response carries the newest `limit` remarks (oldest
+first, as before) and `remarks_next`, a cursor for the next older page.
+"""
+from django.conf import settings
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+
+from adminpanel.models import Grievance, GrievanceRemark
+from adminpanel.pagination import decode_cursor, encode_cursor
+
+REMARKS_MAX_LIMIT = 200
+# queries behind a detail GET: the grievance (get_grievance), the remarks version for its
+# validators (conditional.grievance_detail_validators) and one page of remarks; a 304 skips
+# the last. Checked by the tests and `check_detail_queries`.
+DETAIL_QUERY_BUDGET = 3
+
+
+def remarks_page_size():
+    return getattr(settings, "ADMINPANEL_REMARKS_PAGE_SIZE", 50)
+
+
+def grievance_detail_queryset():
+    return Grievance.objects.select_related(
+        "user", "category__department", "department", "assigned_officer", "feedback",
+    )
+
+
+def get_grievance(pk):
+    """The grievance with every to-one relation the detail serializer reads (one query)."""
+    return get_object_or_404(grievance_detail_queryset(), pk=pk)
+
+
+def attach_remarks(grievance, cursor=None, limit=None):
+    """
+    Load one page of remarks onto `grievance.remark_page` (oldest first) and set
+    `grievance.remarks_next` (None when there are no older remarks). One query.
+    Raises pagination.InvalidCursor for a bad cursor.
+    """
+    limit = max(1, min(int(limit or remarks_page_size()), REMARKS_MAX_LIMIT))
+    remarks = GrievanceRemark.objects.select_related("officer").order_by("-created_at", "-id")
+    if cursor:
+        created_at, pk, _ = decode_cursor(cursor)
+        remarks = remarks.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # drop a previous page if the instance is reused (e.g. after an update)
+    grievance.__dict__.pop("newest_remarks", None)
+    getattr(grievance, "_prefetched_objects_cache", {}).pop("remarks", None)
+    prefetch_related_objects([grievance], Prefetch("remarks", queryset=remarks[: limit + 1], to_attr="newest_remarks"))
+
+    rows = grievance.newest_remarks
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+    grievance.remark_page = rows
+    grievance.remarks_next = encode_cursor(rows[0].created_at, rows[0].pk) if has_more and rows else None
+    return grievance
+
+
+def load_grievance_detail(pk, remarks_cursor=None, remarks_limit=None):
+    """Grievance ready for GrievanceDetailSerializer in two queries."""
+    return attach_remarks(get_grievance(pk), remarks_cursor, remarks_limit)
@@ -0,0 +1,117 @@
+import csv
+import gc
+import os
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.encoding import smart_str
+
+from adminpanel import exports
+from adminpanel.models import Category, Department, Grievance
+
+WORDS = (
+    "water leak pipe road pothole street light garbage drainage sewage electricity power "
+    "outage ration card pension hospital school teacher bus transport noise pollution"
+).split()
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def legacy_csv_chunks(qs):
+    """The export as it was: model instances over four joins, one smart_str() per cell, one chunk per row."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(exports.CSV_HEADER)).encode("utf-8")
+    for g in qs.select_related("user", "category", "department", "assigned_officer").iterator():
+        yield writer.writerow([
+            smart_str(g.id), smart_str(g.tracking_id), smart_str(g.title), smart_str(g.description),
+            smart_str(g.status),
+            smart_str(getattr(g.category, "name", "") if g.category else ""),
+            smart_str(getattr(g.department, "name", "") if g.department else ""),
+            smart_str(getattr(g.user, "id", "")), smart_str(getattr(g.user, "username", "")),
+            smart_str(getattr(g.assigned_officer, "id", "")), smart_str(getattr(g.assigned_officer, "username", "")),
+            smart_str(g.created_at.isoformat() if g.created_at else ""),
+            smart_str(g.updated_at.isoformat() if g.updated_at else ""),
+        ]).encode("utf-8")
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), or 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the CSV export (legacy per-row path vs. values_list + batched buffer, plain and "
+        "gzip) on a synthetic grievance table: rows/s, bytes, chunks and peak RSS growth. Rows are "
+        "generated inside a transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="synthetic grievances to generate (use 1000000 for the full run)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--skip-legacy", action="store_true", help="only time the fast path")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        rows = options["rows"]
+        runs = [
+            ("fast", lambda qs: exports.csv_chunks(qs)),
+            ("fast+gzip", lambda qs: exports.gzip_stream(exports.csv_chunks(qs))),
+        ]
+        if not options["skip_legacy"]:
+            runs.insert(0, ("legacy", legacy_csv_chunks))
+
+        with transaction.atomic():
+            started = time.monotonic()
+            self._generate(rng, rows)
+            self.stdout.write(f"Generated {rows} grievances in {time.monotonic() - started:.1f}s")
+
+            for name, produce in runs:
+                gc.collect()
+                baseline = peak = rss_bytes()
+                size = chunks = 0
+                t0 = time.perf_counter()
+                for chunk in produce(Grievance.objects.order_by("id")):
+                    size += len(chunk)
+                    chunks += 1
+                    if chunks % 64 == 0:
+                        peak = max(peak, rss_bytes())
+                elapsed = time.perf_counter() - t0
+                peak = max(peak, rss_bytes())
+                self.stdout.write(
+                    f"{name:>10}: {rows / elapsed:>10,.0f} rows/s  {elapsed:6.2f}s  "
+                    f"{size / 1e6:8.1f} MB in {chunks:>8} chunks  peak RSS +{(peak - baseline) / 1e6:.1f} MB"
+                )
+
+            transaction.set_rollback(True)
+
+    def _generate(self, rng, rows, batch_size=5000):
+        departments = [Department.objects.create(name=f"Bench dept {n}", code=f"bench-{n}") for n in range(5)]
+        categories = [Category.objects.create(name=f"Bench category {n}", department=rng.choice(departments)) for n in range(20)]
+        users = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f"bench-user-{n}") for n in range(50)]
+        )
+        statuses = [c[0] for c in Grievance.STATUS_CHOICES]
+        for start in range(0, rows, batch_size):
+            batch = []
+            for n in range(start, min(rows, start + batch_size)):
+                category = rng.choice(categories)
+                batch.append(Grievance(
+                    tracking_id=f"BNX-{2020 + n % 6}-{n:07d}",
+                    title=" ".join(rng.sample(WORDS, rng.randint(3, 6))),
+                    description=" ".join(rng.choices(WORDS, k=rng.randint(10, 40))),
+                    status=rng.choice(statuses),
+                    category=category, department_id=category.department_id,
+                    user=rng.choice(users), assigned_officer=rng.choice(users) if n % 3 else None,
+                ))
+            Grievance.objects.bulk_create(batch)
@@ -0,0 +1,95 @@
+# adminpanel/management/commands/benchmark_suggest.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from adminpanel import suggest
+from adminpanel.models import Grievance
+
+WORDS = (
+    "water leak pipe road pothole street light garbage drainage sewage electricity power "
+    "outage ration card pension hospital school teacher bus transport noise pollution "
+    "encroachment building permit tax certificate land survey flood relief bridge canal "
+    "market license police complaint delay payment salary toilet sanitation mosquito"
+).split()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure typeahead latency on a synthetic grievance table. Rows are generated "
+        "inside a transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="synthetic grievances to generate (use 1000000 for the SLO run)")
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--limit", type=int, default=suggest.DEFAULT_LIMIT)
+        parser.add_argument("--target-ms", type=float, default=10.0, help="p99 latency target")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        rows = options["rows"]
+
+        with transaction.atomic():
+            started = time.monotonic()
+            tracking_ids = self._generate(rng, rows)
+            self.stdout.write(f"Generated {rows} grievances in {time.monotonic() - started:.1f}s")
+
+            queries = []
+            for _ in range(options["queries"]):
+                if rng.random() < 0.5:
+                    tid = rng.choice(tracking_ids)
+                    queries.append(tid[: rng.randint(2, len(tid))])  # from a bare "BN" to the full ID
+                else:
+                    words = rng.sample(WORDS, rng.choice((1, 1, 2)))
+                    words[-1] = words[-1][: rng.randint(2, len(words[-1]))]
+                    queries.append(" ".join(words))
+
+            for q in queries[:50]:  # warm caches
+                suggest.suggest_grievances(q, options["limit"])
+
+            timings = []
+            for q in queries:
+                t0 = time.perf_counter()
+                suggest.suggest_grievances(q, options["limit"])
+                timings.append((time.perf_counter() - t0) * 1000.0)
+
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p50, p90, p99 = (percentile(timings, p) for p in (50, 90, 99))
+        self.stdout.write(
+            f"{len(timings)} queries over {rows} rows: "
+            f"p50={p50:.2f}ms p90={p90:.2f}ms p99={p99:.2f}ms max={timings[-1]:.2f}ms"
+        )
+        if p99 <= options["target_ms"]:
+            self.stdout.write(self.style.SUCCESS(f"p99 within {options['target_ms']}ms target"))
+        else:
+            self.stdout.write(self.style.WARNING(f"p99 above {options['target_ms']}ms target"))
+
+    def _generate(self, rng, rows, batch_size=5000):
+        tracking_ids = []
+        for start in range(0, rows, batch_size):
+            batch = []
+            for n in range(start, min(rows, start + batch_size)):
+                tid = f"BNC-{2020 + n % 6}-{n:07d}"
+                tracking_ids.append(tid)
+                batch.append(Grievance(
+                    tracking_id=tid,
+                    title=" ".join(rng.sample(WORDS, rng.randint(3, 6))),
+                    description="",
+                    status=rng.choice([c[0] for c in Grievance.STATUS_CHOICES]),
+                ))
+            created = Grievance.objects.bulk_create(batch)
+            suggest.index_titles([(g.pk, g.title) for g in created])
+        return tracking_ids
@@ -0,0 +1,49 @@
+# adminpanel/management/commands/check_detail_queries.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from adminpanel.conditional import grievance_detail_validators
+from adminpanel.loaders import DETAIL_QUERY_BUDGET, attach_remarks, get_grievance
+from adminpanel.models import Grievance
+from adminpanel.serializers import GrievanceDetailSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Load and serialize a grievance detail the way the API does and fail if it takes more "
+        "than the fixed query budget (guards against N+1 regressions)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grievance", type=int, help="Grievance id (default: the one with the most remarks).")
+        parser.add_argument("--verbose-sql", action="store_true", help="Print the captured queries.")
+
+    def handle(self, *args, **options):
+        pk = options.get("grievance")
+        if pk is None:
+            busiest = Grievance.objects.annotate(n=Count("remarks")).order_by("-n").values_list("pk", flat=True).first()
+            if busiest is None:
+                raise CommandError("No grievances to check.")
+            pk = busiest
+
+        with CaptureQueriesContext(connection) as ctx:
+            # what the detail GET does: load, validators, one remarks page, serialize
+            grievance = get_grievance(pk)
+            grievance_detail_validators(grievance, RequestFactory().get("/"))
+            attach_remarks(grievance)
+            data = GrievanceDetailSerializer(grievance).data
+            # deep-walk the payload so lazy relations would have fired
+            for remark in data["remarks"]:
+                remark.get("officer")
+
+        if options["verbose_sql"]:
+            for query in ctx.captured_queries:
+                self.stdout.write(query["sql"])
+        used = len(ctx.captured_queries)
+        self.stdout.write(f"grievance {pk}: {len(data['remarks'])} remarks serialized in {used} queries")
+        if used > DETAIL_QUERY_BUDGET:
+            raise CommandError(f"Detail load used {used} queries; budget is {DETAIL_QUERY_BUDGET}.")
+        self.stdout.write(self.style.SUCCESS("Within query budget."))
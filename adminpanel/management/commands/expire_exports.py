@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from adminpanel import exportjobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the files of finished export jobs past their expiry and mark them expired; "
+        "requeue running jobs whose worker stopped. Run it on a schedule (e.g. hourly cron)."
+    )
+
+    def handle(self, *args, **options):
+        requeued = exportjobs.requeue_stale()
+        expired = exportjobs.expire()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} export jobs, requeued {requeued} stalled ones"))
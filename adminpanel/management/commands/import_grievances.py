@@ -0,0 +1,49 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import grievances from a CSV or NDJSON file: rows are validated, resolved and "
+        "inserted in batches; invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header line) or NDJSON file.")
+        parser.add_argument("--format", choices=imports.FORMATS, help="Defaults to the file extension (.ndjson/.jsonl: NDJSON).")
+        parser.add_argument("--batch-size", type=int, default=imports.BATCH_SIZE)
+        parser.add_argument("--create-missing", action="store_true", help="Create departments that do not exist.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only.")
+        parser.add_argument("--errors", help="Write the per-row errors to this file as NDJSON.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.lower().endswith((".ndjson", ".jsonl")) else "csv")
+        started = time.monotonic()
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as stream:
+                result = imports.import_rows(
+                    imports.read_rows(stream, fmt), batch_size=options["batch_size"],
+                    create_missing=options["create_missing"], dry_run=options["dry_run"],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        if options["errors"]:
+            with open(options["errors"], "w", encoding="utf-8") as out:
+                for error in result["errors"]:
+                    out.write(json.dumps(error) + "\n")
+        else:
+            for error in result["errors"][:20]:
+                self.stdout.write(self.style.WARNING(f"row {error['row']}: {error['errors']}"))
+        verb = "Validated" if result["dry_run"] else "Imported"
+        rate = result["rows"] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['created']} of {result['rows']} rows ({result['failed']} failed) "
+            f"in {elapsed:.1f}s, {rate:,.0f} rows/s"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from adminpanel import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change feed entries older than ADMINPANEL_CHANGES_RETENTION_DAYS (or --days). "
+        "Clients whose cursor falls before what is left get 410 and must resync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+
+    def handle(self, *args, **options):
+        deleted = changes.prune(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change feed entries"))
@@ -0,0 +1,26 @@
+# adminpanel/management/commands/rebuild_lifecycle.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel import cache, lifecycle
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill the GrievanceLifecycle projection: stream ChangeLog in id order and apply "
+        "every entry not yet applied (resumable). --reset rebuilds from scratch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Delete all lifecycle rows first.")
+        parser.add_argument("--chunk", type=int, default=lifecycle.CHUNK, help="Log entries / grievances per batch.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created, applied = lifecycle.rebuild(reset=options["reset"], chunk=options["chunk"])
+        cache.bump("grievances")
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} lifecycle rows and applied {applied} change-log entries in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,16 @@
+# adminpanel/management/commands/rebuild_rollups.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the GrievanceDailyStats analytics rollup from the grievance table (backfill or repair)."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = rollups.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} rollup rows in {elapsed:.1f}s"))
@@ -0,0 +1,21 @@
+# adminpanel/management/commands/rebuild_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from adminpanel.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Create (if needed) and fully rebuild the grievance full-text search index."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.monotonic()
+        with transaction.atomic():
+            total = backend.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} grievances with {type(backend).__name__} in {elapsed:.1f}s"
+        ))
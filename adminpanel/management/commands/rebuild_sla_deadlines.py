@@ -0,0 +1,20 @@
+# adminpanel/management/commands/rebuild_sla_deadlines.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel import cache, sla
+
+
+class Command(BaseCommand):
+    help = "Recompute Grievance.due_at from the SLA policies (backfill or repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--open-only", action="store_true", help="Only open grievances (what a policy change updates).")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = sla.refresh_deadlines(open_only=options["open_only"])
+        cache.bump("grievances")
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Updated due_at on {total} grievances in {elapsed:.1f}s"))
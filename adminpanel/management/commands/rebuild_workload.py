@@ -0,0 +1,16 @@
+# adminpanel/management/commands/rebuild_workload.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from adminpanel import workload
+
+
+class Command(BaseCommand):
+    help = "Recompute the OfficerWorkload table from the grievance table and change log (backfill or repair)."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = workload.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} workload rows in {elapsed:.1f}s"))
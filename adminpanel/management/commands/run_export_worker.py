@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from adminpanel import exportjobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued export jobs (see adminpanel/exportjobs.py): polls the queue, writes each "
+        "file and expires old ones. Use with ADMINPANEL_EXPORT_WORKER = \"command\"."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            ran = exportjobs.drain()
+            expired = exportjobs.expire()
+            if ran or expired:
+                self.stdout.write(f"Ran {ran} export jobs, expired {expired}")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,107 @@
+import multiprocessing
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from adminpanel import tracking
+from adminpanel.models import TrackingSequence
+
+
+class RolledBack(Exception):
+    pass
+
+
+def take_ids(year, count, rollback_share, seed):
+    """IDs handed out to one thread; a share of them inside transactions that roll back (not returned)."""
+    rng = random.Random(seed)
+    taken = []
+    try:
+        for _ in range(count):
+            if rng.random() >= rollback_share:
+                taken.append(tracking.next_id(year=year))
+                continue
+            try:
+                with transaction.atomic():
+                    tracking.next_id(year=year)
+                    raise RolledBack()
+            except RolledBack:
+                pass
+    finally:
+        connection.close()
+    return taken
+
+
+def run_process(year, threads, count, rollback_share, seed, results):
+    taken = []
+    lock = threading.Lock()
+
+    def work(n):
+        ids = take_ids(year, count, rollback_share, seed * 1000 + n)
+        with lock:
+            taken.extend(ids)
+
+    workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(taken)
+
+
+class Command(BaseCommand):
+    help = (
+        "Hand out tracking IDs from several processes and threads at once and check that "
+        "no ID is issued twice. Uses a year no real grievance has (default 9999) and "
+        "deletes its sequence row afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--threads", type=int, default=4, help="threads per process")
+        parser.add_argument("--ids", type=int, default=500, help="IDs requested per thread")
+        parser.add_argument("--rollback-share", type=float, default=0.1,
+                            help="share of requests made inside a transaction that is rolled back")
+        parser.add_argument("--year", type=int, default=9999)
+        parser.add_argument("--keep", action="store_true", help="keep the test year's sequence row")
+
+    def handle(self, *args, **options):
+        year = options["year"]
+        TrackingSequence.objects.filter(year=year).delete()
+        connections.close_all()  # forked children must open their own connections
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        started = time.monotonic()
+        processes = [
+            context.Process(target=run_process, args=(
+                year, options["threads"], options["ids"], options["rollback_share"], n + 1, results,
+            ))
+            for n in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        taken = []
+        for _ in processes:
+            taken.extend(results.get())
+        for process in processes:
+            process.join()
+        elapsed = time.monotonic() - started
+
+        failed = [process.exitcode for process in processes if process.exitcode]
+        numbers = sorted(int(tid.rsplit("-", 1)[1]) for tid in taken)
+        duplicates = len(numbers) - len(set(numbers))
+        gaps = (numbers[-1] - numbers[0] + 1 - len(set(numbers))) if numbers else 0
+        if not options["keep"]:
+            TrackingSequence.objects.filter(year=year).delete()
+
+        self.stdout.write(
+            f"{len(taken)} IDs committed by {options['processes']} x {options['threads']} workers in "
+            f"{elapsed:.2f}s ({len(taken) / elapsed:,.0f} IDs/s), block size {tracking.block_size()}, "
+            f"{gaps} numbers skipped"
+        )
+        if failed or duplicates:
+            raise CommandError(f"{duplicates} duplicate IDs, {len(failed)} workers failed")
+        self.stdout.write(self.style.SUCCESS("No duplicates."))
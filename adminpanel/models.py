@@ -1,6 +1,6 @@
 # adminpanel/models.py
 from django.conf import settings
-from django.db import models
+from django.db import models, router
 from django.utils import timezone
 from django.db.models import Index
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -11,8 +11,9 @@ AUTH_USER = settings.AUTH_USER_MODEL
 
 def grievance_upload_to(instance, filename):
     """
-    File upload path. If tracking_id is not yet available (during initial save),
-    files will be stored under "untracked/" and can be moved/handled later if needed.
+    File upload path. Grievance.save() assigns the tracking_id before the first INSERT,
+    so files land under the grievance's final ID; "untracked/" is only used for
+    instances that have none.
     """
     tracking = instance.tracking_id or "untracked"
     return f"grievance_files/{tracking}/{filename}"
@@ -73,6 +74,8 @@ class Grievance(models.Model):
         (STATUS_RESOLVED, "Resolved"),
         (STATUS_ESCALATED, "Escalated"),
     ]
+    # statuses that still count against an officer's load and an SLA deadline
+    OPEN_STATUSES = (STATUS_NEW, STATUS_IN_PROGRESS, STATUS_ESCALATED)
 
     tracking_id = models.CharField(max_length=40, unique=True, db_index=True, blank=True)
 
@@ -111,43 +114,79 @@ class Grievance(models.Model):
         on_delete=models.SET_NULL,
     )
 
-    status = models.CharField(max_length=32, choices=STATUS_CHOICES, default=STATUS_NEW, db_index=True)
+    status = models.CharField(max_length=32, choices=STATUS_CHOICES, default=STATUS_NEW)
 
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # set when status becomes resolved, cleared if it is reopened (see save())
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    # SLA deadline from the applicable SLAPolicy (see save() and adminpanel.sla); null = no SLA
+    due_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ("-created_at",)
+        # Composite (filter, created_at) indexes: the admin list filters on one of these
+        # columns and pages newest-first, so equality + ORDER BY created_at is a single
+        # index range scan with no sort step. created_at alone is covered by db_index.
         indexes = [
-            Index(fields=["status"]),
-            Index(fields=["created_at"]),
-            Index(fields=["department"]),
-            Index(fields=["category"]),
+            Index(fields=["status", "created_at"], name="grv_status_created_idx"),
+            Index(fields=["assigned_officer", "created_at"], name="grv_officer_created_idx"),
+            Index(fields=["category", "created_at"], name="grv_category_created_idx"),
+            Index(fields=["department", "created_at"], name="grv_department_created_idx"),
+            Index(fields=["user", "created_at"], name="grv_user_created_idx"),
+            # resolved-per-period series and resolution windows (see timeseries.py / resolution.py)
+            Index(fields=["resolved_at"], name="grv_resolved_at_idx"),
+            # SLA breach scan: open status + due_at range (see sla.py)
+            Index(fields=["status", "due_at"], name="grv_status_due_idx"),
         ]
 
     def __str__(self):
         return f"{self.tracking_id or 'NEW'} - {self.title}"
 
-    def _generate_tracking_id(self):
-        year = timezone.now().year
-        # Use pk padded to 6 digits
-        return f"KER-{year}-{self.pk:06d}"
-
     def save(self, *args, **kwargs):
         """
-        On create: first save to obtain PK, then generate and persist a tracking_id.
-        This approach avoids race-conditions with unique tracking_id generation when using the PK.
+        On create: take a tracking_id from the per-year sequence (adminpanel.tracking)
+        first, so the row is written by a single INSERT that already carries it.
         """
-        need_tracking = not bool(self.tracking_id)
-        if need_tracking and not self.pk:
-            # First save to get a PK
-            super().save(*args, **kwargs)
-            self.tracking_id = self._generate_tracking_id()
-            # Use update to avoid re-running save logic and potential recursion
-            Grievance.objects.filter(pk=self.pk).update(tracking_id=self.tracking_id)
-            return
+        self._sync_resolved_at(kwargs)
+        self._sync_due_at(kwargs)
+        if not self.tracking_id and self._state.adding:
+            from adminpanel import tracking  # tracking imports this module
+
+            using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+            self.tracking_id = tracking.next_id(using=using)
         super().save(*args, **kwargs)
 
+    def _sync_resolved_at(self, save_kwargs):
+        resolved_at = self.resolved_at
+        if self.status == self.STATUS_RESOLVED:
+            resolved_at = resolved_at or timezone.now()
+        else:
+            resolved_at = None
+        if resolved_at != self.resolved_at:
+            self.resolved_at = resolved_at
+            update_fields = save_kwargs.get("update_fields")
+            if update_fields is not None and "resolved_at" not in update_fields:
+                save_kwargs["update_fields"] = list(update_fields) + ["resolved_at"]
+
+    def _sync_due_at(self, save_kwargs):
+        update_fields = save_kwargs.get("update_fields")
+        if update_fields is not None and not (set(update_fields) & {"category", "category_id", "department", "department_id", "created_at"}):
+            return
+        if self._derive_due_at() and update_fields is not None and "due_at" not in update_fields:
+            save_kwargs["update_fields"] = list(update_fields) + ["due_at"]
+
+    def _derive_due_at(self):
+        """Set due_at from the applicable SLA policy; True if it changed."""
+        from adminpanel import sla  # sla imports this module
+
+        # auto_now_add has not filled created_at yet on the first save
+        due_at = sla.deadline_for(self.created_at or timezone.now(), self.category_id, self.department_id)
+        if due_at == self.due_at:
+            return False
+        self.due_at = due_at
+        return True
+
 
 class GrievanceRemark(models.Model):
     grievance = models.ForeignKey(Grievance, on_delete=models.CASCADE, related_name="remarks")
@@ -204,9 +243,249 @@ class ChangeLog(models.Model):
 
     class Meta:
         ordering = ("-timestamp",)
+        indexes = [
+            # status-transition series, e.g. escalations per period
+            Index(fields=["action", "timestamp"]),
+        ]
 
     def __str__(self):
         who = self.user.get_full_name() if getattr(self.user, "get_full_name", None) else "System"
         return f"{self.timestamp:%Y-%m-%d %H:%M} | {who} | {self.action}"
 
 
+
+class GrievanceSuggestToken(models.Model):
+    """
+    Normalized title tokens for the typeahead endpoint. One row per distinct token per
+    grievance; the (token, -grievance) index serves prefix lookups as a single range scan.
+    Maintained by adminpanel.suggest (see signals.py); rebuild with `rebuild_suggest_index`.
+    """
+    token = models.CharField(max_length=64)
+    grievance = models.ForeignKey(Grievance, on_delete=models.CASCADE, related_name="suggest_tokens")
+
+    class Meta:
+        indexes = [
+            Index(fields=["token", "-grievance"]),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.grievance_id}"
+
+
+class GrievanceDailyStats(models.Model):
+    """
+    Analytics rollup: grievance counts per created day x status x category x department,
+    with resolution-time totals for the resolved ones. Kept current by adminpanel.rollups
+    (see signals.py); rebuild or repair with `rebuild_rollups`.
+
+    Rows are additive: readers always SUM over them, so a key may span several rows.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=32)
+    category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    department = models.ForeignKey(Department, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    count = models.IntegerField(default=0)
+    resolved_count = models.IntegerField(default=0)
+    # sum of GrievanceLifecycle.resolution_seconds over resolved_count grievances
+    resolution_seconds = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            Index(fields=["day", "status"]),
+            Index(fields=["category", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status} cat={self.category_id} dept={self.department_id}: {self.count}"
+
+
+class OfficerWorkload(models.Model):
+    """
+    Open-grievance load per officer: counts per open status, the oldest open grievance
+    and the last assignment. Kept current by adminpanel.workload (see signals.py);
+    rebuild or repair with `rebuild_workload`. Officers with no row have no open load.
+    """
+    officer = models.OneToOneField(AUTH_USER, primary_key=True, on_delete=models.CASCADE, related_name="+")
+    new_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    escalated_count = models.IntegerField(default=0)
+    # created_at of the oldest open grievance assigned to the officer
+    oldest_open_at = models.DateTimeField(null=True, blank=True)
+    last_assigned_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def open_count(self):
+        return self.new_count + self.in_progress_count + self.escalated_count
+
+    def __str__(self):
+        return f"officer={self.officer_id}: {self.open_count} open"
+
+
+class SLAPolicy(models.Model):
+    """
+    Resolution deadline in days, global (no category or department) or for one category
+    or department. The most specific policy applies: category, then department, then
+    global, then settings.ADMINPANEL_SLA_DEFAULT_DAYS; 0 days means no deadline.
+    Grievance.due_at is derived from it (see adminpanel.sla).
+    """
+    category = models.OneToOneField(Category, null=True, blank=True, on_delete=models.CASCADE, related_name="sla_policy")
+    department = models.OneToOneField(Department, null=True, blank=True, on_delete=models.CASCADE, related_name="sla_policy")
+    days = models.PositiveIntegerField(validators=[MaxValueValidator(365)])
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(category__isnull=True) | models.Q(department__isnull=True),
+                name="slapolicy_single_scope",
+            ),
+        ]
+
+    @property
+    def scope(self):
+        if self.category_id:
+            return "category"
+        if self.department_id:
+            return "department"
+        return "global"
+
+    def __str__(self):
+        target = self.category_id or self.department_id or ""
+        return f"SLA {self.scope}{' ' + str(target) if target else ''}: {self.days}d"
+
+
+class GrievanceLifecycle(models.Model):
+    """
+    Per-grievance timings projected from ChangeLog: first assignment, seconds spent in
+    each status (completed stints; the current one runs from status_since), reassignments
+    and the latest resolution. Kept current by adminpanel.lifecycle (see signals.py);
+    backfill or repair with `rebuild_lifecycle`.
+    """
+    grievance = models.OneToOneField(Grievance, primary_key=True, on_delete=models.CASCADE, related_name="lifecycle")
+    # the grievance's created_at, copied so replaying log entries needs no join
+    created_at = models.DateTimeField()
+    current_status = models.CharField(max_length=32, blank=True)
+    status_since = models.DateTimeField()
+    seconds_new = models.BigIntegerField(default=0)
+    seconds_in_progress = models.BigIntegerField(default=0)
+    seconds_resolved = models.BigIntegerField(default=0)
+    seconds_escalated = models.BigIntegerField(default=0)
+    status_changes = models.IntegerField(default=0)
+    first_assigned_at = models.DateTimeField(null=True, blank=True)
+    reassignments = models.IntegerField(default=0)
+    # latest resolution; cleared again if the grievance is reopened
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    resolution_seconds = models.BigIntegerField(null=True, blank=True)
+    # id of the last ChangeLog row applied: replays are skipped, backfills can resume
+    last_log_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # resolved series and windows are keyed on the lifecycle's resolution time
+        indexes = [Index(fields=["resolved_at"], name="lifecycle_resolved_at_idx")]
+
+    def __str__(self):
+        return f"lifecycle {self.grievance_id}: {self.current_status} since {self.status_since:%Y-%m-%d %H:%M}"
+
+
+class LifecycleBackfill(models.Model):
+    """
+    How far `rebuild_lifecycle` has replayed ChangeLog: every entry up to last_log_id has
+    been applied, so a resumed run streams from there. A single row; see adminpanel.lifecycle.
+    """
+    last_log_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"lifecycle backfill at log {self.last_log_id}"
+
+
+class ExportJob(models.Model):
+    """
+    A grievance export written to disk by a background worker (see adminpanel.exportjobs)
+    and downloaded, resumably, once done. `params` holds the list filter params.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_EXPIRED = "expired"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_CANCELLED, "Cancelled"),
+        (STATUS_EXPIRED, "Expired"),
+    ]
+    FORMAT_CHOICES = [("csv", "CSV"), ("ndjson", "NDJSON")]
+
+    created_by = models.ForeignKey(AUTH_USER, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    params = models.JSONField(default=dict, blank=True)
+    include = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    bytes_written = models.BigIntegerField(default=0)
+    file_name = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    # progress heartbeat: a running job that stops moving is requeued
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [Index(fields=["status", "created_at"], name="exportjob_status_idx")]
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_DONE:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return round(min(1.0, self.rows_written / self.total_rows), 4)
+
+    def __str__(self):
+        return f"export {self.pk} ({self.format}, {self.status})"
+
+
+class TrackingSequence(models.Model):
+    """
+    Per-year tracking number counter (KER-<year>-<number>). Workers reserve blocks of
+    numbers by advancing next_value under the row lock; see adminpanel.tracking.
+    """
+    year = models.PositiveIntegerField(primary_key=True)
+    # the first number not yet handed out
+    next_value = models.BigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.year}: next {self.next_value}"
+
+
+class GrievanceChange(models.Model):
+    """
+    Change feed entry: one row per grievance written or deleted, in the same transaction
+    as the write. The auto-increment id is the feed's sequence; see adminpanel.changes.
+    """
+    OP_UPSERT = "upsert"
+    OP_DELETE = "delete"
+    OP_CHOICES = [(OP_UPSERT, "Upsert"), (OP_DELETE, "Delete")]
+
+    id = models.BigAutoField(primary_key=True)
+    # not a foreign key: delete entries outlive their grievance. Same width as the
+    # grievance's BigAutoField; indexed for per-grievance lookups and pruning.
+    grievance_id = models.BigIntegerField(db_index=True)
+    op = models.CharField(max_length=8, choices=OP_CHOICES, default=OP_UPSERT)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.pk}: {self.op} {self.grievance_id}"
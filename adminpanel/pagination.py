@@ -0,0 +1,80 @@
+# adminpanel/pagination.py
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue (or cannot read)."""
+
+
+def encode_cursor(created_at, pk, direction="next"):
+    """
+    Build an opaque cursor for the (created_at, id) keyset.
+    The payload is plain JSON in urlsafe base64; clients must treat it as opaque.
+    """
+    payload = {"t": created_at.isoformat(), "i": pk, "d": "p" if direction == "prev" else "n"}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value):
+    """
+    Decode a cursor produced by encode_cursor().
+    Returns (created_at, pk, direction) or raises InvalidCursor.
+    """
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = parse_datetime(payload["t"])
+        pk = int(payload["i"])
+        direction = "prev" if payload.get("d") == "p" else "next"
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise InvalidCursor("Invalid cursor.")
+    if created_at is None:
+        raise InvalidCursor("Invalid cursor.")
+    return created_at, pk, direction
+
+
+def _keyset(row):
+    # rows are model instances, or dicts from .values() (which must include id and created_at)
+    if isinstance(row, dict):
+        return row["created_at"], row["id"]
+    return row.created_at, row.pk
+
+
+def paginate_keyset(qs, cursor=None, limit=100):
+    """
+    Keyset pagination over ("-created_at", "-id").
+
+    Unlike offset slicing, every page is a bounded index range scan no matter how deep
+    the client has scrolled, and no COUNT(*) is issued.
+
+    Returns (rows, next_cursor, prev_cursor); cursors are None at either end.
+    """
+    direction = "next"
+    if cursor:
+        created_at, pk, direction = decode_cursor(cursor)
+        if direction == "prev":
+            qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)).order_by("created_at", "id")
+        else:
+            qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)).order_by("-created_at", "-id")
+    else:
+        qs = qs.order_by("-created_at", "-id")
+
+    # fetch one extra row to know whether another page exists
+    rows = list(qs[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if direction == "prev":
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, bool(cursor)
+
+    next_cursor = encode_cursor(*_keyset(rows[-1]), "next") if rows and has_next else None
+    prev_cursor = encode_cursor(*_keyset(rows[0]), "prev") if rows and has_prev else None
+    return rows, next_cursor, prev_cursor
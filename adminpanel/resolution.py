@@ -0,0 +1,198 @@
+# adminpanel/resolution.py
+"""
+Resolution-time statistics for resolved grievances, read from the lifecycle projection
+(GrievanceLifecycle.resolved_at / resolution_seconds: the latest resolution, cleared on
+reopen), so the average, the percentiles and the lifecycle summary share one source.
+
+The average is a database aggregate. Percentiles (p50/p90/p99, linear interpolation,
+i.e. percentile_cont) overall and per category / department are computed:
+
+  - on PostgreSQL with percentile_cont() ... WITHIN GROUP, entirely in the database
+  - elsewhere from a compact array of durations (8 bytes per grievance, streamed in
+    chunks), with NumPy when it is installed and a pure-Python fallback otherwise
+"""
+import datetime
+import math
+from array import array
+
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, F, FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from adminpanel.filters import day_start
+from adminpanel.models import Category, Department, Grievance
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python path gives the same numbers
+    np = None
+
+PERCENTILES = (50, 90, 99)
+SECONDS_PER_DAY = 86400
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL ordered-set aggregate: percentile_cont(fraction) WITHIN GROUP (ORDER BY expr)."""
+    function = "percentile_cont"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def _duration():
+    """Resolution time in seconds, as a float."""
+    return Cast(F("lifecycle__resolution_seconds"), FloatField())
+
+
+def window_start(window_days):
+    """Start of a window of the last N calendar days (today included), or None."""
+    if not window_days:
+        return None
+    return day_start(timezone.localdate() - datetime.timedelta(days=window_days - 1))
+
+
+def resolved_queryset(spec, window_days=None):
+    """Resolved grievances under the filter spec, optionally resolved within the last N days."""
+    qs = spec.apply(Grievance.objects.order_by(), rank=False).filter(
+        status=Grievance.STATUS_RESOLVED, lifecycle__resolution_seconds__isnull=False,
+    )
+    if window_days:
+        qs = qs.filter(lifecycle__resolved_at__gte=window_start(window_days))
+    return qs
+
+
+def average_days(qs):
+    """Mean resolution time in days (database aggregate), or None with no resolved rows."""
+    return _days(qs.aggregate(avg=Avg(_duration()))["avg"])
+
+
+def _days(seconds):
+    return None if seconds is None else round(seconds / SECONDS_PER_DAY, 2)
+
+
+def _percentile(sorted_values, pct):
+    """Linear interpolation between closest ranks (matches numpy 'linear' / percentile_cont)."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * pct / 100.0
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def _summarize(seconds):
+    """{count, avg, p50, p90, p99} in seconds for a sequence of durations."""
+    if np is not None:
+        if len(seconds) == 0:
+            return {"count": 0, "avg": None, **{f"p{p}": None for p in PERCENTILES}}
+        points = np.percentile(seconds, PERCENTILES)
+        return {"count": int(len(seconds)), "avg": float(seconds.mean()),
+                **{f"p{p}": float(v) for p, v in zip(PERCENTILES, points)}}
+    values = sorted(seconds)
+    avg = sum(values) / len(values) if values else None
+    return {"count": len(values), "avg": avg, **{f"p{p}": _percentile(values, p) for p in PERCENTILES}}
+
+
+def _grouped(keys, seconds):
+    """{key: summary} for parallel arrays of group keys and durations."""
+    if np is not None:
+        if len(keys) == 0:
+            return {}
+        order = np.argsort(keys, kind="stable")
+        keys, seconds = keys[order], seconds[order]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        ends = np.append(starts[1:], len(keys))
+        return {int(keys[s]): _summarize(seconds[s:e]) for s, e in zip(starts, ends)}
+    groups = {}
+    for key, value in zip(keys, seconds):
+        groups.setdefault(key, []).append(value)
+    return {key: _summarize(values) for key, values in groups.items()}
+
+
+def _array_stats(qs):
+    """Stream (category, department, duration) rows into compact typed arrays, then summarize."""
+    categories, departments, seconds = array("q"), array("q"), array("d")
+    rows = qs.values_list("category_id", "department_id", _duration())
+    for category_id, department_id, duration in rows.iterator(chunk_size=5000):
+        categories.append(category_id or 0)  # 0: no category / department (ids start at 1)
+        departments.append(department_id or 0)
+        seconds.append(duration)
+    if np is not None:
+        categories = np.frombuffer(categories, dtype=np.int64) if categories else np.empty(0, dtype=np.int64)
+        departments = np.frombuffer(departments, dtype=np.int64) if departments else np.empty(0, dtype=np.int64)
+        seconds = np.frombuffer(seconds, dtype=np.float64) if seconds else np.empty(0, dtype=np.float64)
+    return _summarize(seconds), _grouped(categories, seconds), _grouped(departments, seconds)
+
+
+def _db_stats(qs):
+    """Same result as _array_stats() computed by PostgreSQL."""
+    seconds = _duration()
+    aggregates = {"count": Count("id"), "avg": Avg(seconds)}
+    aggregates.update({f"p{p}": PercentileCont(seconds, p / 100.0) for p in PERCENTILES})
+
+    overall = qs.aggregate(**aggregates)
+    by_category = {(row.pop("category_id") or 0): row for row in qs.values("category_id").annotate(**aggregates)}
+    by_department = {(row.pop("department_id") or 0): row for row in qs.values("department_id").annotate(**aggregates)}
+    return overall, by_category, by_department
+
+
+def _present(summary):
+    return {
+        "count": summary["count"],
+        "avg_days": _days(summary["avg"]),
+        **{f"p{p}_days": _days(summary[f"p{p}"]) for p in PERCENTILES},
+    }
+
+
+def _named(groups, model):
+    names = dict(model.objects.filter(pk__in=[k for k in groups if k]).values_list("pk", "name"))
+    out = [
+        {"id": key or None, "name": names.get(key) if key else None, **_present(summary)}
+        for key, summary in groups.items()
+    ]
+    return sorted(out, key=lambda row: -row["count"])
+
+
+def median_by_group(qs, group_expr):
+    """
+    {group value: median resolution seconds} for resolved rows of `qs`, grouped by an
+    expression (e.g. a Trunc of resolved_at). One grouped query on PostgreSQL; elsewhere
+    one streamed pass into typed arrays.
+    """
+    qs = qs.filter(lifecycle__resolution_seconds__isnull=False)
+    if connection.vendor == "postgresql":
+        rows = qs.annotate(_group=group_expr).values("_group").annotate(median=PercentileCont(_duration(), 0.5))
+        return {row["_group"]: row["median"] for row in rows}
+
+    index, groups = {}, []
+    keys, seconds = array("q"), array("d")
+    for group, duration in qs.annotate(_group=group_expr).values_list("_group", _duration()).iterator(chunk_size=5000):
+        if group not in index:
+            index[group] = len(groups)
+            groups.append(group)
+        keys.append(index[group])
+        seconds.append(duration)
+    if np is not None:
+        keys = np.frombuffer(keys, dtype=np.int64) if keys else np.empty(0, dtype=np.int64)
+        seconds = np.frombuffer(seconds, dtype=np.float64) if seconds else np.empty(0, dtype=np.float64)
+    return {groups[key]: summary["p50"] for key, summary in _grouped(keys, seconds).items()}
+
+
+def resolution_stats(spec, window_days=None):
+    """
+    Resolution-time summary for the filter spec: overall and per category / department,
+    in days. `window_days` limits it to grievances resolved in the last N days.
+    """
+    qs = resolved_queryset(spec, window_days)
+    if connection.vendor == "postgresql":
+        overall, by_category, by_department = _db_stats(qs)
+    else:
+        overall, by_category, by_department = _array_stats(qs)
+    return {
+        **_present(overall),
+        "window_days": window_days,
+        "by_category": _named(by_category, Category),
+        "by_department": _named(by_department, Department),
+    }
@@ -0,0 +1,150 @@
+# adminpanel/retriage.py
+"""
+Bulk status change / reassignment (POST /api/grievances/bulk/).
+
+A request names its grievances by id or with a list filter spec and sets a status, an
+officer, or both. Everything happens in one transaction:
+
+  1. the target rows are locked and the fields the derived tables track are read
+  2. the rows that actually change get one UPDATE (status, resolved_at, officer,
+     updated_at)
+  3. the ChangeLog entries a PATCH would have written are bulk_create()d and folded into
+     the lifecycle projection with lifecycle.record_many()
+  4. rollups / workload move with record_changes(), the changed rows go to the change
+     feed and one cache bump is queued for the commit
+
+Status and officer are not part of the search or typeahead documents, so neither index
+is touched.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers as drf_serializers
+
+from adminpanel import cache, changes, lifecycle, rollups, workload
+from adminpanel.filters import GrievanceFilterSpec
+from adminpanel.models import ChangeLog, Grievance
+
+MAX_ROWS = 5000
+ASSIGN_ACTION = "assigned_officer_changed"  # as a PATCH logs it
+STATUSES = {status for status, _ in Grievance.STATUS_CHOICES}
+# stored columns the rollup and workload tables are derived from, and resolved_at
+TRACKED_FIELDS = tuple(dict.fromkeys(rollups.TRACKED_FIELDS + workload.TRACKED_FIELDS + ("resolved_at",)))
+UNCHANGED = object()
+
+
+def _ids(value):
+    if not isinstance(value, (list, tuple)) or not value:
+        raise drf_serializers.ValidationError({"ids": "Must be a non-empty list of grievance ids."})
+    try:
+        ids = sorted({int(pk) for pk in value})
+    except (TypeError, ValueError):
+        raise drf_serializers.ValidationError({"ids": "Must be a non-empty list of grievance ids."})
+    if len(ids) > MAX_ROWS:
+        raise drf_serializers.ValidationError({"ids": f"At most {MAX_ROWS} grievances per request."})
+    return ids
+
+
+def _filtered_ids(params):
+    if not isinstance(params, dict):
+        raise drf_serializers.ValidationError({"filter": "Must be an object of list filter params."})
+    spec = GrievanceFilterSpec.from_params(params)
+    ids = list(spec.queryset(rank=False).order_by("pk").values_list("pk", flat=True)[:MAX_ROWS + 1])
+    if len(ids) > MAX_ROWS:
+        raise drf_serializers.ValidationError({"filter": f"Matches more than {MAX_ROWS} grievances; narrow it or send ids."})
+    return ids
+
+
+def _officer_id(value):
+    """The officer's id, None to unassign; same rules as the assign endpoint."""
+    if value in (None, ""):
+        return None
+    try:
+        officer = get_user_model().objects.get(pk=int(value))
+    except (get_user_model().DoesNotExist, TypeError, ValueError):
+        raise drf_serializers.ValidationError({"assigned_officer": "Officer not found."})
+    if not (getattr(officer, "role", None) == "officer" or officer.is_staff or officer.is_superuser):
+        raise drf_serializers.ValidationError({"assigned_officer": "Selected user is not an officer."})
+    return officer.pk
+
+
+def parse(data):
+    """
+    (ids, {"status": .., "officer_id": ..}) from a request body: "ids" or "filter", plus
+    "status" and/or "assigned_officer" (null unassigns). Raises ValidationError.
+    """
+    if ("ids" in data) == ("filter" in data):
+        raise drf_serializers.ValidationError({"detail": "Send either ids or filter."})
+    status = data.get("status") or None
+    if status is not None and status not in STATUSES:
+        raise drf_serializers.ValidationError({"status": f"Must be one of: {', '.join(sorted(STATUSES))}."})
+    officer_id = _officer_id(data.get("assigned_officer")) if "assigned_officer" in data else UNCHANGED
+    if status is None and officer_id is UNCHANGED:
+        raise drf_serializers.ValidationError({"detail": "Nothing to change: send status and/or assigned_officer."})
+    ids = _ids(data["ids"]) if "ids" in data else _filtered_ids(data["filter"])
+    return ids, {"status": status, "officer_id": officer_id}
+
+
+def _write_logs(logs):
+    if connection.features.can_return_rows_from_bulk_insert:
+        ChangeLog.objects.bulk_create(logs, batch_size=1000)
+        lifecycle.record_many(logs)
+    else:
+        for log in logs:  # no ids back from a bulk insert: post_save folds each one instead
+            log.save()
+
+
+def apply(ids, status=None, officer_id=UNCHANGED, user=None):
+    """
+    Set `status` and/or the officer (officer_id None unassigns) on the grievances `ids`.
+    Returns {"matched", "updated", "status_changed", "reassigned", "not_found"}.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        stored = {
+            row["id"]: row
+            for row in Grievance.objects.select_for_update(of=("self",)).filter(pk__in=ids).order_by("pk").values(
+                "id", *TRACKED_FIELDS, resolution_seconds=F("lifecycle__resolution_seconds"),
+            )
+        }
+        updates, logs = [], []
+        summary = {"matched": len(stored), "updated": 0, "status_changed": 0, "reassigned": 0}
+        for pk, before in stored.items():
+            after = dict(before)
+            if status is not None:
+                after["status"] = status
+                # as Grievance._sync_resolved_at()
+                after["resolved_at"] = (before["resolved_at"] or now) if status == Grievance.STATUS_RESOLVED else None
+                if before["status"] != status:
+                    logs.append(ChangeLog(user=user, grievance_id=pk, action=lifecycle.STATUS_ACTION,
+                                          before=str(before["status"]), after=str(status)))
+                    summary["status_changed"] += 1
+            if officer_id is not UNCHANGED:
+                after["assigned_officer_id"] = officer_id
+                if before["assigned_officer_id"] != officer_id:
+                    logs.append(ChangeLog(user=user, grievance_id=pk, action=ASSIGN_ACTION,
+                                          before=str(before["assigned_officer_id"]), after=str(officer_id)))
+                    summary["reassigned"] += 1
+            if after != before:
+                updates.append((before, after))
+
+        if updates:
+            values = {"updated_at": now}
+            if status is not None:
+                values["status"] = status
+                values["resolved_at"] = Coalesce(F("resolved_at"), Value(now)) if status == Grievance.STATUS_RESOLVED else None
+            if officer_id is not UNCHANGED:
+                values["assigned_officer_id"] = officer_id
+            Grievance.objects.filter(pk__in=[before["id"] for before, _ in updates]).update(**values)
+            _write_logs(logs)
+            # what the per-row signals would have done, once for the request
+            rollups.record_changes(updates)
+            workload.record_changes(updates)
+            changes.record([before["id"] for before, _ in updates])
+            cache.bump_on_commit("grievances")
+
+    summary["updated"] = len(updates)
+    summary["not_found"] = sorted(set(ids) - stored.keys())
+    return summary
@@ -0,0 +1,252 @@
+# adminpanel/rollups.py
+"""
+Incremental maintenance of GrievanceDailyStats and the analytics summary built on it.
+
+Each grievance contributes to exactly one rollup key: (local day of created_at, status,
+category, department). Saves and deletes move that contribution:
+
+  - pre_save snapshots the stored row's key/resolution fields (skipped for update_fields
+    saves that cannot change them, e.g. a title edit)
+  - post_save subtracts the old contribution and adds the new one
+  - post_delete subtracts the contribution
+
+Resolution totals (resolved_count / resolution_seconds) are the lifecycle projection's
+resolution_seconds, so the rollup average agrees with the live resolution statistics:
+a contribution carries the grievance's current lifecycle value when its key moves, and
+the lifecycle passes its own changes to record_resolutions().
+
+Code that bypasses model signals (queryset.update(), bulk_create) must call
+record_change() / record_changes() itself or leave the rollup to `rebuild_rollups`.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from adminpanel import bulk, changes
+from adminpanel.models import Grievance, GrievanceDailyStats, GrievanceLifecycle
+
+# fields whose change moves a grievance to another rollup key
+TRACKED_FIELDS = ("created_at", "status", "category_id", "department_id")
+# the same, as they may appear in save(update_fields=...)
+TRACKED_UPDATE_FIELDS = set(TRACKED_FIELDS) | {"category", "department"}
+
+
+def snapshot(grievance, resolution_seconds=None):
+    """The tracked field values of an instance, plus its lifecycle resolution_seconds, as a dict."""
+    state = {name: getattr(grievance, name) for name in TRACKED_FIELDS}
+    state["resolution_seconds"] = resolution_seconds
+    return state
+
+
+def stored_snapshot(pk, fields=TRACKED_FIELDS):
+    """The tracked field values (and lifecycle resolution_seconds) in the database, or None if the row is gone."""
+    return Grievance.objects.filter(pk=pk).values(*fields, resolution_seconds=F("lifecycle__resolution_seconds")).first()
+
+
+def _key(state):
+    return (timezone.localdate(state["created_at"]), state["status"], state["category_id"], state["department_id"])
+
+
+def _contribution(state, sign):
+    """((day, status, category_id, department_id), count, resolved_count, resolution_seconds)."""
+    key = _key(state)
+    seconds = state.get("resolution_seconds")
+    if seconds is None:
+        return key, sign, 0, 0
+    return key, sign, sign, sign * seconds
+
+
+def _existing_rows(keys):
+    """{key: pk of its first rollup row} for the keys that have one (one range query)."""
+    days = [key[0] for key in keys]
+    rows = (
+        GrievanceDailyStats.objects.filter(day__gte=min(days), day__lte=max(days)).order_by("-pk")
+        .values_list("pk", "day", "status", "category_id", "department_id")
+    )
+    return {(day, status, category_id, department_id): pk for pk, day, status, category_id, department_id in rows}
+
+
+def _apply(deltas):
+    now = timezone.now()
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    if len(deltas) == 1:  # a single save
+        key = next(iter(deltas))
+        day, status, category_id, department_id = key
+        first = GrievanceDailyStats.objects.filter(
+            day=day, status=status, category_id=category_id, department_id=department_id,
+        ).order_by("pk").values_list("pk", flat=True).first()
+        existing = {key: first} if first else {}
+    else:
+        existing = _existing_rows(deltas)
+    # additive rows: a concurrent insert of the same key is harmless, readers SUM
+    bulk.update_rows(
+        GrievanceDailyStats, ("count", "resolved_count", "resolution_seconds", "updated_at"),
+        [(*deltas[key], now, pk) for key, pk in existing.items() if key in deltas],
+        increment=("count", "resolved_count", "resolution_seconds"),
+    )
+    bulk.insert_rows(
+        GrievanceDailyStats,
+        ("day", "status", "category", "department", "count", "resolved_count", "resolution_seconds", "updated_at"),
+        [(*key, *delta, now) for key, delta in deltas.items() if key not in existing],
+    )
+
+
+def record_change(before=None, after=None):
+    """
+    Move one grievance's contribution from `before` to `after` (snapshot dicts; None for
+    create/delete). No-op when the key and resolution time are unchanged.
+    """
+    record_changes([(before, after)])
+
+
+def record_changes(changes):
+    """record_change() for many (before, after) pairs, with one write per rollup key touched."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None or state.get("created_at") is None:
+                continue
+            key, count, resolved, seconds = _contribution(state, sign)
+            bucket = deltas[key]
+            bucket[0] += count
+            bucket[1] += resolved
+            bucket[2] += seconds
+    _apply({key: tuple(v) for key, v in deltas.items()})
+
+
+def record_resolutions(changes):
+    """
+    Apply lifecycle resolution changes, (grievance id, old seconds, new seconds) with None
+    for unresolved, at each grievance's current key (one read of the keys).
+    """
+    moved = {pk: (old, new) for pk, old, new in changes if old != new}
+    if not moved:
+        return
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for pk, *values in Grievance.objects.filter(pk__in=moved).values_list("pk", *TRACKED_FIELDS):
+        old, new = moved[pk]
+        bucket = deltas[_key(dict(zip(TRACKED_FIELDS, values)))]
+        bucket[1] += (new is not None) - (old is not None)
+        bucket[2] += (new or 0) - (old or 0)
+    _apply({key: tuple(v) for key, v in deltas.items()})
+
+
+def reset_resolutions():
+    """Zero every resolution total (the lifecycle projection is being rebuilt from scratch)."""
+    GrievanceDailyStats.objects.update(resolved_count=0, resolution_seconds=0, updated_at=timezone.now())
+
+
+def rebuild():
+    """
+    Recompute the whole rollup from the grievance table (also backfills resolved_at for
+    grievances resolved before the field existed: the lifecycle projection's resolution
+    time when there is one, updated_at otherwise).
+    Returns the number of rollup rows written.
+    """
+    with transaction.atomic():
+        logged = GrievanceLifecycle.objects.filter(pk=OuterRef("pk")).values("resolved_at")[:1]
+        unset = Grievance.objects.filter(status=Grievance.STATUS_RESOLVED, resolved_at__isnull=True)
+        stale = Grievance.objects.exclude(status=Grievance.STATUS_RESOLVED).filter(resolved_at__isnull=False)
+        changes.record_queryset(unset)
+        changes.record_queryset(stale)
+        unset.update(resolved_at=Coalesce(Subquery(logged), F("updated_at")))
+        stale.update(resolved_at=None)
+
+        GrievanceDailyStats.objects.all().delete()
+        rows = {}
+        grouped = (
+            Grievance.objects.order_by()
+            .annotate(day=TruncDate("created_at"))
+            .values("day", "status", "category_id", "department_id")
+            .annotate(n=Count("id"))
+        )
+        for row in grouped.iterator():
+            key = (row["day"], row["status"], row["category_id"], row["department_id"])
+            rows[key] = GrievanceDailyStats(
+                day=row["day"], status=row["status"], category_id=row["category_id"],
+                department_id=row["department_id"], count=row["n"],
+            )
+        resolved = Grievance.objects.filter(lifecycle__resolution_seconds__isnull=False).values_list(
+            *TRACKED_FIELDS, "lifecycle__resolution_seconds",
+        )
+        for *values, resolution_seconds in resolved.iterator(chunk_size=2000):
+            state = dict(zip(TRACKED_FIELDS, values), resolution_seconds=resolution_seconds)
+            key, _, _, seconds = _contribution(state, 1)
+            stat = rows[key]
+            stat.resolved_count += 1
+            stat.resolution_seconds += seconds
+        GrievanceDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def supports(spec):
+    """True when every active filter in the spec is a rollup dimension."""
+    return (
+        spec.search is None and spec.category_name is None
+        and spec.assigned_officer is None and spec.user is None
+    )
+
+
+def stats_queryset(spec):
+    qs = GrievanceDailyStats.objects.order_by()
+    if spec.status:
+        qs = qs.filter(status=spec.status)
+    if spec.category_id is not None:
+        qs = qs.filter(category_id=spec.category_id)
+    if spec.department is not None:
+        qs = qs.filter(department_id=spec.department)
+    if spec.date_from:
+        qs = qs.filter(day__gte=spec.date_from)
+    if spec.date_to:
+        qs = qs.filter(day__lte=spec.date_to)
+    return qs
+
+
+def rollup_watermark(spec):
+    """(row count, newest updated_at) of the rollup rows behind a summary, for ETags."""
+    mark = stats_queryset(spec).aggregate(n=Count("id"), last=Max("updated_at"))
+    return mark["n"], mark["last"]
+
+
+def summary(spec):
+    """
+    The analytics summary (total, by_status, by_category, avg_resolution_days) from the
+    rollup. Cost is proportional to the number of rollup rows (days x keys), not grievances.
+    """
+    qs = stats_queryset(spec)
+    # resolved keys only, as in resolution.resolved_queryset(): a grievance reopened without
+    # a logged transition keeps its lifecycle resolution under its new status
+    resolved_keys = Q(status=Grievance.STATUS_RESOLVED)
+    totals = qs.aggregate(
+        total=Sum("count"),
+        resolved=Sum("resolved_count", filter=resolved_keys),
+        seconds=Sum("resolution_seconds", filter=resolved_keys),
+    )
+
+    by_status = {}
+    for row in qs.values("status").annotate(n=Sum("count")):
+        if row["n"]:
+            by_status[row["status"]] = row["n"]
+
+    by_category = [
+        {"id": row["category_id"], "name": row["category__name"], "count": row["n"]}
+        for row in qs.filter(category__isnull=False)
+        .values("category_id", "category__name").annotate(n=Sum("count")).order_by("-n")
+        if row["n"]
+    ]
+
+    avg_days = None
+    if totals["resolved"]:
+        avg_days = round((totals["seconds"] / totals["resolved"]) / 86400, 2)
+
+    return {
+        "total_grievances": totals["total"] or 0,
+        "by_status": by_status,
+        "by_category": by_category,
+        "avg_resolution_days": avg_days,
+    }
@@ -0,0 +1,278 @@
+# adminpanel/search.py
+"""
+Full-text search index for grievances.
+
+The index lives in a side table keyed by grievance id and is kept in sync by the
+signal handlers in adminpanel/signals.py. Backends:
+
+  - SQLiteFTS5Backend: FTS5 virtual table, ranked with bm25()
+  - PostgresSearchBackend: tsvector column + GIN index, ranked with ts_rank()
+  - IcontainsSearchBackend: no index, plain OR of icontains (used for other databases)
+
+Pick one explicitly with settings.ADMINPANEL_SEARCH_BACKEND (dotted path); by default
+the backend follows the database vendor. After deploying on an existing database run
+`python manage.py rebuild_search_index` once to populate the index.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _search_chunks(query):
+    """Split user input into whitespace chunks, each a list of alphanumeric tokens."""
+    chunks = []
+    for part in str(query or "").split():
+        tokens = [t.lower() for t in _TOKEN_RE.findall(part)]
+        if tokens:
+            chunks.append(tokens)
+    return chunks
+
+
+def _document_rows(grievance_ids=None):
+    """(id, tracking_id, title, description, user_text) tuples for the index."""
+    from adminpanel.models import Grievance
+
+    qs = Grievance.objects.order_by("id")
+    if grievance_ids is not None:
+        qs = qs.filter(id__in=list(grievance_ids))
+    values = qs.values_list(
+        "id", "tracking_id", "title", "description",
+        "user__username", "user__first_name", "user__last_name",
+    )
+    for gid, tracking_id, title, description, username, first_name, last_name in values.iterator(chunk_size=2000):
+        user_text = " ".join(p for p in (username, first_name, last_name) if p)
+        yield gid, tracking_id or "", title or "", description or "", user_text
+
+
+class BaseSearchBackend:
+    def ensure_index(self):
+        """Create the index structures if missing (idempotent)."""
+
+    def index(self, grievance_ids):
+        """(Re)index the given grievances from their current database rows."""
+
+    def remove(self, grievance_ids):
+        """Drop the given grievances from the index."""
+
+    def rebuild(self):
+        """Drop and rebuild the whole index. Returns the number of indexed rows."""
+        return 0
+
+    def filter(self, queryset, query, rank=True):
+        raise NotImplementedError
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Index-free fallback: the original OR of icontains over text and user columns."""
+
+    def filter(self, queryset, query, rank=True):
+        query = str(query or "").strip()
+        if not query:
+            return queryset
+        return queryset.filter(
+            Q(title__icontains=query)
+            | Q(description__icontains=query)
+            | Q(tracking_id__icontains=query)
+            | Q(user__username__icontains=query)
+            | Q(user__first_name__icontains=query)
+            | Q(user__last_name__icontains=query)
+        )
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    table = "adminpanel_grievance_fts"
+    # bm25 column weights: tracking_id, title, description, user_text
+    weights = (10.0, 5.0, 1.0, 2.0)
+
+    def ensure_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "tracking_id, title, description, user_text, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+
+    def index(self, grievance_ids):
+        grievance_ids = list(grievance_ids)
+        if not grievance_ids:
+            return
+        rows = list(_document_rows(grievance_ids))
+        with connection.cursor() as cursor:
+            self._delete(cursor, grievance_ids)
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, tracking_id, title, description, user_text) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, grievance_ids):
+        grievance_ids = list(grievance_ids)
+        if grievance_ids:
+            with connection.cursor() as cursor:
+                self._delete(cursor, grievance_ids)
+
+    def _delete(self, cursor, grievance_ids):
+        # stay well below SQLite's bound-parameter limit
+        for start in range(0, len(grievance_ids), 500):
+            chunk = grievance_ids[start: start + 500]
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})",
+                chunk,
+            )
+
+    def rebuild(self):
+        self.ensure_index()
+        total = 0
+        batch = []
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            sql = f"INSERT INTO {self.table} (rowid, tracking_id, title, description, user_text) VALUES (%s, %s, %s, %s, %s)"
+            for row in _document_rows():
+                batch.append(row)
+                if len(batch) >= 2000:
+                    cursor.executemany(sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return total
+
+    def match_expression(self, query):
+        # each whitespace chunk becomes a phrase with a prefix on its last token:
+        # 'KER-2025-00 water' -> '"ker 2025 00"* AND "water"*'
+        return " AND ".join('"%s"*' % " ".join(tokens) for tokens in _search_chunks(query))
+
+    def filter(self, queryset, query, rank=True):
+        expr = self.match_expression(query)
+        if not expr:
+            return queryset
+        table = queryset.model._meta.db_table
+        queryset = queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [expr])
+        )
+        if not rank:
+            return queryset
+        weights = ", ".join(str(w) for w in self.weights)
+        queryset = queryset.annotate(search_rank=RawSQL(
+            f"SELECT bm25({self.table}, {weights}) FROM {self.table} "
+            f'WHERE {self.table} MATCH %s AND rowid = "{table}"."id"',
+            [expr],
+        ))
+        # bm25() is lower-is-better
+        return queryset.order_by("search_rank", "-created_at")
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    table = "adminpanel_grievance_search"
+    document_sql = (
+        "setweight(to_tsvector('simple', coalesce(%s, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(%s, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(%s, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(%s, '')), 'C')"
+    )
+
+    def ensure_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "grievance_id bigint PRIMARY KEY, document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)")
+
+    def _upsert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (grievance_id, document) VALUES (%s, {self.document_sql}) "
+            "ON CONFLICT (grievance_id) DO UPDATE SET document = EXCLUDED.document",
+            rows,
+        )
+
+    def index(self, grievance_ids):
+        grievance_ids = list(grievance_ids)
+        if not grievance_ids:
+            return
+        rows = list(_document_rows(grievance_ids))
+        with connection.cursor() as cursor:
+            self._upsert(cursor, rows)
+            found = {row[0] for row in rows}
+            missing = [gid for gid in grievance_ids if gid not in found]
+            if missing:
+                cursor.execute(f"DELETE FROM {self.table} WHERE grievance_id = ANY(%s)", [missing])
+
+    def remove(self, grievance_ids):
+        grievance_ids = list(grievance_ids)
+        if grievance_ids:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.table} WHERE grievance_id = ANY(%s)", [grievance_ids])
+
+    def rebuild(self):
+        self.ensure_index()
+        total = 0
+        batch = []
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+            for row in _document_rows():
+                batch.append(row)
+                if len(batch) >= 2000:
+                    self._upsert(cursor, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self._upsert(cursor, batch)
+                total += len(batch)
+        return total
+
+    def tsquery(self, query):
+        # phrase per chunk, prefix match on the last token: 'ker <-> 2025 <-> 00:*'
+        return " & ".join(
+            " <-> ".join(tokens[:-1] + [tokens[-1] + ":*"]) for tokens in _search_chunks(query)
+        )
+
+    def filter(self, queryset, query, rank=True):
+        tsq = self.tsquery(query)
+        if not tsq:
+            return queryset
+        table = queryset.model._meta.db_table
+        queryset = queryset.filter(id__in=RawSQL(
+            f"SELECT grievance_id FROM {self.table} WHERE document @@ to_tsquery('simple', %s)", [tsq]
+        ))
+        if not rank:
+            return queryset
+        queryset = queryset.annotate(search_rank=RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {self.table} "
+            f'WHERE grievance_id = "{table}"."id"',
+            [tsq],
+        ))
+        return queryset.order_by("-search_rank", "-created_at")
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "ADMINPANEL_SEARCH_BACKEND", None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == "sqlite":
+            _backend = SQLiteFTS5Backend()
+        elif connection.vendor == "postgresql":
+            _backend = PostgresSearchBackend()
+        else:
+            _backend = IcontainsSearchBackend()
+    return _backend
+
+
+def search_grievances(queryset, query, rank=True):
+    """
+    Restrict a Grievance queryset to rows matching `query`.
+    With rank=True the result is ordered by relevance (then newest first).
+    """
+    return get_search_backend().filter(queryset, query, rank=rank)
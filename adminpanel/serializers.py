@@ -1,6 +1,8 @@
 # adminpanel/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.db.models.functions import Length, Substr
 
 from adminpanel.models import (
     Department,
@@ -9,6 +11,8 @@ from adminpanel.models import (
     GrievanceRemark,
     Feedback,
     ChangeLog,
+    SLAPolicy,
+    ExportJob,
 )
 
 User = get_user_model()
@@ -89,8 +93,70 @@ class FeedbackSerializer(serializers.ModelSerializer):
         return value
 
 
+# -----------------------
+# Sparse fieldsets (?fields= / ?expand=)
+# -----------------------
+GRIEVANCE_RELATIONS = ("category", "department", "user", "assigned_officer")
+DEFAULT_PREVIEW_LENGTH = 160
+
+
+def parse_fieldsets(params, allowed):
+    """
+    Read ?fields=a,b and ?expand=x,y from request params.
+
+    Returns (fields, expand): fields is a tuple (None = every field), expand is a set of
+    relation names to render in full (None = all of them, the historical behaviour).
+    Raises serializers.ValidationError for unknown names.
+    """
+    def _split(raw):
+        return [p.strip() for p in str(raw or "").split(",") if p.strip()]
+
+    fields = _split(params.get("fields")) or None
+    expand = set(_split(params.get("expand"))) if "expand" in params else None
+
+    unknown = [f for f in (fields or []) if f not in allowed]
+    if unknown:
+        raise serializers.ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}."})
+    bad_expand = [f for f in (expand or []) if f not in GRIEVANCE_RELATIONS]
+    if bad_expand:
+        raise serializers.ValidationError({"expand": f"Cannot expand: {', '.join(bad_expand)}. Expandable: {', '.join(GRIEVANCE_RELATIONS)}."})
+
+    if fields is not None and expand is None:
+        expand = set()  # sparse requests get compact relation refs unless asked otherwise
+    return (tuple(fields) if fields else None), expand
+
+
+class UserRefSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+
+
+class NamedRefSerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin accepting `fields=` and `expand=` kwargs (see parse_fieldsets).
+    Relations that are kept but not expanded collapse to {id, name} / {id, username}.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        expand = kwargs.pop("expand", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name in GRIEVANCE_RELATIONS:
+                if name in self.fields and name not in expand:
+                    ref = UserRefSerializer if name in ("user", "assigned_officer") else NamedRefSerializer
+                    self.fields[name] = ref(read_only=True)
+
+
 # Grievance list/detail
-class GrievanceListSerializer(serializers.ModelSerializer):
+class GrievanceListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = SimpleUserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     department = DepartmentSerializer(read_only=True)
@@ -110,16 +176,22 @@ class GrievanceListSerializer(serializers.ModelSerializer):
             "assigned_officer",
             "created_at",
             "updated_at",
+            "due_at",
         )
-        read_only_fields = ("tracking_id", "created_at", "updated_at")
+        read_only_fields = ("tracking_id", "created_at", "updated_at", "due_at")
 
 
 class GrievanceDetailSerializer(GrievanceListSerializer):
-    remarks = GrievanceRemarkSerializer(many=True, read_only=True)
+    """
+    Expects an instance from loaders.load_grievance_detail(): remarks are one capped page
+    (`remark_page`), `remarks_next` is the cursor for older remarks.
+    """
+    remarks = GrievanceRemarkSerializer(many=True, read_only=True, source="remark_page")
+    remarks_next = serializers.CharField(read_only=True, allow_null=True)
     feedback = FeedbackSerializer(read_only=True)
 
     class Meta(GrievanceListSerializer.Meta):
-        fields = GrievanceListSerializer.Meta.fields + ("remarks", "feedback")
+        fields = GrievanceListSerializer.Meta.fields + ("remarks", "remarks_next", "feedback")
 
 
 # Grievance create/update - accepts department_id OR department_name
@@ -187,3 +259,165 @@ class ChangeLogSerializer(serializers.ModelSerializer):
         model = ChangeLog
         fields = ("id", "user", "grievance", "action", "before", "after", "timestamp")
         read_only_fields = ("id", "user", "grievance", "action", "before", "after", "timestamp")
+
+
+# SLA policies: global (no scope), per category or per department
+class SLAPolicySerializer(serializers.ModelSerializer):
+    # declared explicitly: the generated unique validators would treat NULL scopes as clashes
+    category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), source="category", required=False, allow_null=True)
+    department_id = serializers.PrimaryKeyRelatedField(queryset=Department.objects.all(), source="department", required=False, allow_null=True)
+    scope = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = SLAPolicy
+        fields = ("id", "scope", "category_id", "department_id", "days", "updated_at")
+        read_only_fields = ("updated_at",)
+
+    def validate(self, attrs):
+        category = attrs.get("category", getattr(self.instance, "category", None))
+        department = attrs.get("department", getattr(self.instance, "department", None))
+        if category and department:
+            raise serializers.ValidationError({"detail": "A policy applies to a category or a department, not both."})
+        clash = SLAPolicy.objects.filter(category=category, department=department)
+        if self.instance is not None:
+            clash = clash.exclude(pk=self.instance.pk)
+        if clash.exists():
+            raise serializers.ValidationError({"detail": "A policy for this scope already exists."})
+        return attrs
+
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            "id", "format", "params", "include", "status", "progress", "total_rows", "rows_written",
+            "bytes_written", "error", "created_by", "created_at", "started_at", "finished_at", "expires_at",
+            "download_url",
+        )
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.STATUS_DONE:
+            return None
+        return reverse("adminpanel:api_export_job_download", args=[obj.pk])
+
+# Fast list rows
+class GrievanceRowSerializer:
+    """
+    Builds grievance list rows straight from .values(), skipping DRF field machinery.
+
+    With no fields/expand the output matches GrievanceListSerializer exactly; sparse
+    requests only select (and join) the columns they need. `preview_length` adds a
+    `description_preview` truncated in the database.
+
+        row_serializer = GrievanceRowSerializer(fields, expand, preview_length)
+        rows = row_serializer.to_rows(row_serializer.queryset(qs)[:100])
+    """
+    fields_allowed = GrievanceListSerializer.Meta.fields + ("description_preview",)
+
+    _datetime = serializers.DateTimeField()
+
+    def __init__(self, fields=None, expand=None, preview_length=None):
+        self.fields = tuple(fields) if fields else GrievanceListSerializer.Meta.fields
+        if preview_length and "description_preview" not in self.fields:
+            self.fields = self.fields + ("description_preview",)
+        if "description_preview" in self.fields and not preview_length:
+            preview_length = DEFAULT_PREVIEW_LENGTH
+        self.expand = set(GRIEVANCE_RELATIONS) if expand is None else set(expand)
+        self.preview_length = preview_length
+
+    def _columns(self):
+        # id/created_at are always selected: keyset pagination needs them
+        cols = ["id", "created_at"]
+        for name in self.fields:
+            if name in ("user", "assigned_officer"):
+                cols += [f"{name}_id", f"{name}__username"]
+                if name in self.expand:
+                    cols += [f"{name}__first_name", f"{name}__last_name", f"{name}__email"]
+            elif name == "category":
+                cols += ["category_id", "category__name"]
+                if name in self.expand:
+                    cols += ["category__department_id", "category__department__name", "category__department__code"]
+            elif name == "department":
+                cols += ["department_id", "department__name"]
+                if name in self.expand:
+                    cols += ["department__code"]
+            elif name != "description_preview":
+                cols.append(name)
+        return list(dict.fromkeys(cols))
+
+    def queryset(self, qs):
+        if self.preview_length:
+            qs = qs.annotate(
+                _preview=Substr("description", 1, self.preview_length),
+                _description_length=Length("description"),
+            )
+            return qs.values(*self._columns(), "_preview", "_description_length")
+        return qs.values(*self._columns())
+
+    def _user(self, row, name):
+        pk = row[f"{name}_id"]
+        if pk is None:
+            return None
+        if name not in self.expand:
+            return {"id": pk, "username": row[f"{name}__username"]}
+        first, last = row[f"{name}__first_name"], row[f"{name}__last_name"]
+        return {
+            "id": pk,
+            "username": row[f"{name}__username"],
+            "full_name": f"{first} {last}".strip(),
+            "first_name": first,
+            "last_name": last,
+            "email": row[f"{name}__email"],
+        }
+
+    def _category(self, row):
+        pk = row["category_id"]
+        if pk is None:
+            return None
+        if "category" not in self.expand:
+            return {"id": pk, "name": row["category__name"]}
+        dept_id = row["category__department_id"]
+        if dept_id is None:
+            # CategorySerializer skips department_name when there is no department
+            return {"id": pk, "name": row["category__name"], "department": None}
+        return {
+            "id": pk,
+            "name": row["category__name"],
+            "department": {"id": dept_id, "name": row["category__department__name"], "code": row["category__department__code"]},
+            "department_name": row["category__department__name"],
+        }
+
+    def _department(self, row):
+        pk = row["department_id"]
+        if pk is None:
+            return None
+        if "department" not in self.expand:
+            return {"id": pk, "name": row["department__name"]}
+        return {"id": pk, "name": row["department__name"], "code": row["department__code"]}
+
+    def to_row(self, row):
+        out = {}
+        for name in self.fields:
+            if name in ("user", "assigned_officer"):
+                out[name] = self._user(row, name)
+            elif name == "category":
+                out[name] = self._category(row)
+            elif name == "department":
+                out[name] = self._department(row)
+            elif name in ("created_at", "updated_at", "due_at"):
+                out[name] = self._datetime.to_representation(row[name])
+            elif name == "description_preview":
+                preview = row["_preview"] or ""
+                out[name] = preview + "…" if (row["_description_length"] or 0) > self.preview_length else preview
+            else:
+                out[name] = row[name]
+        return out
+
+    def to_rows(self, rows):
+        return [self.to_row(row) for row in rows]
@@ -0,0 +1,189 @@
+# adminpanel/signals.py
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import Category, ChangeLog, Department, Grievance, GrievanceLifecycle, SLAPolicy
+from .search import get_search_backend
+from . import cache, changes, lifecycle, rollups, sla, suggest, workload
+
+# user columns copied into the search document
+USER_SEARCH_FIELDS = {"username", "first_name", "last_name"}
+# grievance columns in the search document ("user" for the user_text it pulls in)
+GRIEVANCE_SEARCH_FIELDS = {"title", "description", "tracking_id", "user", "user_id"}
+# stored grievance columns the rollup and workload tables are derived from (one read per save)
+SNAPSHOT_FIELDS = tuple(dict.fromkeys(rollups.TRACKED_FIELDS + workload.TRACKED_FIELDS))
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, app_config=None, **kwargs):
+    if app_config is not None and app_config.label == "adminpanel":
+        get_search_backend().ensure_index()
+
+
+@receiver(post_save, sender=Grievance)
+def index_grievance(sender, instance, created, update_fields=None, **kwargs):
+    if not created and not _touches(update_fields, GRIEVANCE_SEARCH_FIELDS):
+        return  # e.g. a status change leaves the document as it was
+    get_search_backend().index([instance.pk])
+
+
+@receiver(post_save, sender=Grievance)
+def index_grievance_title(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and "title" not in update_fields:
+        return
+    suggest.index_titles([instance])
+
+
+@receiver(post_delete, sender=Grievance)
+def unindex_grievance(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+def _touches(update_fields, tracked):
+    return update_fields is None or bool(set(update_fields) & tracked)
+
+
+@receiver(pre_save, sender=Grievance)
+def snapshot_grievance(sender, instance, update_fields=None, **kwargs):
+    # remember the stored row so post_save can move its rollup / workload contribution
+    if instance.pk and (
+        _touches(update_fields, rollups.TRACKED_UPDATE_FIELDS) or _touches(update_fields, workload.TRACKED_UPDATE_FIELDS)
+    ):
+        instance._stored_before = rollups.stored_snapshot(instance.pk, SNAPSHOT_FIELDS)
+
+
+@receiver(post_save, sender=Grievance)
+def update_grievance_rollup(sender, instance, created, update_fields=None, **kwargs):
+    if not created and not _touches(update_fields, rollups.TRACKED_UPDATE_FIELDS):
+        return
+    before = None if created else instance.__dict__.get("_stored_before")
+    # a save leaves the lifecycle row alone: the grievance keeps its resolution time
+    rollups.record_change(before, rollups.snapshot(instance, before["resolution_seconds"] if before else None))
+
+
+@receiver(post_save, sender=Grievance)
+def update_officer_workload(sender, instance, created, update_fields=None, **kwargs):
+    if not created and not _touches(update_fields, workload.TRACKED_UPDATE_FIELDS):
+        return
+    before = None if created else instance.__dict__.get("_stored_before")
+    workload.record_change(before, workload.snapshot(instance))
+
+
+@receiver(pre_delete, sender=Grievance)
+def snapshot_deleted_grievance(sender, instance, **kwargs):
+    # the stored row, not the (possibly stale) instance, is what the derived tables counted;
+    # the lifecycle row is deleted with the grievance, before post_delete
+    instance._stored_before = rollups.stored_snapshot(instance.pk, SNAPSHOT_FIELDS)
+
+
+@receiver(post_delete, sender=Grievance)
+def remove_grievance_rollup(sender, instance, **kwargs):
+    before = instance.__dict__.get("_stored_before")
+    if before:
+        rollups.record_change(before, None)
+
+
+@receiver(post_delete, sender=Grievance)
+def remove_officer_workload(sender, instance, **kwargs):
+    before = instance.__dict__.get("_stored_before")
+    if before:
+        workload.record_change(before, None)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_user_grievances(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not (set(update_fields) & USER_SEARCH_FIELDS):
+        return  # e.g. last_login bumps on every sign-in
+    ids = list(Grievance.objects.filter(user=instance).values_list("id", flat=True))
+    get_search_backend().index(ids)
+
+
+# cache invalidation: bump the namespace(s) whose cached reads a change can affect
+@receiver([post_save, post_delete], sender=Grievance)
+def invalidate_grievance_cache(sender, **kwargs):
+    cache.bump_on_commit("grievances")
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Department)
+def invalidate_category_cache(sender, **kwargs):
+    cache.bump_on_commit("categories")
+
+
+@receiver(post_save, sender=Grievance)
+def start_grievance_lifecycle(sender, instance, created, **kwargs):
+    if created:
+        row = lifecycle.start(instance)
+        GrievanceLifecycle.objects.bulk_create([row], ignore_conflicts=True)
+        rollups.record_resolutions([(instance.pk, None, row.resolution_seconds)])  # created resolved
+
+
+@receiver(post_save, sender=ChangeLog)
+def apply_changelog_to_lifecycle(sender, instance, created, **kwargs):
+    if not created or instance.action not in lifecycle.ACTIONS:
+        return
+    lifecycle.record(instance)
+    cache.bump_on_commit("grievances")  # lifecycle analytics are cached with the grievance namespace
+
+
+@receiver(pre_save, sender=SLAPolicy)
+def snapshot_sla_policy(sender, instance, **kwargs):
+    if instance.pk:
+        instance._days_before = SLAPolicy.objects.filter(pk=instance.pk).values_list("days", flat=True).first()
+
+
+def _apply_sla_policy(policy):
+    # deadlines of open grievances in the policy's scope follow the policy
+    cache.bump_on_commit("sla")
+    if sla.refresh_deadlines(policy.category_id, policy.department_id):
+        cache.bump_on_commit("grievances")  # refresh_deadlines() writes with update()
+
+
+@receiver(post_save, sender=SLAPolicy)
+def save_sla_policy(sender, instance, created, **kwargs):
+    if created or instance.__dict__.get("_days_before") != instance.days:
+        _apply_sla_policy(instance)
+
+
+@receiver(post_delete, sender=SLAPolicy)
+def delete_sla_policy(sender, instance, **kwargs):
+    _apply_sla_policy(instance)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_user_cache(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return  # sign-ins touch nothing we cache
+    cache.bump_on_commit("users")
+
+
+# change feed: one entry per grievance write (see changes.py)
+@receiver(post_save, sender=Grievance)
+def record_grievance_upsert(sender, instance, **kwargs):
+    changes.record([instance.pk])
+
+
+@receiver(post_delete, sender=Grievance)
+def record_grievance_delete(sender, instance, **kwargs):
+    changes.record([instance.pk], changes.DELETE)
+
+
+# deleting a category, department or user sets the grievances' reference to NULL
+# without saving them
+@receiver(pre_delete, sender=Category)
+def record_category_delete(sender, instance, **kwargs):
+    changes.record_queryset(Grievance.objects.filter(category=instance))
+
+
+@receiver(pre_delete, sender=Department)
+def record_department_delete(sender, instance, **kwargs):
+    changes.record_queryset(Grievance.objects.filter(department=instance))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def record_user_delete(sender, instance, **kwargs):
+    changes.record_queryset(Grievance.objects.filter(Q(user=instance) | Q(assigned_officer=instance)))
@@ -0,0 +1,155 @@
+# adminpanel/sla.py
+"""
+SLA deadlines: which policy applies to a grievance, Grievance.due_at maintenance and
+the breach scan.
+
+due_at = created_at + the days of the most specific SLAPolicy (category, department,
+global, then ADMINPANEL_SLA_DEFAULT_DAYS). Grievance.save() sets it; saving or deleting
+a policy re-derives it for the open grievances in that policy's scope (see signals.py).
+
+Breaches are then read per open status as one range on the (status, due_at) index:
+
+    status = %s AND due_at < now            (everything overdue)
+    status = %s AND due_at >= since AND due_at < now   (breached since the last run)
+
+so the cost follows the number of breached rows, not the size of the table.
+
+Settings:
+  ADMINPANEL_SLA_DEFAULT_DAYS  (default 7)  deadline when no policy applies; 0 disables it
+"""
+import datetime
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from adminpanel import cache, changes
+from adminpanel.models import ChangeLog, Grievance, SLAPolicy
+
+BREACH_ACTION = "sla_breached"
+SECONDS_PER_DAY = 86400
+# a new grievance's due_at is derived as its save starts, just before auto_now_add sets
+# created_at: deadlines this close to created_at + days are current
+DEADLINE_SLACK = datetime.timedelta(seconds=1)
+
+
+def default_days():
+    return getattr(settings, "ADMINPANEL_SLA_DEFAULT_DAYS", 7)
+
+
+def policy_table():
+    """{"global": days or None, "categories": {id: days}, "departments": {id: days}} (cached)."""
+    def compute():
+        table = {"global": None, "categories": {}, "departments": {}}
+        for category_id, department_id, days in SLAPolicy.objects.values_list("category_id", "department_id", "days"):
+            if category_id:
+                table["categories"][category_id] = days
+            elif department_id:
+                table["departments"][department_id] = days
+            else:
+                table["global"] = days
+        return table
+    return cache.get_or_compute("sla_policies", ("sla",), compute)
+
+
+def global_days():
+    """Days of the global policy, or the settings default when there is none."""
+    days = policy_table()["global"]
+    return default_days() if days is None else days
+
+
+def days_for(category_id, department_id):
+    """SLA days for a category/department pair (0 = no deadline)."""
+    table = policy_table()
+    if category_id in table["categories"]:
+        return table["categories"][category_id]
+    if department_id in table["departments"]:
+        return table["departments"][department_id]
+    return global_days()
+
+
+def deadline_for(created_at, category_id, department_id):
+    days = days_for(category_id, department_id)
+    return created_at + datetime.timedelta(days=days) if days else None
+
+
+def refresh_deadlines(category_id=None, department_id=None, open_only=True):
+    """
+    Re-derive due_at for the grievances a policy can apply to (every grievance for the
+    global policy): one set-based UPDATE per distinct (category, department) pair, of
+    the rows whose deadline actually moves. Returns the number of rows updated.
+    """
+    qs = Grievance.objects.order_by()
+    if open_only:
+        qs = qs.filter(status__in=Grievance.OPEN_STATUSES)
+    if category_id is not None:
+        qs = qs.filter(category_id=category_id)
+    if department_id is not None:
+        qs = qs.filter(department_id=department_id)
+
+    now = timezone.now()
+    updated = 0
+    for pair_category, pair_department in qs.values_list("category_id", "department_id").distinct():
+        days = days_for(pair_category, pair_department)
+        pair = qs.filter(category_id=pair_category, department_id=pair_department)
+        # only rows whose deadline moves (a global change leaves pairs under a more
+        # specific policy alone): nothing else is rewritten or sent to the change feed
+        if days:
+            deadline = datetime.timedelta(days=days)
+            due_at = F("created_at") + deadline
+            current = (F("created_at") + (deadline - DEADLINE_SLACK), F("created_at") + (deadline + DEADLINE_SLACK))
+            stale = pair.exclude(due_at__range=current)
+        else:
+            due_at = None
+            stale = pair.filter(due_at__isnull=False)
+        with transaction.atomic():
+            changes.record_queryset(stale)
+            # updated_at moves with due_at: list/detail ETags are derived from it
+            updated += stale.update(due_at=due_at, updated_at=now)
+    return updated
+
+
+def overdue_querysets(now=None, since=None, statuses=Grievance.OPEN_STATUSES):
+    """
+    {status: queryset} of grievances past their deadline (optionally only those that
+    became due at or after `since`), each one range on (status, due_at), oldest deadline first.
+    """
+    now = now or timezone.now()
+    out = {}
+    for status in statuses:
+        qs = Grievance.objects.filter(status=status, due_at__lt=now)
+        if since is not None:
+            qs = qs.filter(due_at__gte=since)
+        out[status] = qs.order_by("due_at", "id")
+    return out
+
+
+def overdue_count(now=None, statuses=Grievance.OPEN_STATUSES):
+    return sum(qs.count() for qs in overdue_querysets(now, statuses=statuses).values())
+
+
+def merge_overdue(row_querysets, limit):
+    """The `limit` most overdue rows across per-status .values() querysets (each already in due_at order)."""
+    pages = [list(qs[:limit]) for qs in row_querysets]
+    return list(heapq.merge(*pages, key=lambda row: (row["due_at"], row["id"])))[:limit]
+
+
+def overdue_days(due_at, now):
+    return round((now - due_at).total_seconds() / SECONDS_PER_DAY, 2)
+
+
+def record_breaches(grievance_ids, now=None):
+    """Log one sla_breached ChangeLog entry per grievance (skipping those already logged); returns the new count."""
+    grievance_ids = list(grievance_ids)
+    logged = set(
+        ChangeLog.objects.filter(action=BREACH_ACTION, grievance_id__in=grievance_ids).values_list("grievance_id", flat=True)
+    )
+    now = now or timezone.now()
+    entries = [
+        ChangeLog(grievance_id=pk, action=BREACH_ACTION, after=now.isoformat())
+        for pk in grievance_ids if pk not in logged
+    ]
+    ChangeLog.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
@@ -0,0 +1,132 @@
+# adminpanel/suggest.py
+"""
+Typeahead lookups for call-centre staff: tracking-ID prefixes and title-word prefixes.
+
+Both paths are index range scans (tracking_id's unique index, and the (token, -grievance)
+index on GrievanceSuggestToken) followed by a primary-key fetch of at most `limit` rows,
+so latency does not grow with the size of the grievance table.
+"""
+import re
+import unicodedata
+
+from django.db.models import Exists, OuterRef
+
+from adminpanel import bulk
+from adminpanel.models import Grievance, GrievanceSuggestToken
+
+MIN_PREFIX = 2
+MAX_TOKEN_LENGTH = 64
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+# "KER", "ker-20", "KER-2026-0001": a bare prefix is a tracking ID being typed too
+_TRACKING_RE = re.compile(r"^[A-Za-z]{2,}(?:-\d*)*$")
+
+
+def normalize_tokens(text):
+    """Lowercase, strip diacritics and split into distinct alphanumeric tokens."""
+    folded = unicodedata.normalize("NFKD", str(text or ""))
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch)).lower()
+    seen = []
+    for token in _TOKEN_RE.findall(folded):
+        token = token[:MAX_TOKEN_LENGTH]
+        if len(token) >= MIN_PREFIX and token not in seen:
+            seen.append(token)
+    return seen
+
+
+def _prefix_range(prefix):
+    """(low, high) bounds such that low <= value < high selects every value starting with prefix."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def index_titles(grievances, new=False):
+    """Replace suggest tokens for the given (id, title) pairs (new=True: they have none yet)."""
+    pairs = [(g.pk, g.title) if isinstance(g, Grievance) else g for g in grievances]
+    if not pairs:
+        return
+    if not new:
+        GrievanceSuggestToken.objects.filter(grievance_id__in=[pk for pk, _ in pairs]).delete()
+    _insert(pairs)
+
+
+def rebuild(batch_size=2000):
+    """Drop and rebuild every suggest token. Returns the number of grievances indexed."""
+    GrievanceSuggestToken.objects.all().delete()
+    total = 0
+    batch = []
+    for pair in Grievance.objects.order_by("id").values_list("id", "title").iterator(chunk_size=batch_size):
+        batch.append(pair)
+        if len(batch) >= batch_size:
+            _insert(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+        total += len(batch)
+    return total
+
+
+def _insert(pairs):
+    bulk.insert_rows(
+        GrievanceSuggestToken, ("grievance", "token"),
+        [(pk, token) for pk, title in pairs for token in normalize_tokens(title)],
+    )
+
+
+def _tracking_matches(query, limit):
+    low, high = _prefix_range(query.upper())
+    return list(
+        Grievance.objects.filter(tracking_id__gte=low, tracking_id__lt=high)
+        .order_by("tracking_id")
+        .values_list("id", flat=True)[:limit]
+    )
+
+
+def _title_matches(tokens, limit):
+    # the last word is still being typed: prefix match; earlier words must match exactly
+    *complete, partial = tokens
+    low, high = _prefix_range(partial)
+    qs = GrievanceSuggestToken.objects.filter(token__gte=low, token__lt=high)
+    for token in complete:
+        # correlated EXISTS keeps the prefix range scan as the driving index (in index order,
+        # so no sort) and probes (token, grievance) per candidate until `limit` rows are found
+        qs = qs.filter(Exists(GrievanceSuggestToken.objects.filter(token=token, grievance_id=OuterRef("grievance_id"))))
+    ids = []
+    # different tokens sharing the prefix can point at the same grievance: over-fetch and dedupe
+    for gid in qs.order_by("token", "-grievance_id").values_list("grievance_id", flat=True)[: limit * 4]:
+        if gid not in ids:
+            ids.append(gid)
+            if len(ids) >= limit:
+                break
+    return ids
+
+
+def suggest_grievances(query, limit=DEFAULT_LIMIT):
+    """
+    Return up to `limit` dicts of {id, tracking_id, title, status}; tracking-ID prefix
+    matches come first, then title-word prefix matches.
+    """
+    query = str(query or "").strip()
+    limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+    if len(query) < MIN_PREFIX:
+        return []
+
+    ids = []
+    if _TRACKING_RE.match(query):
+        ids = _tracking_matches(query, limit)
+    if len(ids) < limit:
+        tokens = normalize_tokens(query)
+        if tokens:
+            for gid in _title_matches(tokens, limit):
+                if gid not in ids:
+                    ids.append(gid)
+                    if len(ids) >= limit:
+                        break
+    if not ids:
+        return []
+
+    rows = Grievance.objects.filter(id__in=ids).values("id", "tracking_id", "title", "status")
+    by_id = {row["id"]: row for row in rows}
+    return [by_id[gid] for gid in ids if gid in by_id]
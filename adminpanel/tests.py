@@ -1,3 +1,1372 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers as drf_serializers
+from rest_framework.test import APIClient
+
+from adminpanel import (
+    cache as admin_cache, changes, columnar, exportjobs, exports, lifecycle, resolution, retriage, rollups, search,
+    serializers, sla, tracking, workload,
+)
+from adminpanel.counting import count_grievances
+from adminpanel.filters import GrievanceFilterSpec
+from adminpanel.loaders import DETAIL_QUERY_BUDGET
+from adminpanel.models import (
+    Category, ChangeLog, Department, ExportJob, Feedback, Grievance, GrievanceChange, GrievanceDailyStats,
+    GrievanceLifecycle, GrievanceRemark, OfficerWorkload, SLAPolicy, TrackingSequence,
+)
+
+try:
+    import numpy as np
+except ImportError:  # the columnar snapshot tests are skipped without it
+    np = None
+
+STATUS_CYCLE = ("new", "in_progress", "resolved", "escalated")
+
+
+def create_fixture(cls, grievances=12):
+    """An admin, an officer, a citizen, one department/category and `grievances` rows cycling statuses."""
+    User = get_user_model()
+    cls.admin = User.objects.create_user("admin", password="x", is_staff=True, role="admin")
+    cls.officer = User.objects.create_user("officer1", password="x", role="officer")
+    cls.citizen = User.objects.create_user("citizen1", password="x", role="citizen")
+    cls.department = Department.objects.create(name="Water", code="water")
+    cls.category = Category.objects.create(name="Leak", department=cls.department)
+    cls.grievances = [
+        Grievance.objects.create(
+            title=f"Pipe leak {i}", description="Water leaking near the road", category=cls.category,
+            department=cls.department, user=cls.citizen, status=STATUS_CYCLE[i % 4],
+            assigned_officer=cls.officer if i % 2 else None,
+        )
+        for i in range(grievances)
+    ]
+
+
+def rollup_state():
+    """Rollup totals per key (rows are additive: a key may span several rows; empty keys dropped)."""
+    totals = {}
+    rows = GrievanceDailyStats.objects.values_list(
+        "day", "status", "category_id", "department_id", "count", "resolved_count", "resolution_seconds",
+    )
+    for day, status, category_id, department_id, count, resolved, seconds in rows:
+        key = (day, status, category_id, department_id)
+        total = totals.setdefault(key, [0, 0, 0])
+        total[0] += count
+        total[1] += resolved
+        total[2] += seconds
+    return {key: total for key, total in totals.items() if any(total)}
+
+
+def workload_state():
+    """Open counts per officer (officers with nothing open dropped, as a rebuild omits them)."""
+    rows = OfficerWorkload.objects.order_by("pk").values_list(
+        "pk", "new_count", "in_progress_count", "escalated_count", "oldest_open_at",
+    )
+    return [row for row in rows if any(row[1:])]
+
+
+class AdminPanelTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_fixture(cls)
+
+    def setUp(self):
+        admin_cache.backend().clear()  # cached entries outlive each test's rolled-back rows
+        self.client.force_login(self.admin)
+
+
+class AdminPanelTransactionTestCase(TransactionTestCase):
+    """For behaviour that depends on real commits (on_commit hooks, other connections)."""
+
+    def setUp(self):
+        create_fixture(self)
+        admin_cache.backend().clear()
+        self.client.force_login(self.admin)
+
+
+class CountCacheTests(AdminPanelTestCase):
+    def test_count_is_invalidated_by_grievance_writes(self):
+        spec = GrievanceFilterSpec.from_params({"status": "new"})
+        self.assertEqual(count_grievances(spec.queryset(), spec), (3, False))
+        with self.captureOnCommitCallbacks(execute=True):
+            Grievance.objects.create(title="Another", description="d", status="new")
+        self.assertEqual(count_grievances(spec.queryset(), spec), (4, False))
+
+    def test_list_reports_count(self):
+        response = self.client.get("/adminpanel/api/grievances/", {"status": "resolved"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 3)
+
+
+class CursorPaginationTests(AdminPanelTestCase):
+    def pages(self, **params):
+        cursor, ids, pages = None, [], []
+        while True:
+            query = {"pagination": "cursor", "limit": 5, **params}
+            if cursor:
+                query["cursor"] = cursor
+            payload = self.client.get("/adminpanel/api/grievances/", query).json()
+            pages.append(payload)
+            ids += [row["id"] for row in payload["results"]]
+            cursor = payload["next"]
+            if not cursor:
+                return ids, pages
+
+    def test_walks_every_row_once_in_keyset_order(self):
+        expected = list(Grievance.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        ids, pages = self.pages()
+        self.assertEqual(ids, expected)
+        self.assertEqual([len(page["results"]) for page in pages], [5, 5, 2])
+        self.assertIsNone(pages[0]["prev"])
+        self.assertNotIn("count", pages[0])
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        Grievance.objects.update(created_at=timezone.now())
+        ids, _ = self.pages()
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), len(self.grievances))
+
+    def test_prev_cursor_returns_the_previous_page(self):
+        _, pages = self.pages()
+        previous = self.client.get("/adminpanel/api/grievances/", {"limit": 5, "cursor": pages[1]["prev"]}).json()
+        self.assertEqual([row["id"] for row in previous["results"]], [row["id"] for row in pages[0]["results"]])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/adminpanel/api/grievances/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SuggestTests(AdminPanelTestCase):
+    def suggest(self, q, **params):
+        response = self.client.get("/adminpanel/api/grievances/suggest/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_bare_tracking_prefix_matches(self):
+        for q in ("KER", "ke", "KER-", f"KER-{timezone.now().year}"):
+            results = self.suggest(q, limit=5)
+            self.assertEqual(len(results), 5, q)
+            self.assertTrue(all(row["tracking_id"].startswith("KER-") for row in results))
+
+    def test_tracking_id_prefix_is_a_range_in_id_order(self):
+        tracking_id = self.grievances[3].tracking_id
+        self.assertEqual([row["tracking_id"] for row in self.suggest(tracking_id)], [tracking_id])
+
+    def test_title_word_prefixes(self):
+        results = self.suggest("pipe lea")
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(row["title"].startswith("Pipe leak") for row in results))
+        self.assertEqual(self.suggest("drain"), [])
+        self.assertEqual(self.suggest("p"), [])
+
+    def test_title_edits_reindex(self):
+        grievance = self.grievances[0]
+        grievance.title = "Broken streetlight"
+        grievance.save()
+        self.assertEqual([row["id"] for row in self.suggest("streetl")], [grievance.pk])
+
+
+class SearchBackendTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.backend = search.get_search_backend()
+        self.assertIsInstance(self.backend, search.SQLiteFTS5Backend)
+
+    def ids(self, query, backend=None):
+        return list((backend or self.backend).filter(Grievance.objects.all(), query).values_list("id", flat=True))
+
+    def test_fts_matches_prefixes_and_ranks_title_hits_first(self):
+        in_description = Grievance.objects.create(title="Road damage", description="Sewage overflow nearby")
+        in_title = Grievance.objects.create(title="Sewage overflow", description="Near the market")
+        self.assertEqual(self.ids("sewa"), [in_title.pk, in_description.pk])
+        self.assertEqual(self.ids("sewage market"), [in_title.pk])
+        tracking_id = self.grievances[3].tracking_id
+        self.assertEqual(self.ids(tracking_id), [self.grievances[3].pk])
+
+    def test_icontains_fallback_searches_the_same_columns(self):
+        fallback = search.IcontainsSearchBackend()
+        expected = sorted(g.pk for g in self.grievances if "leak 1" in g.title.lower())  # 1, 10, 11
+        self.assertEqual(sorted(self.ids("leak 1", fallback)), expected)
+        self.assertEqual(len(self.ids("citizen1", fallback)), len(self.grievances))
+        self.assertEqual(self.ids("", fallback), list(Grievance.objects.values_list("id", flat=True)))
+
+    def test_renaming_a_user_reindexes_their_grievances(self):
+        self.assertEqual(self.ids("zebulon"), [])
+        self.citizen.first_name = "Zebulon"
+        self.citizen.save(update_fields=["first_name"])
+        self.assertEqual(sorted(self.ids("zebulon")), sorted(g.pk for g in self.grievances))
+
+    def test_only_document_fields_reindex_a_grievance(self):
+        grievance = self.grievances[0]
+        with mock.patch.object(self.backend, "index") as index:
+            grievance.status = "resolved"
+            grievance.save(update_fields=["status"])
+            index.assert_not_called()
+            grievance.title = "Burst main"
+            grievance.save(update_fields=["title"])
+            index.assert_called_once_with([grievance.pk])
+
+
+class RowSerializerTests(AdminPanelTestCase):
+    url = "/adminpanel/api/grievances/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.citizen.first_name, cls.citizen.last_name, cls.citizen.email = "Asha", "Nair", "asha@example.com"
+        cls.citizen.save()
+        Category.objects.create(name="Orphan")  # no department
+        Grievance.objects.create(
+            title="Streetlight out", description="x" * 300, category=Category.objects.get(name="Orphan"),
+        )
+
+    def both(self, fields=None, expand=None):
+        qs = Grievance.objects.order_by("-created_at", "-id")
+        row_serializer = serializers.GrievanceRowSerializer(fields, expand)
+        rows = row_serializer.to_rows(row_serializer.queryset(qs))
+        kwargs = {"fields": fields, "expand": expand} if fields or expand is not None else {}
+        data = serializers.GrievanceListSerializer(qs, many=True, **kwargs).data
+        return json.loads(json.dumps(rows)), json.loads(json.dumps(data))
+
+    def test_rows_match_the_model_serializer(self):
+        rows, data = self.both()
+        self.assertEqual(rows, data)
+        self.assertEqual(rows[0]["category"], {"id": rows[0]["category"]["id"], "name": "Orphan", "department": None})
+        self.assertIsNone(rows[0]["department"])
+
+    def test_sparse_rows_match_the_model_serializer(self):
+        sparse = ((("id", "title", "category", "user"), {"user"}), (("id", "assigned_officer", "due_at"), set()))
+        for fields, expand in sparse:
+            rows, data = self.both(fields, expand)
+            self.assertEqual(rows, data)
+            self.assertEqual(list(rows[0]), list(fields))
+
+    def test_unknown_fields_and_expansions_are_rejected(self):
+        response = self.client.get(self.url, {"fields": "id,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.json()["fields"])
+        response = self.client.get(self.url, {"expand": "remarks"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("remarks", response.json()["expand"])
+
+    def test_description_preview_is_truncated(self):
+        params = {"fields": "id,description_preview", "description_preview": 20}
+        results = self.client.get(self.url, params).json()["results"]
+        previews = {row["id"]: row["description_preview"] for row in results}
+        long_one = Grievance.objects.get(title="Streetlight out")
+        self.assertEqual(previews[long_one.pk], "x" * 20 + "…")
+        self.assertEqual(previews[self.grievances[0].pk], "Water leaking near t" + "…")
+
+        results = self.client.get(self.url, {"fields": "id,description_preview"}).json()["results"]
+        previews = {row["id"]: row["description_preview"] for row in results}
+        self.assertEqual(previews[long_one.pk], "x" * serializers.DEFAULT_PREVIEW_LENGTH + "…")
+        self.assertEqual(previews[self.grievances[0].pk], "Water leaking near the road")
+
+
+class QueryPlanTests(AdminPanelTestCase):
+    """The list, filter and overdue queries walk the composite indexes (read from EXPLAIN)."""
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")  # tiny tables: make the planner show its index choice
+
+    def assertUsesIndex(self, qs, index):
+        plan = qs.explain()
+        self.assertIn(index, plan, plan)
+
+    def list_query(self, **params):
+        spec = GrievanceFilterSpec.from_params(params)
+        return spec.queryset().order_by("-created_at", "-id")[:100]
+
+    def test_list_filters_use_column_created_indexes(self):
+        week = {"date_from": "2020-01-01", "date_to": timezone.localdate().isoformat()}
+        shapes = [
+            ({"status": "new"}, "grv_status_created_idx"),
+            ({"status": "new", **week}, "grv_status_created_idx"),
+            ({"assigned_officer": str(self.officer.pk)}, "grv_officer_created_idx"),
+            ({"assigned_officer": str(self.officer.pk), **week}, "grv_officer_created_idx"),
+            ({"category": str(self.category.pk)}, "grv_category_created_idx"),
+            ({"department": str(self.department.pk)}, "grv_department_created_idx"),
+            ({"user": str(self.citizen.pk)}, "grv_user_created_idx"),
+        ]
+        for params, index in shapes:
+            with self.subTest(params=params):
+                self.assertUsesIndex(self.list_query(**params), index)
+
+    def test_unfiltered_list_walks_created_at(self):
+        plan = self.list_query().explain()
+        self.assertIn("created_at", plan, plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_overdue_queries_use_status_due_index(self):
+        for status, qs in sla.overdue_querysets(timezone.now()).items():
+            with self.subTest(status=status):
+                self.assertUsesIndex(qs[:100], "grv_status_due_idx")
+
+
+class DetailQueryBudgetTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        # no session lookups: only the view's own queries are counted
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.grievance = self.grievances[1]  # has an officer and a category
+        for i in range(30):
+            GrievanceRemark.objects.create(grievance=self.grievance, officer=self.officer, remark=f"Remark {i}")
+        Feedback.objects.create(grievance=self.grievance, rating=4, comments="Fixed")
+        self.url = f"/adminpanel/api/grievances/{self.grievance.pk}/"
+
+    def test_detail_get_stays_within_budget(self):
+        with self.assertNumQueries(DETAIL_QUERY_BUDGET):
+            response = self.client.get(self.url, {"remarks_limit": 10})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["remarks"]), 10)
+        self.assertEqual(data["remarks"][-1]["remark"], "Remark 29")
+        self.assertIsNotNone(data["remarks_next"])
+        self.assertEqual(data["feedback"]["rating"], 4)
+        self.assertEqual(data["assigned_officer"]["username"], "officer1")
+
+    def test_not_modified_skips_the_remarks_query(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(DETAIL_QUERY_BUDGET - 1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class FilterSpecTests(AdminPanelTestCase):
+    def test_equivalent_params_share_a_signature(self):
+        a = GrievanceFilterSpec.from_params({"status": " NEW ", "assigned_to": "3", "search": "Pipe   LEAK"})
+        b = GrievanceFilterSpec.from_params({"search": "pipe leak", "assigned_officer": "3", "status": "new", "user": ""})
+        self.assertEqual(a.signature, b.signature)
+        self.assertEqual(a.as_dict(), {"status": "new", "assigned_officer": 3, "search": "pipe leak"})
+
+    def test_different_filters_differ(self):
+        signatures = {
+            GrievanceFilterSpec.from_params(params).signature
+            for params in ({}, {"status": "new"}, {"status": "resolved"}, {"category": "1"}, {"category": "leak"},
+                           {"date_from": "2024-01-01"}, {"date_to": "2024-01-01"})
+        }
+        self.assertEqual(len(signatures), 7)
+
+    def test_invalid_params_raise_per_field_errors(self):
+        with self.assertRaises(drf_serializers.ValidationError) as ctx:
+            GrievanceFilterSpec.from_params({"status": "bogus", "user": "abc", "date_from": "01/02/2024"})
+        self.assertEqual(set(ctx.exception.detail), {"status", "user", "date_from"})
+        response = self.client.get("/adminpanel/api/grievances/", {"status": "bogus"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cheapness(self):
+        self.assertTrue(GrievanceFilterSpec.from_params({"status": "new", "user": "1"}).is_cheap)
+        self.assertFalse(GrievanceFilterSpec.from_params({"search": "leak"}).is_cheap)
+        self.assertFalse(GrievanceFilterSpec.from_params({"category": "leak"}).is_cheap)
+
+    def test_list_and_export_apply_the_same_filters(self):
+        params = {"status": "in_progress", "assigned_officer": str(self.officer.pk)}
+        listed = {row["id"] for row in self.client.get("/adminpanel/api/grievances/", params).json()["results"]}
+        response = self.client.get("/adminpanel/api/export/grievances/", {**params, "format": "ndjson"})
+        exported = {json.loads(line)["id"] for line in b"".join(response.streaming_content).splitlines()}
+        self.assertEqual(listed, exported)
+        self.assertEqual(len(listed), 3)
+
+
+class ConditionalGetTests(AdminPanelTestCase):
+    list_url = "/adminpanel/api/grievances/"
+
+    def revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_list_not_modified_until_a_row_under_the_filter_changes(self):
+        first = self.client.get(self.list_url, {"status": "new"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+        etag = first["ETag"]
+        self.assertEqual(self.revalidate(self.list_url, etag, status="new").status_code, 304)
+        # other params are another representation
+        self.assertEqual(self.revalidate(self.list_url, etag, status="new", limit=5).status_code, 200)
+
+        self.grievances[1].save()  # in_progress: outside the filter
+        self.assertEqual(self.revalidate(self.list_url, etag, status="new").status_code, 304)
+        self.grievances[0].save()
+        self.assertEqual(self.revalidate(self.list_url, etag, status="new").status_code, 200)
+
+    def test_list_changes_on_delete(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        Grievance.objects.filter(pk=self.grievances[0].pk).delete()
+        self.assertEqual(self.revalidate(self.list_url, etag).status_code, 200)
+
+    def aggregates(self, **params):
+        """The COUNT / MAX queries a list GET runs."""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.list_url, params).status_code, 200)
+        return [q["sql"] for q in queries if "COUNT(" in q["sql"].upper() or "MAX(" in q["sql"].upper()]
+
+    def test_offset_mode_counts_once(self):
+        sql = self.aggregates(status="new")
+        self.assertEqual(len([q for q in sql if "COUNT(" in q.upper()]), 1)  # shared by the ETag and the body
+        self.assertEqual(len([q for q in sql if "MAX(" in q.upper()]), 1)
+
+    def test_cursor_mode_runs_no_count(self):
+        sql = self.aggregates(status="new", pagination="cursor")
+        self.assertFalse([q for q in sql if "COUNT(" in q.upper()])
+        # a search would need a scan: the grievance cache version stands in for the watermark
+        self.assertEqual(self.aggregates(search="leak", pagination="cursor"), [])
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.list_url)["Last-Modified"]
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_changes_with_remarks_and_feedback(self):
+        grievance = self.grievances[0]
+        url = f"/adminpanel/api/grievances/{grievance.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+        GrievanceRemark.objects.create(grievance=grievance, officer=self.officer, remark="Visited")
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        feedback = Feedback.objects.create(grievance=grievance, rating=2)
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        feedback.rating = 5
+        feedback.save()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+
+class ListValidatorVersionTests(AdminPanelTransactionTestCase):
+    list_url = "/adminpanel/api/grievances/"
+
+    def assertChangedBy(self, write, **params):
+        etag = self.client.get(self.list_url, params)["ETag"]
+        self.assertEqual(self.client.get(self.list_url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        write()
+        self.assertEqual(self.client.get(self.list_url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_and_department_renames(self):
+        def rename_category():
+            self.category.name = "Leaks"
+            self.category.save()
+
+        def rename_department():
+            self.department.name = "Water supply"
+            self.department.save()
+
+        self.assertChangedBy(rename_category, status="new")
+        self.assertChangedBy(rename_department, status="new", pagination="cursor")
+
+    def test_username_edit(self):
+        def rename():
+            self.citizen.username = "citizen-one"
+            self.citizen.save()
+
+        self.assertChangedBy(rename, status="new")
+
+    def test_cursor_mode_sees_deletes(self):
+        self.assertChangedBy(lambda: self.grievances[0].delete(), status="new", pagination="cursor")
+        self.assertChangedBy(lambda: self.grievances[4].delete(), search="leak", pagination="cursor")
+
+
+class RollupParityTests(AdminPanelTestCase):
+    def assertMatchesRebuild(self):
+        maintained = rollup_state()
+        rollups.rebuild()
+        self.assertEqual(maintained, rollup_state())
+
+    def test_fixture_matches_rebuild(self):
+        self.assertEqual(sum(total[0] for total in rollup_state().values()), len(self.grievances))
+        self.assertMatchesRebuild()
+
+    def test_edits_and_deletes_match_rebuild(self):
+        other = Category.objects.create(name="Road", department=self.department)
+        first, second, third, fourth = self.grievances[:4]
+        first.status = Grievance.STATUS_RESOLVED
+        first.save()
+        second.category = other
+        second.save(update_fields=["category"])
+        third.status = Grievance.STATUS_NEW  # reopened
+        third.save()
+        fourth.title = "Renamed"
+        fourth.save(update_fields=["title"])
+        self.grievances[5].delete()
+        Grievance.objects.create(title="Resolved at once", description="d", status=Grievance.STATUS_RESOLVED, category=other)
+        self.assertMatchesRebuild()
+
+    def test_resolution_totals_follow_the_lifecycle(self):
+        other = Category.objects.create(name="Road", department=self.department)
+        shift = datetime.timedelta(days=2)  # filed two days ago, so resolutions take time
+        Grievance.objects.update(created_at=F("created_at") - shift, resolved_at=F("resolved_at") - shift)
+        GrievanceLifecycle.objects.update(
+            created_at=F("created_at") - shift, status_since=F("status_since") - shift, resolved_at=F("resolved_at") - shift,
+        )
+        rollups.rebuild()
+        open_ids = [g.pk for g in self.grievances if g.status != "resolved"]
+        resolved_ids = [g.pk for g in self.grievances if g.status == "resolved"]
+
+        def patch(pk, **data):
+            response = self.client.patch(f"/adminpanel/api/grievances/{pk}/", data, content_type="application/json")
+            self.assertEqual(response.status_code, 200)
+
+        patch(open_ids[0], status="resolved")
+        patch(open_ids[1], status="resolved")
+        patch(open_ids[1], category=other.pk)  # moves key while resolved
+        patch(resolved_ids[0], status="in_progress")  # reopened
+        Grievance.objects.get(pk=resolved_ids[2]).delete()
+        retriage.apply(open_ids[2:4], status=Grievance.STATUS_RESOLVED)
+
+        spec = GrievanceFilterSpec.from_params({})
+        live = resolution.average_days(resolution.resolved_queryset(spec))
+        self.assertGreater(live, 1)
+        self.assertEqual(rollups.summary(spec)["avg_resolution_days"], live)
+        self.assertMatchesRebuild()
+
+        maintained = rollup_state()
+        lifecycle.rebuild(reset=True)
+        self.assertEqual(rollup_state(), maintained)
+
+    def test_summary_reads_the_rollup(self):
+        summary = rollups.summary(GrievanceFilterSpec.from_params({"status": "resolved"}))
+        self.assertEqual(summary["total_grievances"], 3)
+        self.assertEqual(summary["by_status"], {"resolved": 3})
+        self.assertEqual(summary["by_category"], [{"id": self.category.pk, "name": "Leak", "count": 3}])
+
+
+class LifecycleBackfillTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.targets = [g.pk for g in self.grievances[:3]]
+        retriage.apply(self.targets, status=Grievance.STATUS_ESCALATED, user=self.admin)
+
+    def rebuild(self, **kwargs):
+        """lifecycle.rebuild() with one log entry per batch; also returns how many ChangeLog reads it made."""
+        with CaptureQueriesContext(connection) as queries:
+            result = lifecycle.rebuild(chunk=1, **kwargs)
+        reads = [q for q in queries if q["sql"].startswith("SELECT") and '"adminpanel_changelog"' in q["sql"]]
+        return result, len(reads)
+
+    def test_resumes_after_the_saved_cursor(self):
+        logged = ChangeLog.objects.filter(action=lifecycle.STATUS_ACTION).count()
+        self.assertEqual(self.rebuild(), ((0, 0), logged + 1))  # applied live already
+        self.assertEqual(lifecycle.backfill_cursor(), ChangeLog.objects.latest("id").pk)
+        self.assertEqual(self.rebuild(), ((0, 0), 1))  # nothing after the cursor
+
+    def test_new_rows_replay_their_history(self):
+        lifecycle.rebuild()
+        GrievanceLifecycle.objects.filter(pk=self.targets[0]).delete()
+        (created, applied), _ = self.rebuild()
+        self.assertEqual((created, applied), (1, 1))
+        self.assertEqual(GrievanceLifecycle.objects.get(pk=self.targets[0]).current_status, Grievance.STATUS_ESCALATED)
+
+    def test_reset_replays_everything(self):
+        lifecycle.rebuild()
+        (created, applied), _ = self.rebuild(reset=True)
+        self.assertEqual((created, applied), (len(self.grievances), 3))
+        statuses = dict(GrievanceLifecycle.objects.values_list("pk", "current_status"))
+        self.assertEqual(statuses, {g.pk: g.status for g in Grievance.objects.all()})
+
+
+class ImportTests(AdminPanelTestCase):
+    CSV = (
+        "title,description,status,category,department,user,assigned_officer,created_at\n"
+        "Burst main,Water everywhere,in_progress,leak,water,citizen1,officer1,2026-01-05\n"
+        ",No title,new,Leak,,citizen1,,\n"
+        "Bad status,d,lost,Leak,,citizen1,,\n"
+        "Unknown category,d,new,Potholes,,citizen1,,\n"
+        "Citizen as officer,d,new,Leak,,citizen1,citizen1,\n"
+        "Missing officer,d,new,Leak,,citizen1,nobody,\n"
+        "Resolved import,d,resolved,Leak,Water,citizen1,admin,2026-01-01\n"
+    )
+
+    def post(self, body, content_type="text/csv", **params):
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return self.client.post(f"/adminpanel/api/grievances/import/?{query}", body, content_type=content_type)
+
+    def test_valid_rows_are_created_and_invalid_rows_reported(self):
+        response = self.post(self.CSV)
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual((result["rows"], result["created"], result["failed"]), (7, 2, 5))
+        errors = {entry["row"]: entry["errors"] for entry in result["errors"]}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6])  # data rows count from 1
+        self.assertIn("title", errors[2])
+        self.assertIn("status", errors[3])
+        self.assertIn("category", errors[4])
+        self.assertEqual(errors[5], {"assigned_officer": "User 'citizen1' is not an officer."})
+        self.assertIn("assigned_officer", errors[6])
+
+        burst = Grievance.objects.get(title="Burst main")
+        self.assertEqual((burst.category, burst.department, burst.assigned_officer), (self.category, self.department, self.officer))
+        self.assertEqual(burst.created_at.date(), datetime.date(2026, 1, 5))
+        self.assertTrue(burst.tracking_id)
+        self.assertIsNotNone(Grievance.objects.get(title="Resolved import").resolved_at)
+
+    def test_imported_rows_maintain_the_derived_tables(self):
+        before = GrievanceChange.objects.count()
+        self.post(self.CSV)
+        imported = list(Grievance.objects.filter(title__in=("Burst main", "Resolved import")).values_list("pk", flat=True))
+        self.assertEqual(GrievanceLifecycle.objects.filter(pk__in=imported).count(), 2)
+        self.assertEqual(GrievanceChange.objects.count(), before + 2)
+        state = rollup_state()
+        rollups.rebuild()
+        self.assertEqual(state, rollup_state())
+
+    def test_dry_run_writes_nothing(self):
+        count = Grievance.objects.count()
+        response = self.post(self.CSV, dry_run=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 2)
+        self.assertEqual(Grievance.objects.count(), count)
+
+    def test_ndjson_and_unreadable_input(self):
+        body = json.dumps({"title": "From NDJSON", "description": "d", "category": {"id": self.category.pk}}) + "\n"
+        response = self.post(body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Grievance.objects.get(title="From NDJSON").department, self.department)
+        self.assertEqual(self.post("", content_type="text/csv").status_code, 400)
+        self.assertEqual(self.post("x", content_type="text/plain").status_code, 400)
+
+
+class BulkRetriageTests(AdminPanelTestCase):
+    def post(self, body):
+        return self.client.post("/adminpanel/api/grievances/bulk/", body, content_type="application/json")
+
+    def assertDerivedTablesMatchRebuild(self):
+        state, load = rollup_state(), workload_state()
+        rollups.rebuild()
+        workload.rebuild()
+        self.assertEqual(rollup_state(), state)
+        self.assertEqual(workload_state(), load)
+
+    def test_status_change_by_ids(self):
+        targets = [g.pk for g in self.grievances if g.status != "resolved"][:4]
+        missing = max(g.pk for g in self.grievances) + 100
+        feed = GrievanceChange.objects.count()
+        response = self.post({"ids": targets + [missing], "status": "resolved"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "matched": 4, "updated": 4, "status_changed": 4, "reassigned": 0, "not_found": [missing],
+        })
+        for grievance in Grievance.objects.filter(pk__in=targets):
+            self.assertEqual(grievance.status, "resolved")
+            self.assertIsNotNone(grievance.resolved_at)
+        lifecycles = GrievanceLifecycle.objects.filter(pk__in=targets)
+        self.assertEqual({row.current_status for row in lifecycles}, {"resolved"})
+        self.assertTrue(all(row.resolution_seconds is not None and row.status_changes == 1 for row in lifecycles))
+        self.assertEqual(GrievanceChange.objects.count(), feed + 4)
+        self.assertDerivedTablesMatchRebuild()
+
+    def test_reassignment_by_filter_skips_unchanged_rows(self):
+        response = self.post({"filter": {"status": "new"}, "assigned_officer": self.officer.pk})
+        summary = response.json()
+        # new grievances are i = 0, 4, 8; only odd i were assigned already
+        self.assertEqual((summary["matched"], summary["updated"], summary["reassigned"]), (3, 3, 3))
+        self.assertEqual(Grievance.objects.filter(status="new", assigned_officer=self.officer).count(), 3)
+        again = self.post({"filter": {"status": "new"}, "assigned_officer": self.officer.pk}).json()
+        self.assertEqual((again["matched"], again["updated"]), (3, 0))
+        self.assertDerivedTablesMatchRebuild()
+
+    def test_unassign_and_reopen_together(self):
+        targets = [g.pk for g in self.grievances if g.assigned_officer_id]
+        response = self.post({"ids": targets, "assigned_officer": None, "status": "in_progress"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Grievance.objects.filter(pk__in=targets, assigned_officer__isnull=False).exists())
+        self.assertFalse(Grievance.objects.filter(pk__in=targets, resolved_at__isnull=False).exists())
+        self.assertDerivedTablesMatchRebuild()
+
+    def test_invalid_requests(self):
+        pk = self.grievances[0].pk
+        for body, field in (
+            ({"status": "resolved"}, "detail"),
+            ({"ids": [pk], "filter": {}, "status": "resolved"}, "detail"),
+            ({"ids": [pk]}, "detail"),
+            ({"ids": [], "status": "resolved"}, "ids"),
+            ({"ids": ["x"], "status": "resolved"}, "ids"),
+            ({"ids": [pk], "status": "lost"}, "status"),
+            ({"ids": [pk], "assigned_officer": self.citizen.pk}, "assigned_officer"),
+            ({"ids": [pk], "assigned_officer": 999999}, "assigned_officer"),
+            ({"filter": {"status": "lost"}, "status": "new"}, "status"),
+        ):
+            response = self.post(body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn(field, response.json(), body)
+
+    def test_too_many_ids(self):
+        response = self.post({"ids": list(range(1, retriage.MAX_ROWS + 2)), "status": "new"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ChangeFeedTests(AdminPanelTestCase):
+    def feed(self, since, **params):
+        return self.client.get("/adminpanel/api/changes/", {"since": since, **params})
+
+    def test_drains_every_grievance_in_batches(self):
+        cursor, seen, batches = 0, [], 0
+        while True:
+            payload = self.feed(cursor, limit=5).json()
+            seen += [entry["id"] for entry in payload["changes"]]
+            batches += 1
+            self.assertGreater(int(payload["next"]), cursor)
+            cursor = int(payload["next"])
+            if not payload["has_more"]:
+                break
+        self.assertEqual(sorted(seen), sorted(g.pk for g in self.grievances))
+        self.assertEqual(batches, 3)
+        self.assertEqual(cursor, changes.head())
+        self.assertEqual(self.feed("latest").json(), {"changes": [], "next": str(cursor), "has_more": False})
+
+    def test_latest_write_wins_and_deletes_carry_only_the_id(self):
+        head = changes.head()
+        first, second = self.grievances[0], self.grievances[1]
+        second_pk = second.pk
+        first.title = "Edited once"
+        first.save()
+        first.title = "Edited twice"
+        first.save()
+        second.delete()
+        entries = self.feed(head).json()["changes"]
+        self.assertEqual([(e["id"], e["op"]) for e in entries], [(first.pk, changes.UPSERT), (second_pk, changes.DELETE)])
+        self.assertEqual(entries[0]["grievance"]["title"], "Edited twice")
+        self.assertNotIn("grievance", entries[1])
+
+    def test_bulk_writers_record_entries(self):
+        head = changes.head()
+        retriage.apply([g.pk for g in self.grievances[:2]], status=Grievance.STATUS_ESCALATED)
+        self.category.delete()  # SET_NULL on every fixture grievance
+        ids = {entry["id"] for entry in changes.read(head, changes.MAX_LIMIT)["changes"]}
+        self.assertEqual(ids, {g.pk for g in self.grievances})
+
+    def test_recent_gap_holds_the_cursor_until_it_settles(self):
+        head = changes.head()
+        grievance = self.grievances[0]
+        GrievanceChange.objects.create(id=head + 2, grievance_id=grievance.pk, op=changes.UPSERT, created_at=timezone.now())
+        self.assertEqual(changes.read(head), {"changes": [], "next": str(head), "has_more": True})
+        GrievanceChange.objects.filter(id=head + 2).update(
+            created_at=timezone.now() - datetime.timedelta(seconds=changes.settle_seconds() + 1),
+        )
+        result = changes.read(head)
+        self.assertEqual([entry["id"] for entry in result["changes"]], [grievance.pk])
+        self.assertEqual(result["next"], str(head + 2))
+
+    def test_pruned_cursor_is_gone(self):
+        GrievanceChange.objects.update(created_at=timezone.now() - datetime.timedelta(days=10))
+        head = changes.head()
+        self.assertEqual(changes.prune(days=5), len(self.grievances) - 1)
+        self.assertEqual(list(GrievanceChange.objects.values_list("id", flat=True)), [head])  # the newest is kept
+        self.assertEqual(self.feed(1).status_code, 410)
+        self.assertEqual(self.feed(head - 1).status_code, 200)
+        self.assertEqual(self.feed(0).json()["next"], str(head))
+
+    def test_invalid_params(self):
+        for params in ({"since": "x"}, {"since": -1}, {}, {"since": 0, "limit": "x"}, {"since": 0, "wait": "x"}):
+            self.assertEqual(self.client.get("/adminpanel/api/changes/", params).status_code, 400, params)
+
+
+class ChangeFeedLongPollTests(AdminPanelTransactionTestCase):
+    def test_commit_wakes_a_waiting_poll(self):
+        head = changes.head()
+
+        def write():
+            time.sleep(0.3)
+            with transaction.atomic():
+                retrying(lambda: Grievance.objects.create(title="Late arrival", description="d"))
+            connection.close()
+
+        writer = threading.Thread(target=write)
+        started = time.monotonic()
+        writer.start()
+        # without a notification the poll would not re-read for 30 seconds
+        with mock.patch.object(changes, "POLL_INTERVAL", 30):
+            result = retrying(lambda: changes.poll(head, wait=20))
+        writer.join()
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual([entry["grievance"]["title"] for entry in result["changes"]], ["Late arrival"])
+
+    def test_poll_returns_empty_after_the_wait(self):
+        head = changes.head()
+        started = time.monotonic()
+        self.assertEqual(changes.poll(head, wait=0.3), {"changes": [], "next": str(head), "has_more": False})
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+
+class ResolutionStatsTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.resolved = [g for g in self.grievances if g.status == "resolved"]
+        for days, grievance in enumerate(self.resolved, start=1):
+            GrievanceLifecycle.objects.filter(pk=grievance.pk).update(resolution_seconds=days * sla.SECONDS_PER_DAY)
+        rollups.rebuild()  # update() bypasses the rollup
+
+    def analytics(self, **params):
+        response = self.client.get("/adminpanel/api/analytics/", {"percentiles": "1", "lifecycle": "1", **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_average_and_percentiles_read_the_lifecycle_projection(self):
+        for params in ({}, {"search": "leak"}):  # rollup and live paths
+            payload = self.analytics(**params)
+            self.assertEqual(payload["avg_resolution_days"], 2.0)
+            self.assertEqual(payload["resolution"]["avg_days"], 2.0)
+            self.assertEqual(payload["resolution"]["p50_days"], 2.0)
+            self.assertEqual(payload["lifecycle"]["avg_resolution_days"], 2.0)
+
+    def test_reopened_grievances_leave_the_stats(self):
+        response = self.client.patch(
+            f"/adminpanel/api/grievances/{self.resolved[-1].pk}/", {"status": "in_progress"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = self.analytics()
+        self.assertEqual(payload["avg_resolution_days"], 1.5)
+        self.assertEqual(payload["resolution"]["count"], 2)
+        self.assertEqual(payload["resolution"]["p50_days"], 1.5)
+
+
+class TimeseriesTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        # Sat 2025-05-31 23:30, Sun 06-01 00:30 and Mon 06-02 00:10, resolved in 1, 2 and 4 days
+        stamps = [(2025, 5, 31, 23, 30), (2025, 6, 1, 0, 30), (2025, 6, 2, 0, 10)]
+        resolved = [g for g in self.grievances if g.status == "resolved"]
+        for stamp, days, grievance in zip(stamps, (1, 2, 4), resolved):
+            GrievanceLifecycle.objects.filter(pk=grievance.pk).update(
+                resolved_at=timezone.make_aware(datetime.datetime(*stamp)),
+                resolution_seconds=days * sla.SECONDS_PER_DAY,
+            )
+        # the grievance column disagrees: only the lifecycle keys the buckets
+        Grievance.objects.filter(status="resolved").update(
+            resolved_at=timezone.make_aware(datetime.datetime(2025, 6, 3, 12)),
+        )
+
+    def series(self, **params):
+        response = self.client.get("/adminpanel/api/analytics/timeseries/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_days_are_zero_filled_dense_arrays(self):
+        payload = self.series(bucket="day", date_from="2025-05-30", date_to="2025-06-03")
+        self.assertEqual(payload["buckets"], ["2025-05-30", "2025-05-31", "2025-06-01", "2025-06-02", "2025-06-03"])
+        self.assertEqual(payload["created"], [0, 0, 0, 0, 0])
+        self.assertEqual(payload["escalated"], [0, 0, 0, 0, 0])
+        self.assertEqual(payload["resolved"], [0, 1, 1, 1, 0])
+        self.assertEqual(payload["median_resolution_days"], [None, 1.0, 2.0, 4.0, None])
+
+    def test_weeks_start_on_monday(self):
+        payload = self.series(bucket="week", date_from="2025-05-28", date_to="2025-06-08")
+        self.assertEqual(payload["buckets"], ["2025-05-26", "2025-06-02"])
+        self.assertEqual(payload["date_from"], "2025-05-26")  # whole buckets
+        self.assertEqual(payload["resolved"], [2, 1])
+        self.assertEqual(payload["median_resolution_days"], [1.5, 4.0])
+
+    def test_months_start_on_the_first(self):
+        payload = self.series(bucket="month", date_from="2025-05-15", date_to="2025-06-30")
+        self.assertEqual(payload["buckets"], ["2025-05-01", "2025-06-01"])
+        self.assertEqual(payload["resolved"], [1, 2])
+        self.assertEqual(payload["median_resolution_days"], [1.0, 3.0])
+
+    def test_resolved_rows_without_a_lifecycle_time_are_left_out(self):
+        GrievanceLifecycle.objects.filter(resolved_at__date="2025-06-02").update(resolution_seconds=None)
+        payload = self.series(bucket="week", date_from="2025-05-26", date_to="2025-06-08")
+        self.assertEqual(payload["resolved"], [2, 0])
+        self.assertEqual(payload["median_resolution_days"], [1.5, None])
+
+
+class DashboardBootstrapTests(AdminPanelTestCase):
+    url = "/adminpanel/api/dashboard/bootstrap/"
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def queries(self):
+        admin_cache.backend().clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.get(self.url)
+        return len(ctx)
+
+    def test_matches_the_endpoints_it_replaces(self):
+        payload = self.get(self.url)
+        self.assertEqual(payload["analytics"], self.get("/adminpanel/api/analytics/"))
+        self.assertEqual(payload["categories"], self.get("/adminpanel/api/categories/"))
+        self.assertEqual(payload["officers"], self.get("/adminpanel/api/user-status/")["officers"])
+        first_page = self.get("/adminpanel/api/grievances/", {
+            "pagination": "cursor", "limit": 25, "with_count": "1", "fields": "id,title,user,category,status",
+        })
+        self.assertEqual(payload["grievances"], first_page)
+
+    def test_query_count_does_not_grow_with_the_data(self):
+        baseline = self.queries()
+        User = get_user_model()
+        for i in range(3):
+            officer = User.objects.create_user(f"officer{i + 2}", password="x", role="officer")
+            category = Category.objects.create(name=f"Kind {i}", department=self.department)
+            for n in range(5):
+                Grievance.objects.create(
+                    title=f"More {i}-{n}", description="d", category=category, user=self.citizen, assigned_officer=officer,
+                )
+        self.assertEqual(self.queries(), baseline)
+        # session + user, 3 rollup sums, categories, officers, workload, the page and its count
+        self.assertLessEqual(baseline, 10)
+
+
+class CacheInvalidationTests(AdminPanelTransactionTestCase):
+    def test_writes_bump_versions_only_on_commit(self):
+        before = admin_cache.versions(admin_cache.NAMESPACES)
+        with transaction.atomic():
+            grievance = self.grievances[0]
+            grievance.status = Grievance.STATUS_RESOLVED
+            grievance.save()
+            Category.objects.create(name="Road", department=self.department)
+            # still inside the transaction: other readers keep the old version (and old entries)
+            self.assertEqual(admin_cache.versions(admin_cache.NAMESPACES), before)
+        after = admin_cache.versions(admin_cache.NAMESPACES)
+        self.assertEqual(after["grievances"], before["grievances"] + 1)  # one bump per transaction
+        self.assertEqual(after["categories"], before["categories"] + 1)
+        self.assertEqual(after["sla"], before["sla"])
+
+    def test_bulk_retriage_bumps_on_commit(self):
+        before = admin_cache.versions(["grievances"])
+        with transaction.atomic():
+            retriage.apply([g.pk for g in self.grievances[:3]], status=Grievance.STATUS_ESCALATED)
+            self.assertEqual(admin_cache.versions(["grievances"]), before)
+        self.assertEqual(admin_cache.versions(["grievances"])["grievances"], before["grievances"] + 1)
+
+    def test_rolled_back_writes_do_not_bump(self):
+        before = admin_cache.versions(["grievances"])
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.grievances[0].save()
+            raise RuntimeError
+        self.assertEqual(admin_cache.versions(["grievances"]), before)
+
+    def test_cached_reads_follow_commits(self):
+        compute = lambda: Grievance.objects.count()  # noqa: E731
+        self.assertEqual(admin_cache.get_or_compute("test_count", ("grievances",), compute), 12)
+        Grievance.objects.create(title="New", description="d")
+        self.assertEqual(admin_cache.get_or_compute("test_count", ("grievances",), compute), 13)
+        self.assertEqual(admin_cache.stats(["test_count"])["test_count"], {"hits": 0, "misses": 2})
+
+    def test_writing_transaction_reads_its_own_writes_uncached(self):
+        compute = lambda: Grievance.objects.count()  # noqa: E731
+        self.assertEqual(admin_cache.get_or_compute("test_count", ("grievances",), compute), 12)
+        with transaction.atomic():
+            Grievance.objects.create(title="New", description="d")
+            self.assertEqual(admin_cache.get_or_compute("test_count", ("grievances",), compute), 13)
+            # ...and leaves nothing in the cache that others could read before the commit
+            self.assertEqual(admin_cache.stats(["test_count"])["test_count"]["misses"], 1)
+        self.assertEqual(admin_cache.get_or_compute("test_count", ("grievances",), compute), 13)
+
+    def test_policy_change_applies_within_its_transaction(self):
+        sla.days_for(self.category.pk, self.department.pk)  # cache the policy table
+        with transaction.atomic():
+            SLAPolicy.objects.create(category=self.category, days=2)
+            grievance = Grievance.objects.create(title="New", description="d", category=self.category)
+        self.assertAlmostEqual(grievance.due_at, grievance.created_at + datetime.timedelta(days=2), delta=datetime.timedelta(seconds=1))
+        refreshed = Grievance.objects.filter(pk__in=[g.pk for g in self.grievances], status__in=Grievance.OPEN_STATUSES)
+        self.assertEqual(refreshed.exclude(due_at=F("created_at") + datetime.timedelta(days=2)).count(), 0)
+
+
+class WorkloadParityTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = get_user_model().objects.create_user("officer2", password="x", role="officer")
+
+    def assertMatchesRebuild(self):
+        load = workload_state()
+        workload.rebuild()
+        self.assertEqual(workload_state(), load)
+        return load
+
+    def test_incremental_counts_match_a_rebuild(self):
+        self.assertMatchesRebuild()
+        created = Grievance.objects.create(
+            title="Meter fault", description="d", status="new", assigned_officer=self.other,
+            created_at=timezone.now() - datetime.timedelta(days=3),
+        )
+        self.assertMatchesRebuild()
+
+        # reassign: the oldest open grievance moves between officers
+        open_for_officer = Grievance.objects.filter(assigned_officer=self.officer, status__in=Grievance.OPEN_STATUSES)
+        oldest = open_for_officer.earliest("created_at")
+        response = self.client.post(f"/adminpanel/api/grievances/{oldest.pk}/assign/", {"assigned_to": self.other.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertMatchesRebuild()
+
+        response = self.client.patch(
+            f"/adminpanel/api/grievances/{created.pk}/", {"status": "resolved"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        load = self.assertMatchesRebuild()
+        counts = {row[0]: row[1:4] for row in load}
+        self.assertEqual(sum(counts[self.other.pk]), 1)  # only the reassigned grievance is still open
+
+        oldest.delete()
+        self.assertNotIn(self.other.pk, [row[0] for row in self.assertMatchesRebuild()])
+
+
+class SLADeadlineTests(AdminPanelTestCase):
+    def open_rows(self):
+        return Grievance.objects.filter(status__in=Grievance.OPEN_STATUSES)
+
+    def test_policy_change_rewrites_open_deadlines(self):
+        closed = dict(Grievance.objects.exclude(status__in=Grievance.OPEN_STATUSES).values_list("pk", "updated_at"))
+        last_change = GrievanceChange.objects.latest("id").pk
+        SLAPolicy.objects.create(category=self.category, days=3)
+        self.assertEqual(self.open_rows().exclude(due_at=F("created_at") + datetime.timedelta(days=3)).count(), 0)
+        changed = set(GrievanceChange.objects.filter(id__gt=last_change).values_list("grievance_id", flat=True))
+        self.assertEqual(changed, set(self.open_rows().values_list("pk", flat=True)))
+        self.assertEqual(dict(Grievance.objects.filter(pk__in=closed).values_list("pk", "updated_at")), closed)
+
+    def test_global_change_leaves_rows_under_a_category_policy_alone(self):
+        SLAPolicy.objects.create(category=self.category, days=3)
+        stamps = dict(Grievance.objects.values_list("pk", "updated_at"))
+        changes_before = GrievanceChange.objects.count()
+        SLAPolicy.objects.create(days=10)  # global
+        self.assertEqual(dict(Grievance.objects.values_list("pk", "updated_at")), stamps)
+        self.assertEqual(GrievanceChange.objects.count(), changes_before)
+        self.assertEqual(sla.refresh_deadlines(self.category.pk), 0)
+
+    def test_refresh_fills_missing_and_clears_disabled_deadlines(self):
+        policy = SLAPolicy.objects.create(category=self.category, days=3)
+        Grievance.objects.filter(pk=self.grievances[0].pk).update(due_at=None)
+        self.assertEqual(sla.refresh_deadlines(self.category.pk), 1)
+        policy.days = 0
+        policy.save()
+        self.assertFalse(self.open_rows().filter(due_at__isnull=False).exists())
+        self.assertEqual(sla.refresh_deadlines(self.category.pk), 0)
+
+    def test_new_grievances_count_as_current(self):
+        SLAPolicy.objects.create(category=self.category, days=3)
+        Grievance.objects.create(title="New", description="d", category=self.category)
+        self.assertEqual(sla.refresh_deadlines(self.category.pk), 0)
+
+
+def retrying(fn, attempts=200):
+    """fn(), retried while the database reports a lock (SQLite's shared in-memory test database)."""
+    for _ in range(attempts - 1):
+        try:
+            return fn()
+        except OperationalError:
+            time.sleep(0.005)
+    return fn()
+
+
+class TrackingConcurrencyTests(AdminPanelTransactionTestCase):
+    THREADS = 6
+    PER_THREAD = 15
+
+    def setUp(self):
+        tracking._blocks.clear()  # blocks cached by earlier tests point into a flushed sequence
+        super().setUp()
+
+    def test_cache_lock_is_released_during_reservations(self):
+        tracking._blocks.clear()  # not the fixture's part-used block
+        real_reserve = tracking.reserve
+
+        def reserve(*args, **kwargs):
+            self.assertFalse(tracking._lock.locked())
+            return real_reserve(*args, **kwargs)
+
+        with mock.patch.object(tracking, "reserve", side_effect=reserve) as spy:
+            ids = [tracking.next_id() for _ in range(tracking.block_size() + 1)]
+        self.assertEqual(spy.call_count, 2)  # one block, then the next
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_reservation_inside_a_transaction_commits_on_its_own(self):
+        # as on a backend with row locks: SQLite joins the caller's transaction instead
+        tracking._blocks.clear()
+        with mock.patch.object(tracking, "_in_shared_writer", return_value=False):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                year, first = tracking.reserve_outside(5)
+                raise RuntimeError  # the caller rolls back; the reservation stays
+            self.assertEqual(TrackingSequence.objects.get(year=year).next_value, first + 5)
+            with transaction.atomic():
+                issued = tracking.next_id()  # reserves a committed block, which is cached
+            self.assertEqual(issued, tracking.format_id(year, first + 5))
+            self.assertEqual(tracking.next_id(), tracking.format_id(year, first + 6))
+
+    def test_concurrent_ids_are_unique_and_the_counter_only_advances(self):
+        year = timezone.now().year
+        issued, marks, failures = [], [], []
+        done = threading.Event()
+
+        def create(n, i):
+            with transaction.atomic():  # a rolled-back attempt leaves no half-written grievance
+                return Grievance.objects.create(title=f"Thread {n} #{i}", description="d").tracking_id
+
+        def worker(n):
+            try:
+                for i in range(self.PER_THREAD):
+                    # odd threads take from the per-process block, even ones reserve inside a transaction
+                    issued.append(retrying(tracking.next_id if n % 2 else lambda: create(n, i)))
+            except Exception as exc:  # surfaced in the main thread
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        def sample():
+            sequence = TrackingSequence.objects.filter(year=year).values_list("next_value", flat=True)
+            try:
+                while not done.is_set():
+                    value = retrying(sequence.first)
+                    if value is not None:
+                        marks.append(value)
+            except Exception as exc:
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        sampler = threading.Thread(target=sample)
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.THREADS)]
+        sampler.start()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        done.set()
+        sampler.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual(len(issued), self.THREADS * self.PER_THREAD)
+        self.assertEqual(len(set(issued)), len(issued))
+        stored = list(Grievance.objects.values_list("tracking_id", flat=True))
+        self.assertEqual(len(set(stored)), len(stored))
+        self.assertTrue(marks)
+        self.assertEqual(marks, sorted(marks))
+        high_water = TrackingSequence.objects.get(year=year).next_value
+        self.assertTrue(all(int(tid.rsplit("-", 1)[1]) < high_water for tid in issued + stored))
+
+
+@skipIf(np is None, "NumPy is not installed")
+class ColumnarSnapshotTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.base = Path(directory.name)
+
+    def columns(self, base):
+        data = columnar.load(base)
+        return {name: np.array(data[name]) for name in columnar.COLUMNS}
+
+    def test_incremental_refresh_matches_a_full_export(self):
+        self.assertTrue(columnar.export(chunk=5, base=self.base / "live")["full"])
+
+        changed = self.grievances[0]
+        changed.status = "resolved"
+        changed.assigned_officer = self.officer
+        changed.save()
+        Feedback.objects.create(grievance=self.grievances[1], rating=5)
+        self.grievances[2].delete()
+        Grievance.objects.create(title="New one", description="d", category=self.category, status="escalated")
+        Grievance.objects.create(title="Another", description="d", user=self.citizen)
+
+        stats = columnar.export(chunk=5, base=self.base / "live")
+        self.assertEqual((stats["full"], stats["appended"], stats["dropped"]), (False, 2, 1))
+        self.assertGreaterEqual(stats["patched"], 2)
+        columnar.export(full=True, base=self.base / "fresh")
+
+        live, fresh = self.columns(self.base / "live"), self.columns(self.base / "fresh")
+        self.assertEqual(len(fresh["id"]), len(self.grievances) + 1)
+        for name in columnar.COLUMNS:
+            np.testing.assert_array_equal(live[name], fresh[name], err_msg=name)
+
+    def test_group_percentiles_match_numpy(self):
+        rng = np.random.default_rng(7)
+        groups = 5  # group 4 is empty, group 3 only NaN
+        inverse = rng.integers(0, 3, size=200)
+        values = rng.exponential(86400.0, size=200)
+        values[rng.random(200) < 0.2] = np.nan
+        inverse = np.concatenate([inverse, [3, 3]])
+        values = np.concatenate([values, [np.nan, np.nan]])
+        fractions = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+        out = columnar._group_percentiles(inverse, values, groups, fractions)
+        for name, fraction in fractions.items():
+            for group in range(3):
+                expected = np.nanpercentile(values[inverse == group], fraction * 100)
+                self.assertAlmostEqual(out[name][group], expected, places=6)
+            self.assertTrue(np.isnan(out[name][3]) and np.isnan(out[name][4]))
+
+
+class ExportStreamTests(AdminPanelTestCase):
+    url = "/adminpanel/api/export/grievances/"
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def legacy_rows(self):
+        """The rows the per-instance export wrote (str() of each value, "" for missing relations)."""
+        qs = Grievance.objects.select_related("user", "category", "department", "assigned_officer")
+        return [
+            [
+                str(g.id), g.tracking_id, g.title, g.description, g.status,
+                g.category.name if g.category else "", g.department.name if g.department else "",
+                str(g.user.id) if g.user else "", g.user.username if g.user else "",
+                str(g.assigned_officer.id) if g.assigned_officer else "",
+                g.assigned_officer.username if g.assigned_officer else "",
+                g.created_at.isoformat(), g.updated_at.isoformat(),
+            ]
+            for g in qs.order_by("-created_at", "-id")
+        ]
+
+    def test_csv_matches_the_legacy_export(self):
+        Grievance.objects.create(title='Quote "and", comma', description="line one\nline two")
+        body = self.body(self.client.get(self.url, {"export_all": "1"}))
+        rows = list(csv.reader(io.StringIO(body.decode("utf-8"))))
+        self.assertEqual(rows[0], [
+            "id", "tracking_id", "title", "description", "status", "category", "department",
+            "user_id", "username", "assigned_officer_id", "assigned_officer_username", "created_at", "updated_at",
+        ])
+        self.assertEqual(rows[1:], self.legacy_rows())
+
+    def test_gzip_follows_accept_encoding(self):
+        plain = self.client.get(self.url, {"export_all": "1"})
+        self.assertNotIn("Content-Encoding", plain)
+        plain_body = self.body(plain)
+
+        compressed = self.client.get(self.url, {"export_all": "1"}, HTTP_ACCEPT_ENCODING="br, gzip;q=0.8")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertEqual(gzip.decompress(self.body(compressed)), plain_body)
+
+        refused = self.client.get(self.url, {"export_all": "1"}, HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        self.assertNotIn("Content-Encoding", refused)
+        self.assertEqual(self.body(refused), plain_body)
+
+    def test_ndjson_includes_are_fetched_per_batch(self):
+        for i, grievance in enumerate(self.grievances):
+            for n in range(i % 3):
+                GrievanceRemark.objects.create(grievance=grievance, officer=self.officer, remark=f"Remark {n}")
+            if i % 2:
+                Feedback.objects.create(grievance=grievance, rating=4, comments="Fixed")
+        qs = GrievanceFilterSpec.from_params({}).queryset(rank=False)
+        # 12 rows in batches of 5: the rows, then remarks + feedback per batch, departments once
+        with self.assertNumQueries(1 + 3 * 2 + 1):
+            lines = b"".join(exports.ndjson_chunks(qs, ("remarks", "feedback", "department"), fetch_chunk=5))
+        objects = [json.loads(line) for line in lines.decode("utf-8").splitlines()]
+        self.assertEqual(len(objects), len(self.grievances))
+        for obj in objects:
+            grievance = Grievance.objects.get(pk=obj["id"])
+            self.assertEqual([r["remark"] for r in obj["remarks"]], list(
+                grievance.remarks.order_by("created_at", "id").values_list("remark", flat=True)
+            ))
+            has_feedback = Feedback.objects.filter(grievance=grievance).exists()
+            self.assertEqual(obj["feedback"]["rating"] if obj["feedback"] else None, 4 if has_feedback else None)
+            self.assertEqual(obj["department"], {
+                "id": self.department.pk, "name": "Water", "code": "water", "description": self.department.description,
+            })
+
+    def test_ndjson_endpoint_rejects_unknown_includes(self):
+        response = self.client.get(self.url, {"format": "ndjson", "include": "remarks"})
+        self.assertEqual(len(self.body(response).splitlines()), len(self.grievances))
+        self.assertEqual(self.client.get(self.url, {"format": "ndjson", "include": "votes"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"include": "remarks"}).status_code, 400)  # CSV has no nesting
+
+
+class ExportJobTests(AdminPanelTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = self.settings(ADMINPANEL_EXPORT_DIR=Path(directory.name), ADMINPANEL_EXPORT_WORKER="command")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def finished_job(self):
+        job = exportjobs.enqueue(self.admin, {"status": "resolved"})
+        self.assertEqual(exportjobs.drain(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_DONE)
+        return job, exportjobs.file_path(job).read_bytes()
+
+    def download(self, job, **headers):
+        response = self.client.get(f"/adminpanel/api/exports/{job.pk}/download/", **headers)
+        return response, b"".join(response.streaming_content) if response.streaming else b""
+
+    def test_range_returns_the_requested_bytes(self):
+        job, data = self.finished_job()
+        response, body = self.download(job, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(data)}")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(body, data[10:20])
+
+    def test_suffix_range_returns_the_tail(self):
+        job, data = self.finished_job()
+        response, body = self.download(job, HTTP_RANGE="bytes=-25")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes {len(data) - 25}-{len(data) - 1}/{len(data)}")
+        self.assertEqual(body, data[-25:])
+
+    def test_unsatisfiable_range_is_416(self):
+        job, data = self.finished_job()
+        response, _ = self.download(job, HTTP_RANGE=f"bytes={len(data)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(data)}")
+
+    def test_if_range_mismatch_sends_the_whole_file(self):
+        job, data = self.finished_job()
+        response, body = self.download(job, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"export-stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Range", response)
+        self.assertEqual(body, data)
+        resumed, body = self.download(job, HTTP_RANGE="bytes=10-", HTTP_IF_RANGE=response["ETag"])
+        self.assertEqual(resumed.status_code, 206)
+        self.assertEqual(body, data[10:])
+
+    def test_stale_running_job_is_requeued(self):
+        job = exportjobs.enqueue(self.admin, {})
+        self.assertEqual(exportjobs.claim_next().pk, job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(rows_written=5, bytes_written=500)
+        self.assertEqual(exportjobs.requeue_stale(), 0)  # heartbeat is fresh
+        later = timezone.now() + exportjobs.STALE_AFTER + datetime.timedelta(seconds=1)
+        self.assertEqual(exportjobs.requeue_stale(now=later), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_written, job.bytes_written), (ExportJob.STATUS_QUEUED, 0, 0))
+
+    def test_only_one_worker_wins_a_claim(self):
+        job = exportjobs.enqueue(self.admin, {})
+        real_now = timezone.now
+        rival = {}
+
+        def now():
+            # the rival claims between this worker's read of the queue and its UPDATE
+            if "job" not in rival:
+                rival["job"] = None
+                rival["job"] = exportjobs.claim_next()
+            return real_now()
+
+        with mock.patch.object(exportjobs.timezone, "now", side_effect=now):
+            with mock.patch.object(exportjobs, "requeue_stale"):
+                claimed = exportjobs.claim_next()
+        self.assertIsNone(claimed)
+        self.assertEqual(rival["job"].pk, job.pk)
+        self.assertEqual(ExportJob.objects.get(pk=job.pk).status, ExportJob.STATUS_RUNNING)
+
+    def test_expire_deletes_the_file(self):
+        job, _ = self.finished_job()
+        path = exportjobs.file_path(job)
+        self.assertEqual(exportjobs.expire(), 0)
+        self.assertEqual(exportjobs.expire(now=job.expires_at), 1)
+        self.assertFalse(path.exists())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.file_name), (ExportJob.STATUS_EXPIRED, ""))
+        response, _ = self.download(job)
+        self.assertEqual(response.status_code, 409)  # no longer downloadable
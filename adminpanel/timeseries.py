@@ -0,0 +1,111 @@
+# adminpanel/timeseries.py
+"""
+Bucketed grievance series for the analytics trend charts.
+
+Each series is one grouped query over an indexed timestamp, independent of the number
+of buckets; results are zero-filled into dense arrays aligned with `buckets`:
+
+  - created:  grievances by created_at
+  - resolved: resolved grievances by their lifecycle's resolved_at, with the median of
+    the lifecycle resolution times in the same rows
+  - escalated: status changes to "escalated" in the change log, by timestamp
+"""
+import datetime
+
+from django.db.models import Count, DateField
+from django.db.models.functions import Trunc
+
+from adminpanel.filters import day_start
+from adminpanel.models import ChangeLog, Grievance
+from adminpanel.resolution import SECONDS_PER_DAY, median_by_group
+
+BUCKETS = ("day", "week", "month")
+# default window when no date range is given, in buckets
+DEFAULT_SPAN = {"day": 30, "week": 12, "month": 12}
+MAX_BUCKETS = 731
+
+
+def bucket_start(value, bucket):
+    """The bucket containing a date: the day itself, its ISO week's Monday, or the 1st of the month."""
+    if bucket == "week":
+        return value - datetime.timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, bucket):
+    if bucket == "week":
+        return value + datetime.timedelta(days=7)
+    if bucket == "month":
+        return (value.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return value + datetime.timedelta(days=1)
+
+
+def bucket_range(date_from, date_to, bucket):
+    """Bucket start dates covering [date_from, date_to]."""
+    out = []
+    current = bucket_start(date_from, bucket)
+    while current <= date_to:
+        out.append(current)
+        current = next_bucket(current, bucket)
+    return out
+
+
+def default_range(bucket, today):
+    """(date_from, date_to) covering the last DEFAULT_SPAN buckets up to today."""
+    start = bucket_start(today, bucket)
+    for _ in range(DEFAULT_SPAN[bucket] - 1):
+        start = bucket_start(start - datetime.timedelta(days=1), bucket)
+    return start, today
+
+
+def _counts(qs, field, bucket, start, end):
+    truncated = Trunc(field, bucket, output_field=DateField())
+    rows = (
+        qs.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+        .annotate(bucket=truncated).values("bucket").annotate(n=Count("pk")).order_by()
+    )
+    return {row["bucket"]: row["n"] for row in rows}
+
+
+def build_timeseries(spec, bucket, date_from, date_to):
+    """
+    Dense created/resolved/escalated counts and median resolution days per bucket.
+    `spec` supplies the row filters (status, category, department, officer...); its own
+    date filters are ignored, the range is [date_from, date_to] on each series' timestamp.
+    """
+    buckets = bucket_range(date_from, date_to, bucket)
+    # whole buckets: the first bucket may start before date_from
+    start = day_start(buckets[0])
+    end = day_start(next_bucket(buckets[-1], bucket))
+
+    grievances = spec.apply(Grievance.objects.order_by(), rank=False)
+
+    created = _counts(grievances, "created_at", bucket, start, end)
+
+    # counts and medians from the same rows: those with a lifecycle resolution time
+    resolved_qs = grievances.filter(status=Grievance.STATUS_RESOLVED, lifecycle__resolution_seconds__isnull=False)
+    resolved = _counts(resolved_qs, "lifecycle__resolved_at", bucket, start, end)
+    medians = median_by_group(
+        resolved_qs.filter(lifecycle__resolved_at__gte=start, lifecycle__resolved_at__lt=end),
+        Trunc("lifecycle__resolved_at", bucket, output_field=DateField()),
+    )
+
+    escalations = ChangeLog.objects.filter(action="status_changed", after=Grievance.STATUS_ESCALATED)
+    if spec.as_dict():
+        escalations = escalations.filter(grievance__in=grievances.values("pk"))
+    escalated = _counts(escalations, "timestamp", bucket, start, end)
+
+    return {
+        "bucket": bucket,
+        "date_from": buckets[0].isoformat(),
+        "date_to": date_to.isoformat(),
+        "buckets": [b.isoformat() for b in buckets],
+        "created": [created.get(b, 0) for b in buckets],
+        "resolved": [resolved.get(b, 0) for b in buckets],
+        "escalated": [escalated.get(b, 0) for b in buckets],
+        "median_resolution_days": [
+            round(medians[b] / SECONDS_PER_DAY, 2) if medians.get(b) is not None else None for b in buckets
+        ],
+    }
@@ -0,0 +1,136 @@
+# adminpanel/tracking.py
+"""
+Tracking IDs (KER-<year>-<number>) assigned before a grievance is inserted, so a new
+grievance is written with one INSERT and its attachment is filed under its final ID.
+
+Numbers come from one TrackingSequence row per year. A process reserves a block of
+ADMINPANEL_TRACKING_BLOCK_SIZE numbers by advancing next_value with a single UPDATE
+(the row stays locked until that transaction commits) and then hands the block out
+from memory. Blocks are cached per process id, so forked workers never share one.
+
+IDs are unique across workers but not gap-free: numbers left in a block when a process
+exits, or taken by a save that is rolled back, are never used.
+
+A reservation never runs in a caller's transaction, which would hold the counter row
+lock until that transaction ends and stall every other writer: inside one, the block is
+reserved on a separate connection and committed first (reserve_outside()). The
+in-process lock only guards the cache; it is released during the database call.
+SQLite allows one writer per database, which a writing caller already holds, so there
+one number is taken within the caller's transaction instead (a rollback returns it).
+
+The first reservation for a year starts after the highest KER-<year>-<n> already stored
+(IDs used to be derived from the primary key).
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from adminpanel.models import Grievance, TrackingSequence
+
+PREFIX = "KER"
+
+_blocks = {}  # (pid, db alias, year) -> [next number, end of block (exclusive)]
+_lock = threading.Lock()
+
+
+def block_size():
+    return max(1, int(getattr(settings, "ADMINPANEL_TRACKING_BLOCK_SIZE", 20)))
+
+
+def format_id(year, number):
+    return f"{PREFIX}-{year}-{number:06d}"
+
+
+def _highest_used(year, using):
+    """The highest number among stored KER-<year>-<n> IDs (zero-padded: longer is larger), or 0."""
+    prefix = f"{PREFIX}-{year}-"
+    last = (
+        Grievance.objects.using(using).filter(tracking_id__regex=rf"^{prefix}[0-9]+$")
+        .order_by(Length("tracking_id").desc(), "-tracking_id")
+        .values_list("tracking_id", flat=True).first()
+    )
+    return int(last[len(prefix):]) if last else 0
+
+
+def reserve(count, year=None, using=DEFAULT_DB_ALIAS):
+    """
+    Take `count` consecutive numbers from the counter, in the current transaction if
+    there is one (its rollback returns them). Returns (year, first number).
+    """
+    year = year or timezone.now().year
+    sequence = TrackingSequence.objects.using(using).filter(year=year)
+    with transaction.atomic(using=using):
+        if not sequence.update(next_value=F("next_value") + count, updated_at=timezone.now()):
+            try:
+                with transaction.atomic(using=using):
+                    TrackingSequence.objects.using(using).create(year=year, next_value=_highest_used(year, using) + 1)
+            except IntegrityError:
+                pass  # another worker created the row first
+            sequence.update(next_value=F("next_value") + count, updated_at=timezone.now())
+        return year, sequence.values_list("next_value", flat=True).get() - count
+
+
+def _in_shared_writer(connection):
+    """True inside a transaction on SQLite, whose single write lock the caller may hold."""
+    return connection.in_atomic_block and connection.vendor == "sqlite"
+
+
+def reserve_outside(count, year=None, using=DEFAULT_DB_ALIAS):
+    """
+    reserve() committed on its own, so the caller's transaction never holds the counter
+    row lock; inside a transaction it runs on a helper thread's connection. On SQLite
+    (see _in_shared_writer()) it joins the caller's transaction.
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block or _in_shared_writer(connection):
+        return reserve(count, year, using)
+    result = {}
+
+    def run():
+        try:
+            result["value"] = reserve(count, year, using)
+        except Exception as exc:  # re-raised in the caller's thread
+            result["error"] = exc
+        finally:
+            connections[using].close()
+
+    thread = threading.Thread(target=run, name="tracking-reserve")
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def _take(key):
+    with _lock:
+        block = _blocks.get(key)
+        if block and block[0] < block[1]:
+            block[0] += 1
+            return block[0] - 1
+    return None
+
+
+def next_id(year=None, using=DEFAULT_DB_ALIAS):
+    """A tracking ID for one new grievance, from this process's block while it lasts."""
+    year = year or timezone.now().year
+    key = (os.getpid(), using, year)
+    number = _take(key)
+    if number is not None:
+        return format_id(year, number)
+    if _in_shared_writer(connections[using]):
+        # a block reserved in the caller's transaction would be handed out again after a rollback
+        return format_id(*reserve(1, year, using))
+    size = block_size()
+    year, first = reserve_outside(size, year, using)  # committed: safe to cache
+    with _lock:
+        block = _blocks.get(key)
+        if not block or block[0] >= block[1]:
+            _blocks[key] = [first + 1, first + size]
+        # else another thread refilled meanwhile: the rest of this block is left unused
+    return format_id(year, first)
@@ -30,13 +30,27 @@ urlpatterns = [
     path('api/password_reset_confirm/', views.api_password_reset_confirm, name='api_password_reset_confirm'),
 
     path('api/grievances/', views.api_grievances_list, name='api_grievances_list'),
+    path('api/grievances/suggest/', views.api_grievance_suggest, name='api_grievance_suggest'),
+    path('api/grievances/overdue/', views.api_grievances_overdue, name='api_grievances_overdue'),
+    path('api/grievances/import/', views.api_grievances_import, name='api_grievances_import'),
+    path('api/grievances/bulk/', views.api_grievances_bulk, name='api_grievances_bulk'),
     path('api/grievances/<int:pk>/', views.api_grievance_detail, name='api_grievance_detail'),
     path('api/grievances/<int:pk>/assign/', views.api_grievance_assign, name='api_grievance_assign'),
     path('api/grievances/<int:pk>/remarks/', views.api_grievance_add_remark, name='api_grievance_add_remark'),
     path('api/export/grievances/', views.api_export_grievances_csv, name='api_export_grievances'),
 
     path('api/analytics/', views.api_analytics, name='api_analytics'),
+    path('api/dashboard/bootstrap/', views.api_dashboard_bootstrap, name='api_dashboard_bootstrap'),
+    path('api/analytics/timeseries/', views.api_analytics_timeseries, name='api_analytics_timeseries'),
+    path('api/analytics/snapshot/', views.api_analytics_snapshot, name='api_analytics_snapshot'),
     path('api/user-status/', views.api_user_status, name='api_user_status'),
+    path('api/sla-policies/', views.api_sla_policies_list_create, name='api_sla_policies'),
+    path('api/sla-policies/<int:pk>/', views.api_sla_policy_detail, name='api_sla_policy_detail'),
+    path('api/exports/', views.api_export_jobs, name='api_export_jobs'),
+    path('api/exports/<int:pk>/', views.api_export_job_detail, name='api_export_job_detail'),
+    path('api/exports/<int:pk>/download/', views.api_export_job_download, name='api_export_job_download'),
+    path('api/changes/', views.api_changes, name='api_changes'),
+    path('api/cache/stats/', views.api_cache_stats, name='api_cache_stats'),
 
     # Dev-only debug endpoint (remove in production)
     path('debug/inspect/', views.debug_request_inspect, name='debug_inspect'),
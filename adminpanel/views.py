@@ -1,19 +1,22 @@
 # adminpanel/views.py
 import csv
+import io
 import logging
 from django.http import StreamingHttpResponse, JsonResponse
-from django.utils.encoding import smart_str
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import user_passes_test, login_required
 from django.views.decorators.cache import never_cache
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.http import require_http_methods
 from django.db.models import Q, Count, F
 from django.utils.dateparse import parse_date
+from django.utils import timezone
 from django.contrib import messages
 from django import forms
 from rest_framework import status, serializers as drf_serializers
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.urls import reverse
 from django.core.mail import EmailMultiAlternatives
@@ -25,14 +28,25 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 
 # local imports (models + serializers)
-from adminpanel.models import Category, Grievance, GrievanceRemark, ChangeLog, Department
+from adminpanel.models import Category, Grievance, GrievanceRemark, ChangeLog, Department, SLAPolicy, ExportJob
 from .serializers import (
     CategorySerializer,
-    GrievanceListSerializer,
     GrievanceDetailSerializer,
     GrievanceCreateUpdateSerializer,
     GrievanceRemarkSerializer,
+    GrievanceRowSerializer,
+    SLAPolicySerializer,
+    ExportJobSerializer,
+    parse_fieldsets,
 )
+from .pagination import paginate_keyset, InvalidCursor
+from .counting import count_grievances
+from .filters import GrievanceFilterSpec
+from .loaders import attach_remarks, get_grievance, load_grievance_detail
+from .conditional import (
+    grievance_detail_validators, grievance_list_validators, rollup_validators, make_etag, not_modified, set_validators,
+)
+from . import cache as admin_cache, changes, columnar, exportjobs, exports, imports, lifecycle, resolution, retriage, rollups, sla, suggest, timeseries, workload
 from accounts.permissions import IsAdminPanel
 
 logger = logging.getLogger(__name__)
@@ -138,7 +152,8 @@ class SettingsForm(forms.Form):
 @never_cache
 @user_passes_test(is_admin_user, login_url="accounts:login")
 def dashboard_view(request):
-    return render(request, "adminpanel/dashboard.html")
+    # first paint renders from the embedded payload instead of four API round trips
+    return render(request, "adminpanel/dashboard.html", {"bootstrap": dashboard_bootstrap_data(request)})
 
 
 @login_required
@@ -305,9 +320,10 @@ def reset_password_page(request):
 @user_passes_test(is_admin_user)
 @require_http_methods(["GET", "POST"])
 def settings_page(request):
+    # the SLA is the global SLAPolicy (it sets Grievance.due_at); the rest are per-session preferences
     initial = {
         'default_page_size': request.session.get('settings_default_page_size', 25),
-        'sla_days': request.session.get('settings_sla_days', 7),
+        'sla_days': sla.global_days(),
         'notifications_enabled': request.session.get('settings_notifications_enabled', True),
         'notification_email': request.session.get('settings_notification_email', request.user.email),
     }
@@ -316,37 +332,57 @@ def settings_page(request):
         if form.is_valid():
             data = form.cleaned_data
             request.session['settings_default_page_size'] = data['default_page_size']
-            request.session['settings_sla_days'] = data['sla_days']
+            SLAPolicy.objects.update_or_create(category=None, department=None, defaults={'days': data['sla_days']})
             request.session['settings_notifications_enabled'] = data['notifications_enabled']
             request.session['settings_notification_email'] = data['notification_email']
-            messages.success(request, 'Settings saved (session store).')
+            messages.success(request, 'Settings saved (SLA applied to all open grievances).')
             return redirect('adminpanel:settings')
     else:
         form = SettingsForm(initial=initial)
     return render(request, 'adminpanel/settings.html', {'form': form})
 
 
-# -----------------------
-# CSV Export Helper
-# -----------------------
-class Echo:
-    """Object that implements write() for csv.writer to stream."""
-    def write(self, value):
-        return value
-
-
 # -----------------------
 # API VIEWS (DRF)
 # -----------------------
 
 # Categories: list/create
+def category_list_data(request):
+    """Categories with grievance counts (cached until a category, department or grievance changes)."""
+    def compute():
+        qs = Category.objects.select_related("department").annotate(grievance_count=Count("grievances")).order_by("department__name", "name")
+        return list(CategorySerializer(qs, many=True, context={"request": request}).data)
+    return admin_cache.get_or_compute("categories", ("categories", "grievances"), compute)
+
+
+def officer_list_data():
+    """Officers for assignment selects (cached until a user changes)."""
+    def compute():
+        qs = User.objects.filter(role='officer').order_by('username')
+        return [
+            {
+                'id': u.id,
+                'username': u.username,
+                'full_name': u.get_full_name(),
+                'email': u.email,
+            }
+            for u in qs
+        ]
+    return admin_cache.get_or_compute("officers", ("users",), compute)
+
+
+def officers_with_workload():
+    """Officers with their open load: the cached list plus one read of the workload table."""
+    officers = officer_list_data()
+    loads = workload.by_officer([o["id"] for o in officers])
+    return [{**o, "workload": loads.get(o["id"], workload.EMPTY)} for o in officers]
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated, IsAdminPanel])
 def api_categories_list_create(request):
     if request.method == "GET":
-        qs = Category.objects.select_related("department").annotate(grievance_count=Count("grievances")).order_by("department__name", "name")
-        serializer = CategorySerializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        return Response(category_list_data(request))
 
     # POST: normalize department (name -> id)
     data = request.data.copy()
@@ -409,51 +445,25 @@ def api_grievances_list(request):
         serializer = GrievanceCreateUpdateSerializer(data=data, context={"request": request})
         if serializer.is_valid():
             obj = serializer.save()
-            return Response(GrievanceDetailSerializer(obj, context={"request": request}).data, status=status.HTTP_201_CREATED)
+            return Response(GrievanceDetailSerializer(load_grievance_detail(obj.pk), context={"request": request}).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    qs = Grievance.objects.select_related("user", "category", "department", "assigned_officer").all().order_by("-created_at")
-
-    # Filters (same as you had; supports category id/name etc)
-    status_q = request.GET.get("status")
-    if status_q:
-        qs = qs.filter(status__iexact=status_q)
-
-    category_q = request.GET.get("category")
-    if category_q:
-        if str(category_q).isdigit():
-            qs = qs.filter(category__id=int(category_q))
-        else:
-            qs = qs.filter(category__name__icontains=category_q)
-
-    assigned_q = request.GET.get("assigned_officer") or request.GET.get("assigned_to") or request.GET.get("assigned")
-    if assigned_q and str(assigned_q).isdigit():
-        qs = qs.filter(assigned_officer__id=int(assigned_q))
-
-    user_q = request.GET.get("user")
-    if user_q and str(user_q).isdigit():
-        qs = qs.filter(user__id=int(user_q))
-
-    search = request.GET.get("search")
-    if search:
-        qs = qs.filter(
-            Q(title__icontains=search)
-            | Q(description__icontains=search)
-            | Q(user__username__icontains=search)
-            | Q(user__first_name__icontains=search)
-            | Q(user__last_name__icontains=search)
-        )
+    # status/category/assigned/user/date/search filters (shared with export and analytics);
+    # a search ranks by relevance (cursor mode re-orders by the keyset)
+    try:
+        spec = GrievanceFilterSpec.from_params(request.GET)
+    except drf_serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    qs = spec.queryset()
 
-    date_from = request.GET.get("date_from")
-    date_to = request.GET.get("date_to")
-    if date_from:
-        d = parse_date(date_from)
-        if d:
-            qs = qs.filter(created_at__date__gte=d)
-    if date_to:
-        d = parse_date(date_to)
-        if d:
-            qs = qs.filter(created_at__date__lte=d)
+    # conditional GET: 304 when nothing under this filter changed since the client's copy.
+    # Offset pages report a count (cached / estimated), which also tells deletes apart.
+    cursor_mode = "cursor" in request.GET or request.GET.get("pagination") == "cursor"
+    count = None if cursor_mode else count_grievances(qs, spec)
+    etag, last_modified = grievance_list_validators(request, spec, count=count)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
 
     # Pagination-esque: limit/offset
     try:
@@ -463,25 +473,168 @@ def api_grievances_list(request):
         limit = 0
         offset = 0
 
-    total = qs.count()
+    # Rows are built from .values() (see GrievanceRowSerializer); ?fields= / ?expand= trim
+    # the payload and the joins, ?description_preview=N adds a truncated description.
+    try:
+        fields, expand = parse_fieldsets(request.GET, GrievanceRowSerializer.fields_allowed)
+        preview_length = int(request.GET.get("description_preview") or 0) or None
+    except drf_serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({"description_preview": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    row_serializer = GrievanceRowSerializer(fields, expand, preview_length)
+
+    # Cursor mode: keyset on (created_at, id), no COUNT(*). Offset mode is kept for old clients.
+    if cursor_mode:
+        try:
+            rows, next_cursor, prev_cursor = paginate_keyset(row_serializer.queryset(qs), request.GET.get("cursor"), limit if limit > 0 else 100)
+        except InvalidCursor as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        payload = {"next": next_cursor, "prev": prev_cursor, "results": row_serializer.to_rows(rows)}
+        if request.GET.get("with_count") == "1":
+            payload["count"], payload["count_is_estimate"] = count_grievances(qs, spec)
+        return set_validators(Response(payload), etag, last_modified)
+
+    total, total_is_estimate = count
+    page = row_serializer.queryset(qs)
     if limit > 0:
-        qs = qs[offset: offset + limit]
+        page = page[offset: offset + limit]
+    else:
+        page = page[offset: offset + 100]
+
+    response = Response({"count": total, "count_is_estimate": total_is_estimate, "results": row_serializer.to_rows(page)})
+    return set_validators(response, etag, last_modified)
+
+
+# Overdue grievances: open and past due_at, most overdue first
+OVERDUE_ROW_FIELDS = ("id", "tracking_id", "title", "status", "category", "department", "assigned_officer", "created_at", "due_at")
+OVERDUE_MAX_LIMIT = 500
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_grievances_overdue(request):
+    statuses = Grievance.OPEN_STATUSES
+    if request.GET.get("status"):
+        if request.GET["status"] not in Grievance.OPEN_STATUSES:
+            return Response({"status": f"Must be one of: {', '.join(Grievance.OPEN_STATUSES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        statuses = (request.GET["status"],)
+    try:
+        limit = int(request.GET.get("limit") or 100)
+    except ValueError:
+        return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, OVERDUE_MAX_LIMIT))
+
+    # one (status, due_at) index range per status, merged by deadline
+    now = timezone.now()
+    querysets = sla.overdue_querysets(now, statuses=statuses)
+    row_serializer = GrievanceRowSerializer(OVERDUE_ROW_FIELDS, set())
+    rows = sla.merge_overdue([row_serializer.queryset(qs) for qs in querysets.values()], limit)
+    results = row_serializer.to_rows(rows)
+    for row, out in zip(rows, results):
+        out["overdue_days"] = sla.overdue_days(row["due_at"], now)
+    return Response({
+        "as_of": now.isoformat(),
+        "count": sum(qs.count() for qs in querysets.values()),
+        "results": results,
+    })
+
+
+# Bulk import: a multipart "file" (.csv / .ndjson / .jsonl, or ?input=csv|ndjson) or a raw
+# text/csv / application/x-ndjson body; ?create_missing=1 creates unknown departments,
+# ?dry_run=1 only validates. Rows are validated and inserted in batches (see imports.py).
+IMPORT_CONTENT_TYPES = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+IMPORT_EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_grievances_import(request):
+    content_type = (request.content_type or "").split(";")[0].strip().lower()
+    fmt = request.GET.get("input")
+    if content_type.startswith("multipart/"):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = fmt or IMPORT_EXTENSIONS.get(upload.name.rsplit(".", 1)[-1].lower())
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    else:
+        fmt = fmt or IMPORT_CONTENT_TYPES.get(content_type)
+        try:
+            stream = io.StringIO(request.body.decode("utf-8-sig"), newline="")
+        except UnicodeDecodeError:
+            return Response({"detail": "The body must be UTF-8."}, status=status.HTTP_400_BAD_REQUEST)
+    if fmt not in imports.FORMATS:
+        return Response({"input": f"Cannot tell the format; pass ?input= one of: {', '.join(imports.FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result = imports.import_rows(
+            imports.read_rows(stream, fmt),
+            create_missing=request.GET.get("create_missing") == "1",
+            dry_run=request.GET.get("dry_run") == "1",
+            user=request.user,
+        )
+    except (UnicodeDecodeError, csv.Error) as exc:
+        return Response({"detail": f"Unreadable {fmt} input: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+    if not result["rows"]:
+        return Response({"detail": "No rows to import."}, status=status.HTTP_400_BAD_REQUEST)
+    if result["dry_run"]:
+        code = status.HTTP_200_OK
+    elif result["created"]:
+        code = status.HTTP_201_CREATED
     else:
-        qs = qs[offset: offset + 100]
+        code = status.HTTP_400_BAD_REQUEST
+    return Response(result, status=code)
+
+
+# Bulk retriage: {"ids": [...]} or {"filter": {list filter params}} plus "status" and/or
+# "assigned_officer" (null unassigns). One transaction and one UPDATE; the response is a
+# count summary, not detail payloads (see retriage.py).
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_grievances_bulk(request):
+    try:
+        ids, changes = retriage.parse(request.data)
+    except drf_serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    return Response(retriage.apply(ids, user=request.user, **changes))
 
-    serializer = GrievanceListSerializer(qs, many=True, context={"request": request})
-    return Response({"count": total, "results": serializer.data})
+
+# Typeahead: tracking-ID / title prefix suggestions (index range scans only)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_grievance_suggest(request):
+    try:
+        limit = int(request.GET.get("limit") or suggest.DEFAULT_LIMIT)
+    except ValueError:
+        limit = suggest.DEFAULT_LIMIT
+    return Response({"results": suggest.suggest_grievances(request.GET.get("q"), limit)})
 
 
 # Grievance detail: get/update/delete
 @api_view(["GET", "PATCH", "PUT", "DELETE"])
 @permission_classes([IsAuthenticated, IsAdminPanel])
 def api_grievance_detail(request, pk):
-    grievance = get_object_or_404(Grievance, pk=pk)
+    grievance = get_grievance(pk)
 
     if request.method == "GET":
-        serializer = GrievanceDetailSerializer(grievance, context={"request": request})
-        return Response(serializer.data)
+        try:
+            fields, expand = parse_fieldsets(request.GET, GrievanceDetailSerializer.Meta.fields)
+        except drf_serializers.ValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        etag, last_modified = grievance_detail_validators(grievance, request)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        # remarks come one page at a time: newest ?remarks_limit=, older via ?remarks_cursor=
+        try:
+            attach_remarks(grievance, request.GET.get("remarks_cursor"), request.GET.get("remarks_limit"))
+        except InvalidCursor as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({"remarks_limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = GrievanceDetailSerializer(grievance, fields=fields, expand=expand, context={"request": request})
+        return set_validators(Response(serializer.data), etag, last_modified)
 
     if request.method in ("PATCH", "PUT"):
         partial = request.method == "PATCH"
@@ -494,7 +647,7 @@ def api_grievance_detail(request, pk):
         serializer = GrievanceCreateUpdateSerializer(grievance, data=data, partial=partial, context={"request": request})
         if serializer.is_valid():
             before_status = grievance.status
-            before_assigned = getattr(grievance.assigned_officer, "pk", None)
+            before_assigned = grievance.assigned_officer_id
 
             updated = serializer.save()
 
@@ -507,7 +660,7 @@ def api_grievance_detail(request, pk):
                     after=str(updated.status),
                 )
 
-            after_assigned = getattr(updated.assigned_officer, "pk", None)
+            after_assigned = updated.assigned_officer_id
             if str(before_assigned) != str(after_assigned):
                 ChangeLog.objects.create(
                     user=request.user,
@@ -517,7 +670,7 @@ def api_grievance_detail(request, pk):
                     after=str(after_assigned),
                 )
 
-            return Response(GrievanceDetailSerializer(updated, context={"request": request}).data)
+            return Response(GrievanceDetailSerializer(load_grievance_detail(updated.pk), context={"request": request}).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     # DELETE guard: cannot delete if feedback or resolved
@@ -531,7 +684,7 @@ def api_grievance_detail(request, pk):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated, IsAdminPanel])
 def api_grievance_assign(request, pk):
-    grievance = get_object_or_404(Grievance, pk=pk)
+    grievance = get_grievance(pk)
     officer_id = request.data.get("assigned_officer") or request.data.get("assigned_to") or request.data.get("assigned")
     if not officer_id:
         return Response({"detail": "assigned_officer is required"}, status=status.HTTP_400_BAD_REQUEST)
@@ -545,7 +698,7 @@ def api_grievance_assign(request, pk):
     if not is_officer:
         return Response({"detail": "Selected user is not an officer"}, status=status.HTTP_400_BAD_REQUEST)
 
-    before_assigned = getattr(grievance.assigned_officer, "pk", None)
+    before_assigned = grievance.assigned_officer_id
     grievance.assigned_officer = officer
     grievance.save()
 
@@ -557,7 +710,7 @@ def api_grievance_assign(request, pk):
         after=str(getattr(officer, "pk", None)),
     )
 
-    serializer = GrievanceDetailSerializer(grievance, context={"request": request})
+    serializer = GrievanceDetailSerializer(attach_remarks(grievance), context={"request": request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -575,78 +728,256 @@ def api_grievance_add_remark(request, pk):
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+# cached analytics summaries depend on grievance rows and category names
+ANALYTICS_DEPENDS_ON = ("grievances", "categories")
+
+
+def analytics_summary(spec, use_rollup, window_days=None, with_percentiles=False, with_lifecycle=False):
+    """The api_analytics payload, from the rollup when the spec allows it, else live."""
+    if use_rollup:
+        payload = rollups.summary(spec)
+    else:
+        base = spec.queryset(rank=False).order_by()
+        status_qs = base.values("status").annotate(count=Count("id"))
+        cat_qs = base.filter(category__isnull=False).values("category_id", "category__name").annotate(count=Count("id")).order_by("-count")
+        payload = {
+            "total_grievances": base.count(),
+            "by_status": {item["status"]: item["count"] for item in status_qs},
+            "by_category": [{"id": c["category_id"], "name": c["category__name"], "count": c["count"]} for c in cat_qs],
+            "avg_resolution_days": resolution.average_days(resolution.resolved_queryset(spec)),
+        }
+
+    # both paths sum the lifecycle projection's resolution_seconds, as the percentiles do;
+    # a window counts by resolution date, which the rollup (by created day) cannot answer
+    if window_days:
+        payload["avg_resolution_days"] = resolution.average_days(resolution.resolved_queryset(spec, window_days))
+    if with_percentiles:
+        payload["resolution"] = resolution.resolution_stats(spec, window_days)
+    if with_lifecycle:
+        payload["lifecycle"] = lifecycle.summary(spec)
+    return payload
+
+
+def analytics_cache_parts(spec, window_days=None, with_percentiles=False, with_lifecycle=False):
+    # a window moves with the calendar, so the day is part of the key
+    window_key = timezone.localdate().isoformat() if window_days else None
+    return (spec.signature, window_days, with_percentiles, with_lifecycle, window_key)
+
+
+def cached_analytics_summary(spec, window_days=None, with_percentiles=False, with_lifecycle=False):
+    """analytics_summary() through the versioned cache (shared by the analytics and bootstrap APIs)."""
+    return admin_cache.get_or_compute(
+        "analytics", ANALYTICS_DEPENDS_ON,
+        lambda: analytics_summary(spec, rollups.supports(spec), window_days, with_percentiles, with_lifecycle),
+        *analytics_cache_parts(spec, window_days, with_percentiles, with_lifecycle),
+    )
+
+
 # Analytics summary
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminPanel])
 def api_analytics(request):
-    total = Grievance.objects.count()
+    # accepts the same filter params as the list endpoint
+    try:
+        spec = GrievanceFilterSpec.from_params(request.GET)
+    except drf_serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
 
-    status_qs = Grievance.objects.values("status").annotate(count=Count("id"))
-    by_status = {item["status"]: item["count"] for item in status_qs}
+    # ?window=N: resolution stats over grievances resolved in the last N days;
+    # ?percentiles=1 adds p50/p90/p99 overall and per category/department;
+    # ?lifecycle=1 adds assignment/status-time averages from the lifecycle projection
+    try:
+        window_days = int(request.GET.get("window") or 0) or None
+    except ValueError:
+        return Response({"window": "Must be a number of days."}, status=status.HTTP_400_BAD_REQUEST)
+    if window_days is not None and window_days < 1:
+        return Response({"window": "Must be a number of days."}, status=status.HTTP_400_BAD_REQUEST)
+    with_percentiles = request.GET.get("percentiles") == "1"
+    with_lifecycle = request.GET.get("lifecycle") == "1"
+    cache_parts = analytics_cache_parts(spec, window_days, with_percentiles, with_lifecycle)
+    window_key = cache_parts[-1]
+
+    # status/category/date filters are answered from the daily rollup (O(days)); the
+    # others (search, assignee, user, category name) need the live grievance rows
+    use_rollup = rollups.supports(spec)
+    if admin_cache.enabled():
+        # the cache key already changes with every relevant write: no watermark query needed
+        etag, last_modified = make_etag(admin_cache.entry_key("analytics", ANALYTICS_DEPENDS_ON, *cache_parts)), None
+    elif use_rollup:
+        etag, last_modified = rollup_validators(request, spec, window_key)
+    else:
+        # the summary is derived from the same rows as the list, so the list watermark applies
+        etag, last_modified = grievance_list_validators(request, spec, window_key)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
 
-    cat_qs = Category.objects.annotate(count=Count("grievances")).filter(count__gt=0).order_by("-count")
-    by_category = [{"id": c.id, "name": c.name, "count": c.count} for c in cat_qs]
+    payload = cached_analytics_summary(spec, window_days, with_percentiles, with_lifecycle)
+    return set_validators(Response(payload), etag, last_modified)
 
-    resolved_qs = Grievance.objects.filter(status=Grievance.STATUS_RESOLVED).annotate(
-        resolution_time=F("updated_at") - F("created_at")
-    ).values_list("resolution_time", flat=True)
 
-    avg_days = None
-    times = list(resolved_qs)
-    if times:
-        total_seconds = sum([t.total_seconds() if hasattr(t, "total_seconds") else 0 for t in times])
-        avg_days = round((total_seconds / len(times)) / 86400, 2)
+# the dashboard table's first page: the columns it shows, newest first, with a count
+DASHBOARD_ROW_FIELDS = ("id", "title", "user", "category", "status")
+DASHBOARD_PAGE_SIZE = 25
+DASHBOARD_MAX_PAGE_SIZE = 100
 
-    return Response({
-        "total_grievances": total,
-        "by_status": by_status,
-        "by_category": by_category,
-        "avg_resolution_days": avg_days,
-    })
 
+def dashboard_first_page(limit=DASHBOARD_PAGE_SIZE):
+    """
+    The unfiltered first cursor page, in the api_grievances_list response shape
+    (cached: row usernames and category names come along, hence the extra namespaces).
+    """
+    def compute():
+        spec = GrievanceFilterSpec()
+        qs = spec.queryset()
+        row_serializer = GrievanceRowSerializer(DASHBOARD_ROW_FIELDS, set())
+        rows, next_cursor, prev_cursor = paginate_keyset(row_serializer.queryset(qs), None, limit)
+        count, count_is_estimate = count_grievances(qs, spec)
+        return {
+            "next": next_cursor, "prev": prev_cursor, "results": row_serializer.to_rows(rows),
+            "count": count, "count_is_estimate": count_is_estimate,
+        }
+    return admin_cache.get_or_compute("dashboard_page", ("grievances", "categories", "users"), compute, limit)
 
-# Export CSV (streaming)
+
+def dashboard_bootstrap_data(request, limit=DASHBOARD_PAGE_SIZE):
+    """Everything the admin dashboard renders on load, from the same cached helpers as the single APIs."""
+    return {
+        "analytics": cached_analytics_summary(GrievanceFilterSpec()),
+        "categories": category_list_data(request),
+        "officers": officers_with_workload(),
+        "grievances": dashboard_first_page(limit),
+    }
+
+
+# Dashboard bootstrap: analytics + categories + officers + first grievance page in one response
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminPanel])
-def api_export_grievances_csv(request):
-    qs = Grievance.objects.select_related('user', 'category', 'department', 'assigned_officer').order_by('-created_at')
+def api_dashboard_bootstrap(request):
+    try:
+        limit = int(request.GET.get("limit") or DASHBOARD_PAGE_SIZE)
+    except ValueError:
+        return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, DASHBOARD_MAX_PAGE_SIZE))
+    return Response(dashboard_bootstrap_data(request, limit))
 
-    # apply filters similar to list endpoint
-    status_q = request.GET.get("status")
-    if status_q:
-        qs = qs.filter(status__iexact=status_q)
 
-    category_q = request.GET.get("category")
-    if category_q:
-        if str(category_q).isdigit():
-            qs = qs.filter(category__id=int(category_q))
-        else:
-            qs = qs.filter(category__name__icontains=category_q)
-
-    assigned_q = request.GET.get("assigned_officer") or request.GET.get("assigned_to") or request.GET.get("assigned")
-    if assigned_q and str(assigned_q).isdigit():
-        qs = qs.filter(assigned_officer__id=int(assigned_q))
-
-    search = request.GET.get("search")
-    if search:
-        qs = qs.filter(
-            Q(title__icontains=search)
-            | Q(description__icontains=search)
-            | Q(user__username__icontains=search)
-            | Q(user__first_name__icontains=search)
-            | Q(user__last_name__icontains=search)
-        )
+# Analytics trend series: ?bucket=day|week|month&date_from=&date_to= plus list filters
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_analytics_timeseries(request):
+    bucket = request.GET.get("bucket") or "day"
+    if bucket not in timeseries.BUCKETS:
+        return Response({"bucket": f"Must be one of: {', '.join(timeseries.BUCKETS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # the date range picks the buckets; every other filter narrows the rows
+    params = request.GET.copy()
+    raw_from, raw_to = params.pop("date_from", [""])[0], params.pop("date_to", [""])[0]
+    if "officer" in params and "assigned_officer" not in params:
+        params["assigned_officer"] = params["officer"]
+    try:
+        spec = GrievanceFilterSpec.from_params(params)
+    except drf_serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    today = timezone.localdate()
+    default_from, default_to = timeseries.default_range(bucket, today)
+    try:
+        date_from = parse_date(raw_from) if raw_from else default_from
+        date_to = parse_date(raw_to) if raw_to else (today if raw_from else default_to)
+    except ValueError:
+        date_from = date_to = None
+    if date_from is None or date_to is None:
+        return Response({"detail": "Dates must be YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+    if date_from > date_to:
+        return Response({"detail": "date_from must not be after date_to."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(timeseries.bucket_range(date_from, date_to, bucket)) > timeseries.MAX_BUCKETS:
+        return Response({"detail": f"Too many buckets (max {timeseries.MAX_BUCKETS}); use a wider bucket."}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(timeseries.build_timeseries(spec, bucket, date_from, date_to))
 
-    date_from = request.GET.get("date_from")
-    date_to = request.GET.get("date_to")
-    if date_from:
-        d = parse_date(date_from)
-        if d:
-            qs = qs.filter(created_at__date__gte=d)
-    if date_to:
-        d = parse_date(date_to)
-        if d:
-            qs = qs.filter(created_at__date__lte=d)
+
+# Ad-hoc breakdowns over the columnar snapshot (see columnar.py / export_analytics_snapshot):
+# ?group_by=officer,category,month&metric=resolution_days&aggs=mean,p50,p90
+#  &status=&category=&department=&officer=&date_from=&date_to=&limit=
+SNAPSHOT_MAX_DIMENSIONS = 4
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_analytics_snapshot(request):
+    errors = {}
+    dimensions = [d for d in (request.GET.get("group_by") or "").split(",") if d]
+    if any(d not in columnar.DIMENSIONS for d in dimensions) or len(set(dimensions)) != len(dimensions):
+        errors["group_by"] = f"Comma-separated, distinct, from: {', '.join(columnar.DIMENSIONS)}."
+    elif len(dimensions) > SNAPSHOT_MAX_DIMENSIONS:
+        errors["group_by"] = f"At most {SNAPSHOT_MAX_DIMENSIONS} dimensions."
+    metric = request.GET.get("metric") or None
+    if metric is not None and metric not in columnar.METRICS:
+        errors["metric"] = f"Must be one of: {', '.join(columnar.METRICS)}."
+    aggregates = [a for a in (request.GET.get("aggs") or "count,mean,p50,p90").split(",") if a]
+    if any(a not in columnar.AGGREGATES for a in aggregates):
+        errors["aggs"] = f"Comma-separated, from: {', '.join(columnar.AGGREGATES)}."
+
+    filters = {}
+    raw_status = request.GET.get("status")
+    if raw_status:
+        if raw_status not in columnar.STATUSES:
+            errors["status"] = f"Must be one of: {', '.join(columnar.STATUSES)}."
+        filters["status"] = raw_status
+    for name in ("category", "department", "officer", "limit"):
+        raw = request.GET.get(name)
+        if raw:
+            try:
+                filters[name] = int(raw)
+            except ValueError:
+                errors[name] = "Must be an integer."
+    for name, key in (("date_from", "created_from"), ("date_to", "created_to")):
+        raw = request.GET.get(name)
+        if raw:
+            try:
+                filters[key] = parse_date(raw)
+            except ValueError:
+                filters[key] = None
+            if filters[key] is None:
+                errors[name] = "Must be YYYY-MM-DD."
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+    limit = filters.pop("limit", None)
+
+    meta = columnar.read_meta()
+    if columnar.np is None or meta is None:
+        detail = "NumPy is not installed." if columnar.np is None else "No analytics snapshot yet: run export_analytics_snapshot."
+        return Response({"detail": detail}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    # a snapshot version never changes, so it keys the result (names follow categories/users)
+    payload = admin_cache.get_or_compute(
+        "analytics_snapshot", ("categories", "users"),
+        lambda: columnar.query(dimensions, metric, aggregates, filters, limit),
+        meta["version"], ",".join(dimensions), metric, ",".join(aggregates),
+        "&".join(f"{k}={v}" for k, v in sorted(filters.items())), limit,
+    )
+    return Response(payload)
+
+
+# Export (streaming): CSV by default; ?format=ndjson (or jsonl, or the matching Accept
+# type) for one JSON object per line, with ?include=remarks,feedback,department
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+@renderer_classes([JSONRenderer, exports.CSVRenderer, exports.NDJSONRenderer, exports.JSONLinesRenderer])
+def api_export_grievances_csv(request):
+    try:
+        spec = GrievanceFilterSpec.from_params(request.GET)
+    except drf_serializers.ValidationError as exc:
+        return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    qs = spec.queryset(rank=False)
+
+    as_ndjson = request.accepted_renderer.format in ("ndjson", "jsonl")
+    include = [name for name in (request.GET.get('include') or '').split(',') if name]
+    if include and (not as_ndjson or any(name not in exports.NDJSON_INCLUDES for name in include)):
+        return Response(
+            {"include": f"NDJSON only; comma-separated, from: {', '.join(exports.NDJSON_INCLUDES)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     export_all = request.GET.get('export_all') == '1'
     if not export_all:
@@ -660,52 +991,158 @@ def api_export_grievances_csv(request):
             offset = 0
         qs = qs[offset: offset + limit]
 
-    def row_iter():
-        pseudo_buffer = Echo()
-        writer = csv.writer(pseudo_buffer)
-        yield writer.writerow([
-            'id','tracking_id','title','description','status','category','department',
-            'user_id','username','assigned_officer_id','assigned_officer_username',
-            'created_at','updated_at'
-        ]).encode('utf-8')
-        for g in qs.iterator():
-            yield writer.writerow([
-                smart_str(g.id),
-                smart_str(g.tracking_id),
-                smart_str(g.title),
-                smart_str(g.description),
-                smart_str(g.status),
-                smart_str(getattr(g.category, 'name', '') if g.category else ''),
-                smart_str(getattr(g.department, 'name', '') if g.department else ''),
-                smart_str(getattr(g.user, 'id', '')),
-                smart_str(getattr(g.user, 'username', '')),
-                smart_str(getattr(g.assigned_officer, 'id', '')),
-                smart_str(getattr(g.assigned_officer, 'username', '')),
-                smart_str(g.created_at.isoformat() if g.created_at else ''),
-                smart_str(g.updated_at.isoformat() if g.updated_at else ''),
-            ]).encode('utf-8')
-
-    filename = "grievances_export.csv"
-    resp = StreamingHttpResponse(row_iter(), content_type="text/csv; charset=utf-8")
+    if as_ndjson:
+        filename, content_type = "grievances_export.ndjson", "application/x-ndjson; charset=utf-8"
+        chunks = exports.ndjson_chunks(qs, include)
+    else:
+        filename, content_type = "grievances_export.csv", "text/csv; charset=utf-8"
+        chunks = exports.csv_chunks(qs)
+    compress = exports.accepts_gzip(request)
+    resp = StreamingHttpResponse(exports.gzip_stream(chunks) if compress else chunks, content_type=content_type)
+    if compress:
+        resp['Content-Encoding'] = 'gzip'
+    patch_vary_headers(resp, ('Accept', 'Accept-Encoding'))
     resp['Content-Disposition'] = f'attachment; filename="{filename}"'
     return resp
 
 
-# User status (officers list for selects)
+# User status (officers list for selects, with each officer's open workload)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsAdminPanel])
 def api_user_status(request):
-    qs = User.objects.filter(role='officer').order_by('username')
-    officers = [
-        {
-            'id': u.id,
-            'username': u.username,
-            'full_name': u.get_full_name(),
-            'email': u.email,
-        }
-        for u in qs
-    ]
-    return Response({'officers': officers})
+    return Response({'officers': officers_with_workload()})
+
+
+# SLA policies: list/create (global, per category, per department)
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_sla_policies_list_create(request):
+    if request.method == "GET":
+        qs = SLAPolicy.objects.order_by("category_id", "department_id")
+        return Response({"default_days": sla.global_days(), "results": SLAPolicySerializer(qs, many=True).data})
+
+    serializer = SLAPolicySerializer(data=request.data)
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+# SLA policy detail: get/update/delete (deadlines of open grievances follow, see signals.py)
+@api_view(["GET", "PUT", "PATCH", "DELETE"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_sla_policy_detail(request, pk):
+    policy = get_object_or_404(SLAPolicy, pk=pk)
+
+    if request.method == "GET":
+        return Response(SLAPolicySerializer(policy).data)
+
+    if request.method in ("PUT", "PATCH"):
+        serializer = SLAPolicySerializer(policy, data=request.data, partial=request.method == "PATCH")
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    policy.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# Export jobs: list recent / enqueue. POST takes the list filter params plus format
+# (csv|ndjson) and include (NDJSON only); the file is written by a background worker
+EXPORT_JOB_OPTIONS = ("format", "include")
+EXPORT_JOBS_LISTED = 50
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_export_jobs(request):
+    if request.method == "GET":
+        qs = ExportJob.objects.select_related("created_by")[:EXPORT_JOBS_LISTED]
+        return Response({"results": ExportJobSerializer(qs, many=True).data})
+
+    data = request.data
+    fmt = str(data.get("format") or "csv")
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    include = data.get("include") or []
+    if isinstance(include, str):
+        include = [name for name in include.split(",") if name]
+    errors = {}
+    if fmt not in exportjobs.EXTENSIONS:
+        errors["format"] = f"Must be one of: {', '.join(exportjobs.EXTENSIONS)}."
+    if include and (fmt != "ndjson" or any(name not in exports.NDJSON_INCLUDES for name in include)):
+        errors["include"] = f"NDJSON only; from: {', '.join(exports.NDJSON_INCLUDES)}."
+    params = {key: str(value) for key, value in data.items() if key not in EXPORT_JOB_OPTIONS and value not in (None, "")}
+    try:
+        GrievanceFilterSpec.from_params(params)
+    except drf_serializers.ValidationError as exc:
+        errors.update(exc.detail)
+    if errors:
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    job = exportjobs.enqueue(request.user, params, fmt, include)
+    resp = Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    resp["Location"] = reverse("adminpanel:api_export_job_detail", args=[job.pk])
+    return resp
+
+
+# Export job status / progress; DELETE cancels a pending job or removes a finished one
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_export_job_detail(request, pk):
+    job = get_object_or_404(ExportJob.objects.select_related("created_by"), pk=pk)
+    if request.method == "DELETE":
+        exportjobs.cancel(job)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(ExportJobSerializer(job).data)
+
+
+# Export job file; supports Range / If-Range so interrupted downloads resume
+@api_view(["GET", "HEAD"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_export_job_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk)
+    if job.status != ExportJob.STATUS_DONE or not exportjobs.file_path(job).is_file():
+        return Response({"detail": f"Export is {job.status}, not ready for download."}, status=status.HTTP_409_CONFLICT)
+    return exportjobs.download_response(request, job)
+
+
+# Change feed for incremental sync (see adminpanel/changes.py): ?since=<cursor> (0 for the
+# start of the retained log, "latest" for the current head), ?limit=, ?wait=<seconds> to
+# long-poll while nothing new has been committed.
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_changes(request):
+    since = request.GET.get("since")
+    if since == "latest":
+        return Response({"changes": [], "next": str(changes.head()), "has_more": False})
+    try:
+        since = int(since)
+        if since < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return Response({"since": "Must be a cursor from a previous response, 0 or latest."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.GET.get("limit") or 0)
+        wait = float(request.GET.get("wait") or 0)
+    except ValueError:
+        return Response({"detail": "limit and wait must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return Response(changes.poll(since, limit or None, max(0.0, wait)))
+    except changes.CursorExpired as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_410_GONE)
+
+
+# Cache hit/miss counters and namespace versions (see adminpanel/cache.py)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, IsAdminPanel])
+def api_cache_stats(request):
+    return Response({
+        "enabled": admin_cache.enabled(),
+        "versions": admin_cache.versions(admin_cache.NAMESPACES),
+        "entries": admin_cache.stats(("analytics", "grievance_count", "categories", "officers", "dashboard_page", "sla_policies", "analytics_snapshot")),
+    })
 
 
 # Admin create user serializer & list/create API (kept concise)
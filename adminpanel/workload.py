@@ -0,0 +1,206 @@
+# adminpanel/workload.py
+"""
+Incremental maintenance of OfficerWorkload and the per-officer load it serves.
+
+A grievance counts towards its assigned officer while its status is open (new,
+in_progress, escalated). Saves and deletes move that contribution, the same way the
+analytics rollup is maintained (see rollups.py and signals.py):
+
+  - post_save subtracts the stored row's contribution and adds the new one, and stamps
+    last_assigned_at when the officer changed
+  - post_delete subtracts the contribution
+
+Counts move with F() updates; oldest_open_at only needs an indexed lookup on
+(assigned_officer, created_at) when the oldest open grievance leaves the set.
+Code that bypasses model signals (queryset.update(), bulk_create) must call
+record_change() / record_changes() itself or leave the table to `rebuild_workload`.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Subquery
+from django.utils import timezone
+
+from adminpanel.models import ChangeLog, Grievance, OfficerWorkload
+
+OPEN_STATUSES = Grievance.OPEN_STATUSES
+COUNT_FIELDS = {status: f"{status}_count" for status in OPEN_STATUSES}
+# fields whose change moves a grievance between officers / open counts
+TRACKED_FIELDS = ("assigned_officer_id", "status", "created_at")
+# the same, as they may appear in save(update_fields=...)
+TRACKED_UPDATE_FIELDS = set(TRACKED_FIELDS) | {"assigned_officer"}
+# change log actions written by the assign and PATCH views
+ASSIGN_ACTIONS = ("assigned_officer", "assigned_officer_changed")
+
+SECONDS_PER_DAY = 86400
+
+
+def snapshot(grievance):
+    """The tracked field values of an instance, as a dict."""
+    return {name: getattr(grievance, name) for name in TRACKED_FIELDS}
+
+
+def _open_key(state):
+    """(officer_id, status, created_at) while the grievance counts towards an officer, else None."""
+    if state is None or not state.get("assigned_officer_id") or state.get("status") not in OPEN_STATUSES:
+        return None
+    return state["assigned_officer_id"], state["status"], state["created_at"]
+
+
+def _update(officer_id, **changes):
+    rows = OfficerWorkload.objects.filter(officer_id=officer_id)
+    if not rows.update(**changes):
+        OfficerWorkload.objects.get_or_create(officer_id=officer_id)
+        rows.update(**changes)
+
+
+def _oldest_open(officer_id):
+    return (
+        Grievance.objects.filter(assigned_officer_id=officer_id, status__in=OPEN_STATUSES)
+        .order_by("created_at").values("created_at")[:1]
+    )
+
+
+def _add(officer_id, status, created_at, now):
+    field = COUNT_FIELDS[status]
+    _update(officer_id, **{field: F(field) + 1, "updated_at": now})
+    OfficerWorkload.objects.filter(officer_id=officer_id).filter(
+        Q(oldest_open_at__isnull=True) | Q(oldest_open_at__gt=created_at),
+    ).update(oldest_open_at=created_at)
+
+
+def _remove(officer_id, status, created_at, now):
+    field = COUNT_FIELDS[status]
+    _update(officer_id, **{field: F(field) - 1, "updated_at": now})
+    # only the oldest grievance leaving the set moves oldest_open_at: re-read it from the index
+    OfficerWorkload.objects.filter(officer_id=officer_id, oldest_open_at__gte=created_at).update(
+        oldest_open_at=Subquery(_oldest_open(officer_id)),
+    )
+
+
+def record_change(before=None, after=None):
+    """
+    Move one grievance's open-load contribution from `before` to `after` (snapshot dicts;
+    None for create/delete) and stamp last_assigned_at when the officer changed.
+    """
+    now = timezone.now()
+    old, new = _open_key(before), _open_key(after)
+    if old != new:
+        if old is not None:
+            _remove(*old, now)
+        if new is not None:
+            _add(*new, now)
+
+    new_officer = (after or {}).get("assigned_officer_id")
+    if new_officer and new_officer != (before or {}).get("assigned_officer_id"):
+        _update(new_officer, last_assigned_at=now, updated_at=now)
+
+
+def record_changes(changes):
+    """
+    record_change() for many (before, after) pairs (bulk imports and updates): one
+    counter update per officer and status touched, one oldest_open_at check per officer.
+    """
+    now = timezone.now()
+    counts = defaultdict(int)
+    added, removed, assigned = {}, {}, set()
+    for before, after in changes:
+        old, new = _open_key(before), _open_key(after)
+        if old != new:
+            if old is not None:
+                counts[old[:2]] -= 1
+                removed[old[0]] = min(removed.get(old[0], old[2]), old[2])
+            if new is not None:
+                counts[new[:2]] += 1
+                added[new[0]] = min(added.get(new[0], new[2]), new[2])
+        new_officer = (after or {}).get("assigned_officer_id")
+        if new_officer and new_officer != (before or {}).get("assigned_officer_id"):
+            assigned.add(new_officer)
+
+    for (officer_id, status), delta in counts.items():
+        if delta:
+            field = COUNT_FIELDS[status]
+            _update(officer_id, **{field: F(field) + delta, "updated_at": now})
+    for officer_id, created_at in removed.items():
+        OfficerWorkload.objects.filter(officer_id=officer_id, oldest_open_at__gte=created_at).update(
+            oldest_open_at=Subquery(_oldest_open(officer_id)),
+        )
+    for officer_id, created_at in added.items():
+        OfficerWorkload.objects.filter(officer_id=officer_id).filter(
+            Q(oldest_open_at__isnull=True) | Q(oldest_open_at__gt=created_at),
+        ).update(oldest_open_at=created_at)
+    for officer_id in assigned:
+        _update(officer_id, last_assigned_at=now, updated_at=now)
+
+
+def rebuild():
+    """
+    Recompute every officer's row from the grievance table; last_assigned_at is backfilled
+    from the assignment entries in the change log (or the newest assigned grievance).
+    Returns the number of rows written.
+    """
+    rows = {}
+
+    def row(officer_id):
+        if officer_id not in rows:
+            rows[officer_id] = OfficerWorkload(officer_id=officer_id)
+        return rows[officer_id]
+
+    with transaction.atomic():
+        OfficerWorkload.objects.all().delete()
+        grouped = (
+            Grievance.objects.filter(assigned_officer__isnull=False, status__in=OPEN_STATUSES)
+            .order_by().values("assigned_officer_id", "status")
+            .annotate(n=Count("id"), oldest=Min("created_at"))
+        )
+        for item in grouped:
+            stat = row(item["assigned_officer_id"])
+            setattr(stat, COUNT_FIELDS[item["status"]], item["n"])
+            if stat.oldest_open_at is None or item["oldest"] < stat.oldest_open_at:
+                stat.oldest_open_at = item["oldest"]
+
+        # grievances created already assigned have no log entry: their created_at counts too
+        last_assigned = dict(
+            Grievance.objects.filter(assigned_officer__isnull=False).order_by()
+            .values_list("assigned_officer_id").annotate(last=Max("created_at"))
+        )
+        assigned = ChangeLog.objects.filter(action__in=ASSIGN_ACTIONS).order_by().values("after").annotate(last=Max("timestamp"))
+        for item in assigned:
+            try:
+                officer_id = int(item["after"])
+            except (TypeError, ValueError):
+                continue  # unassignments are logged as "None"
+            if officer_id not in last_assigned or item["last"] > last_assigned[officer_id]:
+                last_assigned[officer_id] = item["last"]
+        # the log may name users that have since been deleted
+        for officer_id in get_user_model().objects.filter(pk__in=last_assigned).values_list("pk", flat=True):
+            row(officer_id).last_assigned_at = last_assigned[officer_id]
+
+        OfficerWorkload.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+EMPTY = {
+    "open": 0, "new": 0, "in_progress": 0, "escalated": 0,
+    "oldest_open_at": None, "oldest_open_days": None, "last_assigned_at": None,
+}
+
+
+def present(stat, now=None):
+    """API shape of a workload row; the oldest open age is measured at read time."""
+    now = now or timezone.now()
+    oldest = stat.oldest_open_at if stat.open_count else None
+    return {
+        "open": stat.open_count,
+        **{status: getattr(stat, field) for status, field in COUNT_FIELDS.items()},
+        "oldest_open_at": oldest.isoformat() if oldest else None,
+        "oldest_open_days": round((now - oldest).total_seconds() / SECONDS_PER_DAY, 1) if oldest else None,
+        "last_assigned_at": stat.last_assigned_at.isoformat() if stat.last_assigned_at else None,
+    }
+
+
+def by_officer(officer_ids):
+    """{officer_id: workload dict} for the given officers, in one primary-key read."""
+    now = timezone.now()
+    return {stat.officer_id: present(stat, now) for stat in OfficerWorkload.objects.filter(officer_id__in=officer_ids)}
@@ -193,3 +193,52 @@ PASSWORD_RESET_SUBJECT = "Password reset — Grievance Redressal System"
 
 
 
+
+# Admin panel grievance list counts: cache TTL (seconds) per filter signature, and the
+# row count above which expensive (search) filters report an estimate instead of COUNT(*).
+ADMINPANEL_COUNT_CACHE_TTL = 30
+ADMINPANEL_COUNT_ESTIMATE_THRESHOLD = 10000
+
+# Remarks per page in the admin grievance detail API (older ones via ?remarks_cursor=).
+ADMINPANEL_REMARKS_PAGE_SIZE = 50
+
+# Cache used by adminpanel.cache (analytics, categories, officers). locmem is per-process:
+# with several workers, point ADMINPANEL_CACHE_ALIAS at a shared backend (e.g. Redis) so
+# invalidation reaches all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "adminpanel",
+    }
+}
+ADMINPANEL_CACHE_ENABLED = True
+ADMINPANEL_CACHE_ALIAS = "default"
+ADMINPANEL_CACHE_TTL = 300
+
+# SLA deadline (days) when no SLAPolicy applies; 0 = no deadline. The global policy is
+# edited on the admin settings page, per-category/department ones via /api/sla-policies/.
+ADMINPANEL_SLA_DEFAULT_DAYS = 7
+
+# Where export_analytics_snapshot writes the columnar (.npy) snapshot read by
+# /adminpanel/api/analytics/snapshot/.
+ADMINPANEL_SNAPSHOT_DIR = BASE_DIR / "var" / "analytics_snapshot"
+
+# Background exports (/adminpanel/api/exports/): where files are written, who runs the
+# jobs ("thread": in the web process; "command": `manage.py run_export_worker`) and how
+# long finished files are kept (`manage.py expire_exports` deletes them).
+ADMINPANEL_EXPORT_DIR = BASE_DIR / "var" / "exports"
+ADMINPANEL_EXPORT_WORKER = "thread"
+ADMINPANEL_EXPORT_TTL_HOURS = 24
+
+# Tracking numbers each process reserves at a time from the per-year TrackingSequence
+# row. Larger blocks mean fewer writes to that row; unused numbers leave gaps on restart.
+ADMINPANEL_TRACKING_BLOCK_SIZE = 20
+
+# Change feed (/adminpanel/api/changes/): entries per response, the longest ?wait= a
+# long-poll may hold a worker, how long an id gap may stay open before it is taken for
+# a rolled-back write (writes must commit within it), and how many days of entries
+# `manage.py prune_changes` keeps.
+ADMINPANEL_CHANGES_BATCH_SIZE = 500
+ADMINPANEL_CHANGES_MAX_WAIT = 30
+ADMINPANEL_CHANGES_SETTLE_SECONDS = 30
+ADMINPANEL_CHANGES_RETENTION_DAYS = 30